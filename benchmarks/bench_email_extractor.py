@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+邮箱提取微基准
+对比各收集器原有的多正则提取实现与共享单次扫描提取器
+用法: python benchmarks/bench_email_extractor.py --size-mb 2 --repeat 5
+"""
+
+import argparse
+import random
+import re
+import sys
+import timeit
+from pathlib import Path
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from common.email_extractor import extract_emails
+
+# 原 MassiveUniversityCollector.email_patterns
+MASSIVE_PATTERNS = [
+    r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b',
+    r'\b[A-Za-z0-9._%+-]+\s*@\s*[A-Za-z0-9.-]+\s*\.\s*[A-Z|a-z]{2,}\b'
+]
+
+# 原 GlobalUniversityEmailCollector.email_patterns
+GLOBAL_PATTERNS = [
+    r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b',
+    r'\b[A-Za-z0-9._%+-]+\[at\][A-Za-z0-9.-]+\[dot\][A-Z|a-z]{2,}\b',
+    r'\b[A-Za-z0-9._%+-]+\s*@\s*[A-Za-z0-9.-]+\s*\.\s*[A-Z|a-z]{2,}\b'
+]
+
+
+def legacy_massive(text):
+    """原 massive_university_collector 的实现"""
+    emails = []
+    for pattern in MASSIVE_PATTERNS:
+        found_emails = re.findall(pattern, text, re.IGNORECASE)
+        for email in found_emails:
+            email = email.strip()
+            email = re.sub(r'\s+', '', email)
+            if re.match(r'^[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}$', email):
+                emails.append(email.lower())
+    return list(set(emails))
+
+
+def legacy_global(text):
+    """原 global_university_email_collector 的实现"""
+    emails = []
+    for pattern in GLOBAL_PATTERNS:
+        found_emails = re.findall(pattern, text, re.IGNORECASE)
+        for email in found_emails:
+            email = email.strip()
+            email = email.replace('[at]', '@').replace('[dot]', '.')
+            email = re.sub(r'\s+', '', email)
+            if re.match(r'^[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}$', email):
+                emails.append(email.lower())
+    return list(set(emails))
+
+
+def build_page(size_mb: float, seed: int = 42) -> str:
+    """生成接近真实大学首页的HTML：大量标记与脚本，少量邮箱"""
+    rng = random.Random(seed)
+    words = ['university', 'research', 'students', 'campus', 'faculty', 'admissions',
+             'international', 'news', 'events', 'library', 'contact', 'about']
+    blocks = []
+    size = 0
+    target = int(size_mb * 1024 * 1024)
+    i = 0
+    while size < target:
+        text = ' '.join(rng.choice(words) for _ in range(40))
+        if i % 50 == 0:
+            text += f' <a href="mailto:office{i}@uni.edu">office{i}@uni.edu</a>'
+        if i % 120 == 0:
+            text += f' dept{i} [at] uni [dot] edu'
+        block = (f'<div class="col-md-4 item-{i}"><p data-id="{i}">{text}</p>'
+                 f'<script>var x{i} = {{"k": {i}}};</script></div>\n')
+        blocks.append(block)
+        size += len(block)
+        i += 1
+    return ''.join(blocks)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='邮箱提取微基准')
+    parser.add_argument('--size-mb', type=float, default=2.0, help='页面大小 (默认: 2MB)')
+    parser.add_argument('--repeat', type=int, default=5, help='重复次数 (默认: 5)')
+    args = parser.parse_args()
+
+    page = build_page(args.size_mb)
+    no_email_page = page.replace('@', ' ').replace('[at]', ' ')
+    print(f"页面大小: {len(page) / 1024 / 1024:.2f} MB")
+
+    implementations = [
+        ('legacy_massive', legacy_massive),
+        ('legacy_global', legacy_global),
+        ('extract_emails', extract_emails),
+    ]
+    for label, page_text in [('含邮箱页面', page), ('无邮箱页面', no_email_page)]:
+        print(f"\n{label}:")
+        for name, func in implementations:
+            best = min(timeit.repeat(lambda: func(page_text), number=1, repeat=args.repeat))
+            found = len(func(page_text))
+            print(f"  {name:<16} {best * 1000:8.1f} ms  邮箱数 {found}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+收集器热点路径基准
+使用 benchmarks/fixtures 中录制的大学主页与联系页面离线运行，按 100/1k/10k 规模计时：
+邮箱提取、邮箱排序、页面解析、联系页面发现、URL国家推断、名称去重、CSV导出。
+每次运行追加一行JSON到 benchmarks/results/history.jsonl，便于跨提交对比
+用法: python benchmarks/bench_hot_paths.py --scales 100,1000 --repeat 3 --compare
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import timeit
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from common.html_links import scan_page
+from common.jsonl import iter_records
+from common.name_index import merge_records
+
+BENCH_DIR = Path(__file__).parent
+FIXTURES_DIR = BENCH_DIR / 'fixtures'
+DEFAULT_HISTORY = BENCH_DIR / 'results' / 'history.jsonl'
+RANKINGS_FILE = project_root / '2025_university_rankings.json'
+
+# 合成URL时使用的域名后缀（含容易误判的 .edu.au / .com / .co）
+URL_SUFFIXES = ('edu', 'ac.uk', 'edu.au', 'de', 'es', 'com', 'co', 'edu.co', 'fr', 'ac.jp', 'edu.cn', 'it')
+
+
+def load_fixtures() -> List[Dict]:
+    """读取夹具清单与页面内容"""
+    manifest = json.loads((FIXTURES_DIR / 'manifest.json').read_text(encoding='utf-8'))
+    for entry in manifest:
+        entry['html'] = (FIXTURES_DIR / entry['file']).read_text(encoding='utf-8')
+    return manifest
+
+
+def load_names() -> List[Dict]:
+    """排名数据中的大学名称（含国家），作为名称去重的语料"""
+    return [{'name': record['university'], 'country': record['country']} for record in iter_records(str(RANKINGS_FILE))]
+
+
+def build_workload(scale: int, fixtures: List[Dict], names: List[Dict], seed: int = 42) -> Dict:
+    """按规模构造输入：页面循环使用夹具，名称中约三分之一是重复或变体"""
+    rng = random.Random(seed)
+    pages = [fixtures[i % len(fixtures)] for i in range(scale)]
+    scanned = [(page['url'], scan_page(page['url'], page['html'])) for page in pages]
+    extracted = [page.emails() for _, page in scanned]
+    email_lists = [emails + [f"staff{i}@{url.split('/')[2]}" for i in range(rng.randint(0, 6))]
+                   for emails, (url, _) in zip(extracted, scanned)]
+
+    records = []
+    for i in range(scale):
+        base = names[i % len(names)]
+        name = base['name']
+        if i % 3 == 2:
+            # 变体：词序、大小写或重音不同
+            name = rng.choice([name.upper(), f"The {name}", name.replace('University of ', '') + ' University'])
+        records.append({'name': name, 'country': base['country']})
+
+    urls = [f"https://www.u{i}.{URL_SUFFIXES[i % len(URL_SUFFIXES)]}/about/contact" for i in range(scale)]
+    results = [{'university_name': record['name'], 'email': f"info@u{i}.edu" if i % 4 else ''}
+               for i, record in enumerate(records)]
+    return {
+        'pages': [page['html'] for page in pages],
+        'scanned': scanned,
+        'email_lists': email_lists,
+        'records': records,
+        'urls': urls,
+        'results': results,
+    }
+
+
+def make_benchmarks(workdir: str) -> Dict[str, Callable[[Dict], object]]:
+    """各收集器的热点路径；在临时目录中导入收集器，日志与进度文件不会写入仓库"""
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        from global_university_email_collector import GlobalUniversityEmailCollector
+        from massive_university_collector import MassiveUniversityCollector
+        massive = MassiveUniversityCollector()
+        global_collector = GlobalUniversityEmailCollector()
+    finally:
+        os.chdir(cwd)
+    logging.getLogger().setLevel(logging.WARNING)
+    csv_path = os.path.join(workdir, 'bench_export.csv')
+
+    def find_contact_pages(workload):
+        async def run():
+            for url, page in workload['scanned']:
+                await global_collector.find_contact_pages(url, page)
+        asyncio.run(run())
+
+    return {
+        'extract_emails_from_text': lambda w: [massive.extract_emails_from_text(html) for html in w['pages']],
+        'prioritize_emails': lambda w: [massive.prioritize_emails(emails) for emails in w['email_lists']],
+        'scan_page': lambda w: [scan_page(url, html) for (url, _), html in zip(w['scanned'], w['pages'])],
+        'find_contact_pages': find_contact_pages,
+        'extract_country_from_url': lambda w: [massive.extract_country_from_url(url) for url in w['urls']],
+        'name_dedup': lambda w: merge_records(w['records']),
+        'csv_export': lambda w: massive.export_to_csv(w['results'], csv_path),
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=project_root,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+def last_run(history: Path) -> Optional[Dict]:
+    """历史记录中最近的一次运行"""
+    if not history.exists():
+        return None
+    previous = None
+    for run in iter_records(str(history)):
+        previous = run
+    return previous
+
+
+def main():
+    parser = argparse.ArgumentParser(description='收集器热点路径基准')
+    parser.add_argument('--scales', default='100,1000,10000', help='规模列表 (默认: 100,1000,10000)')
+    parser.add_argument('--repeat', type=int, default=3, help='每项重复次数，取最快一次 (默认: 3)')
+    parser.add_argument('--only', help='只运行指定基准（逗号分隔）')
+    parser.add_argument('--history', default=str(DEFAULT_HISTORY), help='结果历史文件（JSON Lines）')
+    parser.add_argument('--compare', action='store_true', help='与历史中最近一次运行对比')
+    parser.add_argument('--fail-over', type=float, help='任一项比上次慢超过该倍数时以非零状态退出（如 1.25）')
+    args = parser.parse_args()
+
+    scales = [int(scale) for scale in args.scales.split(',')]
+    history = Path(args.history)
+    previous = last_run(history) if args.compare or args.fail_over else None
+    previous_results = {(r['benchmark'], r['scale']): r for r in previous['results']} if previous else {}
+
+    fixtures = load_fixtures()
+    names = load_names()
+    results = []
+    regressions = []
+    with tempfile.TemporaryDirectory() as workdir:
+        benchmarks = make_benchmarks(workdir)
+        selected = args.only.split(',') if args.only else list(benchmarks)
+        print(f"夹具页面: {len(fixtures)}，名称语料: {len(names)}")
+        for scale in scales:
+            workload = build_workload(scale, fixtures, names)
+            print(f"\n规模 {scale}:")
+            for name in selected:
+                times = timeit.repeat(lambda: benchmarks[name](workload), number=1, repeat=args.repeat)
+                best = min(times)
+                result = {
+                    'benchmark': name,
+                    'scale': scale,
+                    'best_s': round(best, 6),
+                    'mean_s': round(sum(times) / len(times), 6),
+                    'per_item_us': round(best / scale * 1e6, 3),
+                }
+                results.append(result)
+                line = f"  {name:<26} {best * 1000:10.2f} ms  {result['per_item_us']:10.2f} µs/条"
+                old = previous_results.get((name, scale))
+                if old:
+                    ratio = best / old['best_s'] if old['best_s'] else 1.0
+                    line += f"  对比上次 {ratio:5.2f}x"
+                    if args.fail_over and ratio > args.fail_over:
+                        regressions.append((name, scale, ratio))
+                print(line)
+
+    run = {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'repeat': args.repeat,
+        'fixtures': [entry['file'] for entry in fixtures],
+        'results': results,
+    }
+    history.parent.mkdir(parents=True, exist_ok=True)
+    with open(history, 'a', encoding='utf-8') as f:
+        f.write(json.dumps(run, ensure_ascii=False) + '\n')
+    print(f"\n结果已追加到: {history}")
+
+    if regressions:
+        for name, scale, ratio in regressions:
+            print(f"性能退化: {name} @ {scale} 慢了 {ratio:.2f}x")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
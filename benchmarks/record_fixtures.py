@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+录制基准测试用的页面
+抓取给定的大学主页/联系页面保存到 benchmarks/fixtures，并登记到 manifest.json，
+之后的基准测试完全离线运行
+用法: python benchmarks/record_fixtures.py https://www.upf.edu/ https://www.ox.ac.uk/contact --kind homepage
+"""
+
+import argparse
+import json
+import re
+import sys
+from pathlib import Path
+from urllib.parse import urlparse
+
+# 添加项目根目录到Python路径
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from common.fetcher import FetchConfig, SyncFetcher
+
+FIXTURES_DIR = Path(__file__).parent / 'fixtures'
+MANIFEST = FIXTURES_DIR / 'manifest.json'
+
+
+def fixture_name(url: str, kind: str) -> str:
+    """由URL生成夹具文件名"""
+    parsed = urlparse(url)
+    slug = re.sub(r'[^a-z0-9]+', '_', f"{parsed.hostname}{parsed.path}".lower()).strip('_')
+    return f"{kind}_{slug[:80]}.html"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='录制基准测试页面')
+    parser.add_argument('urls', nargs='+', help='要录制的页面URL')
+    parser.add_argument('--kind', choices=['homepage', 'contact'], default='homepage', help='页面类型 (默认: homepage)')
+    args = parser.parse_args()
+
+    manifest = json.loads(MANIFEST.read_text(encoding='utf-8')) if MANIFEST.exists() else []
+    recorded = {entry['url'] for entry in manifest}
+    fetcher = SyncFetcher(FetchConfig(max_retries=1))
+    try:
+        for url in args.urls:
+            result = fetcher.fetch(url)
+            if not result.ok:
+                print(f"✗ {url}: {result.error}")
+                continue
+            filename = fixture_name(url, args.kind)
+            (FIXTURES_DIR / filename).write_text(result.text, encoding='utf-8')
+            if url not in recorded:
+                manifest.append({'file': filename, 'url': result.final_url or url, 'kind': args.kind})
+                recorded.add(url)
+            print(f"✓ {url} -> {filename} ({len(result.text) / 1024:.1f} KB)")
+    finally:
+        fetcher.close()
+
+    MANIFEST.write_text(json.dumps(manifest, ensure_ascii=False, indent=2) + '\n', encoding='utf-8')
+
+
+if __name__ == '__main__':
+    main()
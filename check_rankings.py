@@ -4,88 +4,50 @@
 检查2025年大学排名数据
 """
 
-import sqlite3
-import json
+import argparse
 
-def check_2025_rankings():
-    """检查2025年大学排名数据"""
+from common.jsonl import write_records
+from common.ranking_store import RankingStore
+
+def check_2025_rankings(jsonl=False):
+    """检查2025年大学排名数据；jsonl=True 时导出为JSON Lines"""
+    output = '2025_university_rankings.jsonl' if jsonl else '2025_university_rankings.json'
     try:
-        # 连接数据库
-        conn = sqlite3.connect('database/rankings.db')
-        cursor = conn.cursor()
+        # 连接数据库（首次打开时建立 (year, rank)/(year, country) 索引）
+        store = RankingStore('database/rankings.db')
         
         # 检查2025年大学数量
-        cursor.execute('SELECT COUNT(*) FROM universities WHERE year = 2025')
-        count_2025 = cursor.fetchone()[0]
+        count_2025 = store.count(2025)
         print(f"2025年大学数量: {count_2025}")
         
         # 获取2025年前10所大学
-        cursor.execute('''
-            SELECT rank, university, country, research, reputation, employment, international, total_score, star_rating, year 
-            FROM universities 
-            WHERE year = 2025 
-            ORDER BY rank 
-            LIMIT 10
-        ''')
-        
         print("\n2025年前10所大学:")
         print("-" * 80)
         print(f"{'排名':<4} {'大学名称':<35} {'国家':<15} {'总分':<6} {'星级'}")
         print("-" * 80)
         
-        for row in cursor.fetchall():
-            rank, university, country, research, reputation, employment, international, total_score, star_rating, year = row
-            print(f"{rank:<4} {university:<35} {country:<15} {total_score:<6.1f} {star_rating}")
-        
-        # 获取所有2025年大学数据
-        cursor.execute('''
-            SELECT rank, university, country, research, reputation, employment, international, total_score, star_rating, year 
-            FROM universities 
-            WHERE year = 2025 
-            ORDER BY rank
-        ''')
-        
-        all_2025_data = cursor.fetchall()
-        
-        # 按国家统计
-        countries = {}
-        for row in all_2025_data:
-            country = row[2]
-            if country not in countries:
-                countries[country] = 0
-            countries[country] += 1
+        for uni in store.top(2025, 10):
+            print(f"{uni.rank:<4} {uni.university:<35} {uni.country:<15} {uni.total_score:<6.1f} {uni.star_rating}")
         
+        # 按国家统计（在SQL中聚合）
         print(f"\n2025年各国大学数量统计:")
         print("-" * 40)
-        for country, count in sorted(countries.items(), key=lambda x: x[1], reverse=True):
+        for country, count in store.country_histogram(2025):
             print(f"{country:<20} {count}")
         
-        # 导出为JSON文件
-        universities_2025 = []
-        for row in all_2025_data:
-            universities_2025.append({
-                'rank': row[0],
-                'university': row[1],
-                'country': row[2],
-                'research': row[3],
-                'reputation': row[4],
-                'employment': row[5],
-                'international': row[6],
-                'total_score': row[7],
-                'star_rating': row[8],
-                'year': row[9]
-            })
-        
-        with open('2025_university_rankings.json', 'w', encoding='utf-8') as f:
-            json.dump(universities_2025, f, ensure_ascii=False, indent=2)
+        # 逐条写出，不在内存中拼接整个JSON
+        exported = write_records(output, (uni.to_dict() for uni in store.iter_year(2025)))
         
-        print(f"\n已导出2025年大学排名数据到: 2025_university_rankings.json")
-        print(f"总共包含 {len(universities_2025)} 所大学")
+        print(f"\n已导出2025年大学排名数据到: {output}")
+        print(f"总共包含 {exported} 所大学")
         
-        conn.close()
+        store.close()
         
     except Exception as e:
         print(f"错误: {e}")
 
 if __name__ == "__main__":
-    check_2025_rankings() 
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='检查2025年大学排名数据')
+    parser.add_argument('--jsonl', action='store_true', help='导出为JSON Lines（默认导出JSON数组）')
+    args = parser.parse_args()
+    check_2025_rankings(jsonl=args.jsonl)
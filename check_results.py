@@ -5,22 +5,34 @@
 """
 
 import json
+from collections import deque
+from itertools import chain
+
 import pandas as pd
 
+from common.jsonl import iter_records, prefer_jsonl
+from common.name_index import NameIndex
+from common.result_stats import ResultAggregator
+
 def analyze_results():
     """分析邮箱收集结果"""
     
     # 读取测试结果
     try:
-        with open('universities_emails_test.json', 'r', encoding='utf-8') as f:
-            test_data = json.load(f)
+        # 逐条读取，国家与邮箱域名统计同时累计，只保留成功获取邮箱的大学
+        stats = ResultAggregator(email_field='official_email', count_field=None)
+        with_emails = []
+        for uni in iter_records(prefer_jsonl('universities_emails_test.json')):
+            stats.add(uni)
+            if uni['official_email']:
+                with_emails.append(uni)
+        test_total = stats.total
         
         print("=== 邮箱收集结果分析 ===")
-        print(f"测试大学总数: {len(test_data)}")
+        print(f"测试大学总数: {test_total}")
         
         # 统计成功获取邮箱的大学
-        with_emails = [u for u in test_data if u['official_email']]
-        success_rate = len(with_emails) / len(test_data) * 100
+        success_rate = len(with_emails) / test_total * 100
         
         print(f"成功获取邮箱的大学: {len(with_emails)}")
         print(f"成功率: {success_rate:.1f}%")
@@ -34,28 +46,13 @@ def analyze_results():
             print()
         
         # 按国家统计
-        countries = {}
-        for uni in with_emails:
-            country = uni['country']
-            if country not in countries:
-                countries[country] = 0
-            countries[country] += 1
-        
         print("=== 按国家统计 ===")
-        for country, count in sorted(countries.items(), key=lambda x: x[1], reverse=True):
-            print(f"{country}: {count} 所大学")
+        for country, group in stats.top_countries(successful=True):
+            print(f"{country}: {group.with_emails} 所大学")
         
         # 分析邮箱域名
-        domains = {}
-        for uni in with_emails:
-            if uni['official_email']:
-                domain = uni['official_email'].split('@')[1]
-                if domain not in domains:
-                    domains[domain] = 0
-                domains[domain] += 1
-        
         print("\n=== 邮箱域名统计 ===")
-        for domain, count in sorted(domains.items(), key=lambda x: x[1], reverse=True):
+        for domain, count in stats.email_domains.most_common():
             print(f"{domain}: {count} 个邮箱")
         
     except FileNotFoundError:
@@ -63,21 +60,26 @@ def analyze_results():
     
     # 读取最新进度文件
     try:
-        with open('progress_simple_50_150.json', 'r', encoding='utf-8') as f:
-            progress_data = json.load(f)
+        # 逐条读取，只保留计数和最近20条
+        progress_stats = ResultAggregator(email_field='official_email', count_field=None)
+        recent = deque(maxlen=20)
+        for uni in iter_records(prefer_jsonl('progress_simple_50_150.json')):
+            progress_stats.add(uni)
+            recent.append(uni)
+        progress_total = progress_stats.total
+        with_emails_progress = progress_stats.with_emails
         
         print(f"\n=== 最新进度分析 ===")
-        print(f"已处理大学总数: {len(progress_data)}")
+        print(f"已处理大学总数: {progress_total}")
         
         # 统计成功获取邮箱的大学
-        with_emails_progress = [u for u in progress_data if u['official_email']]
-        success_rate_progress = len(with_emails_progress) / len(progress_data) * 100
+        success_rate_progress = with_emails_progress / progress_total * 100
         
-        print(f"成功获取邮箱的大学: {len(with_emails_progress)}")
+        print(f"成功获取邮箱的大学: {with_emails_progress}")
         print(f"成功率: {success_rate_progress:.1f}%")
         
         # 显示最近成功的例子
-        recent_success = [u for u in progress_data[-20:] if u['official_email']]
+        recent_success = [u for u in recent if u['official_email']]
         if recent_success:
             print(f"\n=== 最近成功的例子 ===")
             for uni in recent_success:
@@ -89,30 +91,28 @@ def analyze_results():
 def export_summary():
     """导出汇总报告"""
     try:
-        # 读取所有进度文件
-        all_data = []
-        
-        # 读取测试结果
-        with open('universities_emails_test.json', 'r', encoding='utf-8') as f:
-            test_data = json.load(f)
-            all_data.extend(test_data)
-        
-        # 读取最新进度
-        with open('progress_simple_50_150.json', 'r', encoding='utf-8') as f:
-            progress_data = json.load(f)
-            all_data.extend(progress_data)
-        
-        # 去重
-        unique_data = []
+        # 逐条读取测试结果和最新进度，边读边去重
+        all_data = chain(
+            iter_records(prefer_jsonl('universities_emails_test.json')),
+            iter_records(prefer_jsonl('progress_simple_50_150.json')),
+        )
+        
+        # 按排名去重，排名不同但名称/官网相同的也视为同一所（只保留成功获取邮箱的大学）
+        total = 0
+        with_emails = []
         seen_ranks = set()
+        index = NameIndex()
         for uni in all_data:
-            if uni['rank'] not in seen_ranks:
-                unique_data.append(uni)
-                seen_ranks.add(uni['rank'])
+            if uni['rank'] in seen_ranks:
+                continue
+            seen_ranks.add(uni['rank'])
+            _, is_new = index.match_or_add(uni['university'], uni.get('website', ''), uni.get('country', ''))
+            if is_new:
+                total += 1
+                if uni['official_email']:
+                    with_emails.append(uni)
         
         # 统计
-        total = len(unique_data)
-        with_emails = [u for u in unique_data if u['official_email']]
         success_rate = len(with_emails) / total * 100
         
         # 创建汇总报告
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+无头浏览器池
+N个长期存活的无头Chrome工作线程共享一个任务队列，每个浏览器复用同一个标签页，
+页面加载有时间预算，超时后停止加载并直接读取已渲染的内容
+"""
+
+import logging
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Callable, List, Optional
+
+try:
+    from selenium import webdriver
+    from selenium.common.exceptions import TimeoutException, WebDriverException
+    from selenium.webdriver.chrome.options import Options
+    from selenium.webdriver.support.ui import WebDriverWait
+except ImportError:  # 只在需要渲染时才要求安装selenium
+    webdriver = None
+
+logger = logging.getLogger(__name__)
+
+
+def headless_chrome():
+    """创建无头Chrome（禁用图片以减少内存与带宽）"""
+    options = Options()
+    options.add_argument('--headless')
+    options.add_argument('--no-sandbox')
+    options.add_argument('--disable-dev-shm-usage')
+    options.add_argument('--blink-settings=imagesEnabled=false')
+    return webdriver.Chrome(options=options)
+
+
+class BrowserPool:
+    """浏览器池：submit() 入队渲染任务，返回页面HTML的Future"""
+
+    def __init__(self, size: int = 2, page_load_timeout: float = 15, render_wait: float = 2.0,
+                 max_pages_per_browser: int = 200,
+                 driver_factory: Optional[Callable[[], object]] = None):
+        if webdriver is None:
+            raise RuntimeError("BrowserPool 需要安装 selenium")
+        self.size = size
+        self.page_load_timeout = page_load_timeout  # 单页加载预算（秒）
+        self.render_wait = render_wait  # 加载完成后等待脚本渲染的最长时间（秒）
+        self.max_pages_per_browser = max_pages_per_browser  # 达到后重启浏览器，防止内存持续增长
+        self.driver_factory = driver_factory or headless_chrome
+        self._tasks: queue.Queue = queue.Queue()
+        self._workers: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def submit(self, url: str) -> Future:
+        """提交渲染任务；浏览器在第一次提交时才启动"""
+        if self._closed:
+            raise RuntimeError("BrowserPool 已关闭")
+        self._ensure_workers()
+        future = Future()
+        self._tasks.put((url, future))
+        return future
+
+    def render(self, url: str) -> Optional[str]:
+        """渲染单个页面，失败返回None"""
+        return self.submit(url).result()
+
+    def render_many(self, urls: List[str]) -> List[Optional[str]]:
+        """并行渲染多个页面，结果顺序与输入一致"""
+        futures = [self.submit(url) for url in urls]
+        return [future.result() for future in futures]
+
+    def close(self):
+        """等待队列中的任务完成并关闭所有浏览器"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            workers = list(self._workers)
+        for _ in workers:
+            self._tasks.put(None)
+        for worker in workers:
+            worker.join()
+
+    def _ensure_workers(self):
+        with self._lock:
+            while len(self._workers) < self.size:
+                worker = threading.Thread(target=self._run, name=f'browser-{len(self._workers)}', daemon=True)
+                worker.start()
+                self._workers.append(worker)
+
+    def _run(self):
+        """工作线程：独占一个浏览器，循环处理队列中的任务"""
+        driver = None
+        pages = 0
+        try:
+            while True:
+                task = self._tasks.get()
+                if task is None:
+                    break
+                url, future = task
+                if not future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    if driver is None or pages >= self.max_pages_per_browser:
+                        self._quit(driver)
+                        driver = self.driver_factory()
+                        driver.set_page_load_timeout(self.page_load_timeout)
+                        pages = 0
+                    pages += 1
+                    future.set_result(self._load(driver, url))
+                except Exception as e:
+                    # 浏览器崩溃或无法启动：丢弃当前实例，下个任务重新创建
+                    logger.error(f"浏览器渲染失败 {url}: {e}")
+                    self._quit(driver)
+                    driver = None
+                    future.set_result(None)
+        finally:
+            self._quit(driver)
+
+    def _load(self, driver, url: str) -> Optional[str]:
+        """在复用的标签页中打开URL，超出加载预算时停止加载并读取当前内容"""
+        try:
+            driver.get(url)
+        except TimeoutException:
+            driver.execute_script('window.stop();')
+        try:
+            WebDriverWait(driver, self.render_wait).until(
+                lambda d: d.execute_script('return document.readyState') == 'complete'
+            )
+        except (TimeoutException, WebDriverException):
+            pass
+        return driver.page_source
+
+    @staticmethod
+    def _quit(driver):
+        if driver is not None:
+            try:
+                driver.quit()
+            except Exception:
+                pass
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+追加式断点存储
+基于SQLite WAL模式：每条记录只写入一次，单条写入即是一次原子提交，
+中断后恢复无需重写或重新解析整个进度文件
+"""
+
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Any, Iterator, Optional, Set
+
+
+class CheckpointStore:
+    """按 (kind, key) 记录的断点存储，可在多线程间共享"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        # isolation_level=None：每条语句自动提交，WAL下提交只是一次顺序追加
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS checkpoints (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                kind TEXT NOT NULL,
+                key TEXT NOT NULL,
+                data TEXT,
+                updated_at TEXT NOT NULL,
+                UNIQUE (kind, key)
+            )
+        ''')
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS checkpoint_meta (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            )
+        ''')
+
+    def add(self, kind: str, key: str, data: Any = None) -> bool:
+        """记录新条目，已存在则忽略；返回是否新增"""
+        with self._lock:
+            cursor = self._conn.execute(
+                'INSERT OR IGNORE INTO checkpoints (kind, key, data, updated_at) VALUES (?, ?, ?, ?)',
+                (kind, key, self._dump(data), datetime.now().isoformat())
+            )
+            return cursor.rowcount > 0
+
+    def put(self, kind: str, key: str, data: Any = None):
+        """记录或覆盖条目，覆盖时保留原有顺序"""
+        with self._lock:
+            self._conn.execute(
+                '''INSERT INTO checkpoints (kind, key, data, updated_at) VALUES (?, ?, ?, ?)
+                   ON CONFLICT (kind, key) DO UPDATE SET data = excluded.data, updated_at = excluded.updated_at''',
+                (kind, key, self._dump(data), datetime.now().isoformat())
+            )
+
+    def has(self, kind: str, key: str) -> bool:
+        """按唯一索引查询条目是否存在"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT 1 FROM checkpoints WHERE kind = ? AND key = ?', (kind, key)
+            ).fetchone()
+        return row is not None
+
+    def get(self, kind: str, key: str) -> Any:
+        """读取条目数据，不存在时返回None"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT data FROM checkpoints WHERE kind = ? AND key = ?', (kind, key)
+            ).fetchone()
+        return self._load(row[0]) if row else None
+
+    def keys(self, kind: str) -> Set[str]:
+        """某类条目的全部键"""
+        with self._lock:
+            rows = self._conn.execute('SELECT key FROM checkpoints WHERE kind = ?', (kind,)).fetchall()
+        return {row[0] for row in rows}
+
+    def values(self, kind: str) -> Iterator[Any]:
+        """按写入顺序逐条产出某类条目的数据（跳过无数据的条目）"""
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT data FROM checkpoints WHERE kind = ? AND data IS NOT NULL ORDER BY seq', (kind,)
+            ).fetchall()
+        for row in rows:
+            yield self._load(row[0])
+
+    def count(self, kind: str) -> int:
+        """某类条目的数量"""
+        with self._lock:
+            return self._conn.execute('SELECT COUNT(*) FROM checkpoints WHERE kind = ?', (kind,)).fetchone()[0]
+
+    def get_meta(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        """读取元数据"""
+        with self._lock:
+            row = self._conn.execute('SELECT value FROM checkpoint_meta WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else default
+
+    def set_meta(self, key: str, value: str):
+        """写入元数据"""
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO checkpoint_meta (key, value) VALUES (?, ?)', (key, value)
+            )
+
+    def checkpoint(self):
+        """把WAL合并回主库，控制WAL文件大小"""
+        with self._lock:
+            self._conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+
+    def close(self):
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()
+
+    @staticmethod
+    def _dump(data: Any) -> Optional[str]:
+        return None if data is None else json.dumps(data, ensure_ascii=False)
+
+    @staticmethod
+    def _load(raw: Optional[str]) -> Any:
+        return None if raw is None else json.loads(raw)
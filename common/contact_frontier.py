@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+联系页面发现
+按锚文本、URL路径深度和语言版本给候选联系页面打分，
+每轮并发抓取得分最高的几个候选，一旦找到高优先级邮箱立即停止
+"""
+
+import asyncio
+import heapq
+import re
+from typing import Awaitable, Callable, Iterable, List, Optional, Sequence
+from urllib.parse import urljoin, urlparse
+
+from common.email_extractor import extract_emails
+from common.html_links import Link, ScannedPage, scan_page
+
+# 找到这些邮箱后即可停止继续抓取
+HIGH_PRIORITY_MAILBOXES = ('international@', 'admissions@', 'admission@', 'info@')
+
+# 锚文本/路径关键词权重（含西班牙语、德语、法语、意大利语变体）
+CONTACT_KEYWORDS = {
+    'contact': 10, 'contacto': 10, 'contactar': 9, 'contacta': 9, 'kontakt': 10, 'contatti': 10,
+    'get in touch': 9, 'enquiries': 8, 'enquiry': 8, 'inquiries': 7, 'inquiry': 7,
+    'international': 8, 'internacional': 8, 'relaciones internacionales': 9,
+    'admissions': 7, 'admission': 7, 'admisiones': 7, 'acceso': 4,
+    'cooperacion': 4, 'cooperación': 4, 'relaciones': 5, 'global': 4,
+    'about': 3, 'acerca': 3, 'sobre': 2, 'info': 2, 'office': 2, 'oficina': 2,
+}
+
+# 没有页面链接时依次猜测的常见联系页面路径
+DEFAULT_CONTACT_PATHS = (
+    'contact', 'contact-us', 'contacto', 'en/contact', 'about/contact',
+    'enquiries', 'admissions', 'international',
+)
+
+# 猜测路径的基础得分：低于明确的"Contact"链接，高于只含弱关键词的链接
+_GUESS_SCORE = 6.0
+
+# 路径关键词权重相对锚文本的折扣
+_PATH_WEIGHT = 0.6
+
+# 每多一级路径的扣分
+_DEPTH_PENALTY = 1.0
+
+# 其他语言版本的扣分与英语/主页语言版本的加分
+_OTHER_LANGUAGE_PENALTY = 4.0
+_ENGLISH_BONUS = 1.0
+
+_LANGUAGE_SEGMENT = re.compile(r'^[a-z]{2}(?:[-_][a-z]{2})?$')
+
+_SKIPPED_SUFFIXES = ('.pdf', '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx', '.zip',
+                     '.jpg', '.jpeg', '.png', '.gif', '.svg', '.mp4', '.mp3')
+
+_WORD_SEPARATORS = re.compile(r'[-_/.]+')
+
+
+def is_priority_mailbox(email: str) -> bool:
+    """是否为高优先级邮箱（国际处、招生处、综合信息）"""
+    email = email.lower()
+    return any(email.startswith(prefix) for prefix in HIGH_PRIORITY_MAILBOXES)
+
+
+def site_url(website: str, path: str) -> str:
+    """拼接站内路径，避免以/结尾的网站产生 //contact"""
+    return urljoin(website.rstrip('/') + '/', path.lstrip('/'))
+
+
+def _keyword_score(text: str) -> float:
+    text = text.lower()
+    return max((weight for keyword, weight in CONTACT_KEYWORDS.items() if keyword in text), default=0)
+
+
+def _site_key(host: str) -> str:
+    return host[4:] if host.startswith('www.') else host
+
+
+def _url_key(url: str) -> str:
+    """去重键：忽略协议、片段和末尾斜杠"""
+    parsed = urlparse(url)
+    return f"{parsed.netloc.lower()}{parsed.path.rstrip('/')}?{parsed.query}"
+
+
+class ContactFrontier:
+    """联系页面候选队列，按得分从高到低出队"""
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url
+        self._site = _site_key(urlparse(base_url).netloc.lower())
+        self._heap: List[tuple] = []
+        self._seen = {_url_key(base_url)}
+        self._counter = 0
+        # 主页本身位于语言前缀下（如 /es/）时，该语言不扣分
+        segments = [segment for segment in urlparse(base_url).path.lower().split('/') if segment]
+        self._home_language = segments[0] if segments and _LANGUAGE_SEGMENT.match(segments[0]) else 'en'
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def score_link(self, link: Link) -> Optional[float]:
+        """计算链接得分；不在本站、不是网页或不相关的链接返回None"""
+        href = link.href
+        if not href or href.startswith(('#', 'javascript:', 'tel:', 'mailto:')):
+            return None
+        url = link.absolute(self.base_url)
+        parsed = urlparse(url)
+        host = _site_key(parsed.netloc.lower())
+        # 只跟进本站及其子域名（如 international.uni.ac.uk）
+        if parsed.scheme not in ('http', 'https') or not (host == self._site or host.endswith('.' + self._site)):
+            return None
+        path = parsed.path.lower()
+        if path.endswith(_SKIPPED_SUFFIXES):
+            return None
+
+        score = max(_keyword_score(link.text),
+                    _PATH_WEIGHT * _keyword_score(_WORD_SEPARATORS.sub(' ', path)))
+        if score <= 0:
+            return None
+        return score + self._path_adjustment(path)
+
+    def add_links(self, links: Iterable[Link]):
+        """加入页面中的链接"""
+        for link in links:
+            score = self.score_link(link)
+            if score is not None:
+                self._push(link.absolute(self.base_url), score)
+
+    def add_guesses(self, paths: Sequence[str]):
+        """加入猜测的联系页面路径，按给定顺序递减得分"""
+        for index, path in enumerate(paths):
+            url = site_url(self.base_url, path)
+            self._push(url, _GUESS_SCORE - 0.1 * index + self._path_adjustment(urlparse(url).path.lower()))
+
+    def pop_batch(self, size: int) -> List[str]:
+        """取出得分最高的size个候选"""
+        batch = []
+        while self._heap and len(batch) < size:
+            batch.append(heapq.heappop(self._heap)[2])
+        return batch
+
+    def _push(self, url: str, score: float):
+        key = _url_key(url)
+        if key in self._seen:
+            return
+        self._seen.add(key)
+        self._counter += 1
+        heapq.heappush(self._heap, (-score, self._counter, url))
+
+    def _path_adjustment(self, path: str) -> float:
+        """路径越深扣分越多；英语或主页语言版本加分，其他语言版本扣分"""
+        segments = [segment for segment in path.split('/') if segment]
+        adjustment = -_DEPTH_PENALTY * max(len(segments) - 1, 0)
+        if segments and _LANGUAGE_SEGMENT.match(segments[0]):
+            # 语言前缀本身不算深度
+            adjustment += _DEPTH_PENALTY
+            preferred = segments[0].startswith('en') or segments[0] == self._home_language
+            adjustment += _ENGLISH_BONUS if preferred else -_OTHER_LANGUAGE_PENALTY
+        return adjustment
+
+
+async def discover_contact_emails(fetch_text: Callable[[str], Awaitable[Optional[str]]],
+                                  website: str,
+                                  home_page: Optional[ScannedPage] = None,
+                                  extract: Callable[[str], List[str]] = extract_emails,
+                                  guessed_paths: Sequence[str] = DEFAULT_CONTACT_PATHS,
+                                  batch_size: int = 2,
+                                  max_pages: int = 6,
+                                  is_priority: Callable[[str], bool] = is_priority_mailbox) -> List[str]:
+    """
+    从大学官网发现邮箱：先看主页，再按得分并发抓取联系页面候选，
+    找到高优先级邮箱后立即停止并取消未完成的请求。返回去重后的邮箱（按发现顺序）
+    """
+    emails: List[str] = []
+
+    def collect(html: Optional[str]) -> bool:
+        """收集邮箱，返回是否已找到高优先级邮箱"""
+        if html:
+            for email in extract(html):
+                if email not in emails:
+                    emails.append(email)
+        return any(is_priority(email) for email in emails)
+
+    if home_page is None:
+        html = await fetch_text(website)
+        home_page = scan_page(website, html) if html else None
+    if home_page and collect(home_page.html):
+        return emails
+
+    frontier = ContactFrontier(website)
+    if home_page:
+        frontier.add_links(home_page.links)
+    frontier.add_guesses(guessed_paths)
+
+    fetched = 0
+    while frontier and fetched < max_pages:
+        batch = frontier.pop_batch(min(batch_size, max_pages - fetched))
+        fetched += len(batch)
+        if await _fetch_until_found(fetch_text, batch, collect):
+            break
+
+    return emails
+
+
+async def _fetch_until_found(fetch_text: Callable[[str], Awaitable[Optional[str]]], urls: List[str],
+                             collect: Callable[[Optional[str]], bool]) -> bool:
+    """并发抓取一批URL，按完成顺序处理；找到高优先级邮箱后取消其余请求"""
+    pending = {asyncio.ensure_future(fetch_text(url)) for url in urls}
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if not task.cancelled() and task.exception() is None and isinstance(task.result(), str):
+                    if collect(task.result()):
+                        return True
+        return False
+    finally:
+        for task in pending:
+            task.cancel()
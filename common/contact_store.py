@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+大学联系邮箱表
+在 database/rankings.db 中维护与 universities.id 关联的 contacts 表
+（邮箱、角色、大学官网、首次发现与最近验证时间），并批量导入各收集器的输出文件：
+progress_simple_*.json、universities_emails_test.json、successful_emails.csv、
+global_universities_emails_*.csv
+"""
+
+import csv
+import os
+import sqlite3
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from common.jsonl import is_jsonl, iter_records
+from common.name_index import NameIndex
+from common.ranking_store import DEFAULT_DB_PATH
+
+# 按邮箱前缀识别的角色（按顺序匹配）
+ROLE_PREFIXES = (
+    ('international', ('international', 'intl', 'global', 'exchange', 'incoming', 'outgoing', 'erasmus',
+                       'mobility', 'relaciones.internacionales', 'ori')),
+    ('admissions', ('admission', 'admissions', 'admisiones', 'apply', 'enrol', 'enroll', 'recruitment')),
+    ('info', ('info', 'information', 'informacion', 'enquiries', 'enquiry', 'inquiries', 'contact',
+              'general', 'office', 'secretaria', 'registro')),
+)
+
+_SCHEMA = (
+    '''CREATE TABLE IF NOT EXISTS contacts (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        university_id INTEGER NOT NULL REFERENCES universities (id) ON DELETE CASCADE,
+        email TEXT NOT NULL,
+        role TEXT NOT NULL,
+        website TEXT,
+        source_file TEXT,
+        first_seen TEXT NOT NULL,
+        last_verified TEXT,
+        UNIQUE (university_id, email)
+    )''',
+    'CREATE INDEX IF NOT EXISTS idx_contacts_role ON contacts (role, university_id)',
+    'CREATE INDEX IF NOT EXISTS idx_contacts_email ON contacts (email)',
+)
+
+# 结果文件中可能包含邮箱的字段
+_EMAIL_FIELDS = ('official_email', 'contact_email', 'best_email', 'email')
+_EMAIL_LIST_FIELDS = ('all_emails', 'emails')
+
+
+def _has_prefix(local: str, prefix: str) -> bool:
+    """前缀后紧跟分隔符或结束；较长的前缀允许直接连写（如 internationaloffice）"""
+    if not local.startswith(prefix):
+        return False
+    rest = local[len(prefix):]
+    return not rest or not rest[0].isalpha() or len(prefix) > 4
+
+
+def classify_role(email: str) -> str:
+    """按邮箱前缀判断角色：international / admissions / info / other"""
+    local = email.split('@', 1)[0].lower()
+    for role, prefixes in ROLE_PREFIXES:
+        if any(_has_prefix(local, prefix) for prefix in prefixes):
+            return role
+    return 'other'
+
+
+@dataclass
+class ContactRow:
+    """结果文件中的一所大学及其邮箱"""
+    university: str
+    rank: Optional[int] = None
+    year: Optional[int] = None
+    country: str = ''
+    website: str = ''
+    emails: List[str] = field(default_factory=list)
+
+
+@dataclass
+class LoadReport:
+    """一个文件的导入结果"""
+    path: str
+    rows: int = 0
+    matched: int = 0
+    inserted: int = 0  # 新写入的 (大学, 邮箱)
+    updated: int = 0  # 已存在且提前了首次发现时间或补上了官网的
+    unmatched: List[str] = field(default_factory=list)
+
+
+def _to_int(value) -> Optional[int]:
+    try:
+        return int(value) if value not in (None, '') else None
+    except (TypeError, ValueError):
+        return None
+
+
+def contact_row(record: Dict, default_year: Optional[int] = None) -> Optional[ContactRow]:
+    """把各收集器的结果记录统一为 ContactRow；没有大学名称时返回None"""
+    name = (record.get('university') or record.get('university_name') or record.get('name') or '').strip()
+    if not name:
+        return None
+    emails: List[str] = []
+    for key in _EMAIL_FIELDS:
+        value = record.get(key)
+        if isinstance(value, str) and '@' in value:
+            emails.append(value.strip().lower())
+    for key in _EMAIL_LIST_FIELDS:
+        value = record.get(key)
+        if isinstance(value, list):
+            emails.extend(email.strip().lower() for email in value if isinstance(email, str) and '@' in email)
+    return ContactRow(
+        university=name,
+        rank=_to_int(record.get('rank')),
+        year=_to_int(record.get('year')) or default_year,
+        country=(record.get('country') or '').strip(),
+        website=(record.get('website') or '').strip(),
+        emails=list(dict.fromkeys(emails)),
+    )
+
+
+def read_contact_file(path: str, default_year: Optional[int] = None) -> Iterator[ContactRow]:
+    """逐条读取结果文件（JSON数组、JSON Lines或CSV）"""
+    if path.lower().endswith('.json') or is_jsonl(path):
+        records: Iterable[Dict] = iter_records(path)
+        for record in records:
+            row = contact_row(record, default_year)
+            if row is not None:
+                yield row
+    else:
+        with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+            for record in csv.DictReader(f):
+                row = contact_row(record, default_year)
+                if row is not None:
+                    yield row
+
+
+class ContactStore:
+    """contacts 表的导入与查询接口"""
+
+    def __init__(self, path: str = DEFAULT_DB_PATH):
+        self.path = path
+        self._conn = sqlite3.connect(path)
+        self._conn.execute('PRAGMA foreign_keys = ON')
+        with self._conn:
+            for statement in _SCHEMA:
+                self._conn.execute(statement)
+            # 旧版本把大学官网存在 source_url 列中（并不是发现邮箱的页面）
+            columns = {row[1] for row in self._conn.execute('PRAGMA table_info(contacts)')}
+            if 'source_url' in columns:
+                self._conn.execute('ALTER TABLE contacts RENAME COLUMN source_url TO website')
+        self._rank_ids: Dict[int, Dict[int, int]] = {}
+        self._name_indexes: Dict[int, NameIndex] = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def resolve_university(self, row: ContactRow) -> Optional[int]:
+        """按 (year, rank) 找到 universities.id；没有排名时按名称模糊匹配"""
+        if row.year is None:
+            return None
+        if row.rank is not None:
+            university_id = self._ranks(row.year).get(row.rank)
+            if university_id is not None:
+                return university_id
+        entry = self._names(row.year).find(row.university, country=row.country)
+        return entry.data if entry else None
+
+    def load_rows(self, rows: Iterable[ContactRow], source_file: str = '',
+                  seen_at: Optional[str] = None) -> LoadReport:
+        """在单个事务中导入邮箱；已存在的 (大学, 邮箱) 保留最早的发现时间，新增与更新分别计数"""
+        report = LoadReport(source_file)
+        seen_at = seen_at or datetime.now().isoformat(timespec='seconds')
+        values: List[Tuple] = []
+        for row in rows:
+            report.rows += 1
+            if not row.emails:
+                continue
+            university_id = self.resolve_university(row)
+            if university_id is None:
+                report.unmatched.append(row.university)
+                continue
+            report.matched += 1
+            for email in row.emails:
+                values.append((university_id, email, classify_role(email), row.website or None,
+                               source_file, seen_at))
+        with self._conn:
+            before = self._conn.total_changes
+            self._conn.executemany('''
+                INSERT INTO contacts (university_id, email, role, website, source_file, first_seen)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT (university_id, email) DO NOTHING
+            ''', values)
+            report.inserted = self._conn.total_changes - before
+            # 只更新确有变化的已有记录，重复导入同一文件时不计数
+            before = self._conn.total_changes
+            self._conn.executemany('''
+                UPDATE contacts SET
+                    first_seen = MIN(first_seen, :seen_at),
+                    website = COALESCE(website, :website)
+                WHERE university_id = :university_id AND email = :email
+                  AND (first_seen > :seen_at OR (website IS NULL AND :website IS NOT NULL))
+            ''', ({'university_id': value[0], 'email': value[1], 'website': value[3], 'seen_at': value[5]}
+                  for value in values))
+            report.updated = self._conn.total_changes - before
+        return report
+
+    def load_file(self, path: str, default_year: Optional[int] = None) -> LoadReport:
+        """导入一个结果文件，首次发现时间取文件修改时间"""
+        seen_at = datetime.fromtimestamp(os.path.getmtime(path)).isoformat(timespec='seconds')
+        return self.load_rows(read_contact_file(path, default_year), os.path.basename(path), seen_at)
+
+    def unverified_emails(self) -> List[str]:
+        """尚未验证过的邮箱"""
+        rows = self._conn.execute('SELECT DISTINCT email FROM contacts WHERE last_verified IS NULL').fetchall()
+        return [row[0] for row in rows]
+
+    def mark_verified(self, emails: Iterable[str], verified_at: Optional[str] = None) -> int:
+        """记录邮箱的验证时间，返回更新的行数"""
+        verified_at = verified_at or datetime.now().isoformat(timespec='seconds')
+        with self._conn:
+            before = self._conn.total_changes
+            self._conn.executemany('UPDATE contacts SET last_verified = ? WHERE email = ?',
+                                   ((verified_at, email) for email in emails))
+            return self._conn.total_changes - before
+
+    def universities_with_contact(self, year: int, max_rank: Optional[int] = None, role: Optional[str] = None,
+                                  verified: bool = False) -> List[Tuple]:
+        """某年（排名前max_rank）拥有指定角色邮箱的大学：(rank, university, country, email, role, last_verified)"""
+        conditions = ['u.year = ?']
+        params: List = [year]
+        if max_rank is not None:
+            conditions.append('u.rank <= ?')
+            params.append(max_rank)
+        if role:
+            conditions.append('c.role = ?')
+            params.append(role)
+        if verified:
+            conditions.append('c.last_verified IS NOT NULL')
+        rows = self._conn.execute(f'''
+            SELECT u.rank, u.university, u.country, c.email, c.role, c.last_verified
+            FROM universities AS u
+            JOIN contacts AS c ON c.university_id = u.id
+            WHERE {' AND '.join(conditions)}
+            ORDER BY u.rank, c.role, c.email
+        ''', params).fetchall()
+        return rows
+
+    def role_counts(self, year: int) -> List[Tuple[str, int]]:
+        """某年各角色邮箱覆盖的大学数"""
+        return self._conn.execute('''
+            SELECT c.role, COUNT(DISTINCT c.university_id)
+            FROM contacts AS c JOIN universities AS u ON u.id = c.university_id
+            WHERE u.year = ?
+            GROUP BY c.role ORDER BY 2 DESC
+        ''', (year,)).fetchall()
+
+    def close(self):
+        """关闭数据库连接"""
+        self._conn.close()
+
+    def _ranks(self, year: int) -> Dict[int, int]:
+        if year not in self._rank_ids:
+            rows = self._conn.execute('SELECT rank, id FROM universities WHERE year = ?', (year,))
+            ranks: Dict[int, int] = {}
+            for rank, university_id in rows:
+                ranks.setdefault(rank, university_id)
+            self._rank_ids[year] = ranks
+        return self._rank_ids[year]
+
+    def _names(self, year: int) -> NameIndex:
+        if year not in self._name_indexes:
+            index = NameIndex()
+            rows = self._conn.execute('SELECT id, university, country FROM universities WHERE year = ?', (year,))
+            for university_id, university, country in rows:
+                index.add(university, country=country or '', data=university_id)
+            self._name_indexes[year] = index
+        return self._name_indexes[year]
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+DNS预检
+在抓取之前批量解析网站主机名并检查邮箱域名的MX记录，
+解析结果在各阶段之间共享缓存，不存在的域名(NXDOMAIN)不再进入抓取阶段。
+A/AAAA与MX查询都走dnspython的异步解析器，不占用默认线程池（aiohttp的ThreadedResolver
+也在用）；未安装dnspython时getaddrinfo在按并发数分配的专用线程池中执行
+"""
+
+import asyncio
+import ipaddress
+import logging
+import socket
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Optional
+from urllib.parse import urlparse
+
+try:
+    import dns.asyncresolver
+    import dns.exception
+    import dns.resolver
+except ImportError:  # 未安装dnspython时，用getaddrinfo解析主机名，MX检查退化为主机名解析
+    dns = None
+
+logger = logging.getLogger(__name__)
+
+# 主机解析状态
+DNS_OK = 'ok'
+DNS_NXDOMAIN = 'nxdomain'  # 域名不存在，可以安全跳过
+DNS_ERROR = 'error'  # 超时等临时错误，仍然尝试抓取
+
+# getaddrinfo 表示"域名不存在"的错误码
+_NXDOMAIN_ERRNOS = {getattr(socket, name) for name in ('EAI_NONAME', 'EAI_NODATA') if hasattr(socket, name)}
+
+
+def _is_ip_address(host: str) -> bool:
+    try:
+        ipaddress.ip_address(host)
+        return True
+    except ValueError:
+        return False
+
+
+def url_host(url: str) -> str:
+    """从URL中取出主机名"""
+    return (urlparse(url).hostname or '').lower()
+
+
+class DNSResolver:
+    """有界并发的异步解析器，主机与MX结果均缓存"""
+
+    def __init__(self, concurrency: int = 100, timeout: float = 5.0):
+        self.timeout = timeout
+        self.concurrency = concurrency
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._hosts: Dict[str, 'asyncio.Future[str]'] = {}
+        self._mail_domains: Dict[str, 'asyncio.Future[str]'] = {}
+        self._dns_resolver = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        if dns is not None:
+            self._dns_resolver = dns.asyncresolver.Resolver()
+            self._dns_resolver.lifetime = timeout
+
+    async def resolve_host(self, host: str) -> str:
+        """解析主机名，返回 DNS_OK / DNS_NXDOMAIN / DNS_ERROR"""
+        host = host.lower().rstrip('.')
+        if not host:
+            return DNS_NXDOMAIN
+        return await self._cached(self._hosts, host, self._resolve_host)
+
+    def prefetch(self, host: str):
+        """后台开始解析主机名（不等待结果），供流水线提前预热缓存"""
+        host = host.lower().rstrip('.')
+        if host:
+            self._future(self._hosts, host, self._resolve_host)
+
+    async def accepts_mail(self, domain: str) -> bool:
+        """邮箱域名能否收信：有MX记录，或没有MX但有A记录（隐式MX）"""
+        return await self.mail_domain_status(domain) != DNS_NXDOMAIN
+
+    async def mail_domain_status(self, domain: str) -> str:
+        """
+        邮箱域名状态：DNS_OK（有MX或A记录）、DNS_NXDOMAIN（确定无法收信）
+        或 DNS_ERROR（超时、无可用DNS服务器等，无法确定）
+        """
+        domain = domain.lower().rstrip('.')
+        if not domain:
+            return DNS_NXDOMAIN
+        return await self._cached(self._mail_domains, domain, self._check_mail_domain)
+
+    async def resolve_hosts(self, hosts: Iterable[str]) -> Dict[str, str]:
+        """批量解析主机名"""
+        hosts = list(dict.fromkeys(host.lower() for host in hosts if host))
+        statuses = await asyncio.gather(*(self.resolve_host(host) for host in hosts))
+        return dict(zip(hosts, statuses))
+
+    async def check_mail_domains(self, domains: Iterable[str]) -> Dict[str, bool]:
+        """批量检查邮箱域名"""
+        domains = list(dict.fromkeys(domain.lower() for domain in domains if domain))
+        results = await asyncio.gather(*(self.accepts_mail(domain) for domain in domains))
+        return dict(zip(domains, results))
+
+    async def mail_domain_statuses(self, domains: Iterable[str]) -> Dict[str, str]:
+        """批量查询邮箱域名状态（区分确定结论与临时错误）"""
+        domains = list(dict.fromkeys(domain.lower() for domain in domains if domain))
+        statuses = await asyncio.gather(*(self.mail_domain_status(domain) for domain in domains))
+        return dict(zip(domains, statuses))
+
+    async def _cached(self, cache: Dict, key: str, resolve):
+        """同一个键只解析一次，并发请求共享同一个结果"""
+        return await self._future(cache, key, resolve)
+
+    def _future(self, cache: Dict, key: str, resolve) -> asyncio.Future:
+        future = cache.get(key)
+        if future is None:
+            future = cache[key] = asyncio.ensure_future(self._bounded(resolve, key))
+        return future
+
+    async def _bounded(self, resolve, key: str):
+        async with self._semaphore:
+            return await resolve(key)
+
+    async def _resolve_host(self, host: str) -> str:
+        if _is_ip_address(host):
+            return DNS_OK
+        if self._dns_resolver is not None:
+            return await self._resolve_host_dns(host)
+        # 专用线程池的线程数等于并发上限，持有并发名额的查询无需排队，超时只计算解析本身
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='dns')
+        loop = asyncio.get_running_loop()
+        try:
+            lookup = loop.run_in_executor(self._executor, socket.getaddrinfo, host, None, 0, socket.SOCK_STREAM)
+            await asyncio.wait_for(lookup, self.timeout)
+            return DNS_OK
+        except socket.gaierror as e:
+            if e.errno in _NXDOMAIN_ERRNOS:
+                logger.debug(f"域名不存在: {host}")
+                return DNS_NXDOMAIN
+            return DNS_ERROR
+        except (asyncio.TimeoutError, OSError, UnicodeError):
+            return DNS_ERROR
+
+    async def _resolve_host_dns(self, host: str) -> str:
+        """依次查询A、AAAA记录；都没有地址时与getaddrinfo的EAI_NODATA一样视为不存在"""
+        for record_type in ('A', 'AAAA'):
+            try:
+                await self._dns_resolver.resolve(host, record_type)
+                return DNS_OK
+            except dns.resolver.NXDOMAIN:
+                logger.debug(f"域名不存在: {host}")
+                return DNS_NXDOMAIN
+            except dns.resolver.NoAnswer:
+                continue
+            except (dns.exception.DNSException, OSError, UnicodeError):
+                return DNS_ERROR
+        return DNS_NXDOMAIN
+
+    async def _check_mail_domain(self, domain: str) -> str:
+        if self._dns_resolver is not None:
+            try:
+                answer = await self._dns_resolver.resolve(domain, 'MX')
+                return DNS_OK if len(answer) > 0 else DNS_NXDOMAIN
+            except dns.resolver.NXDOMAIN:
+                return DNS_NXDOMAIN
+            except (dns.resolver.NoAnswer, dns.resolver.NoNameservers, dns.exception.Timeout):
+                pass  # 没有MX记录或查询失败：按A记录判断，A记录也查不到时为DNS_ERROR
+            except dns.exception.DNSException:
+                return DNS_ERROR
+        # 已持有并发名额，直接解析
+        return await self._resolve_host(domain)
+
+    def summary(self) -> Dict[str, int]:
+        """已解析主机的状态统计"""
+        counts = {DNS_OK: 0, DNS_NXDOMAIN: 0, DNS_ERROR: 0}
+        for future in self._hosts.values():
+            if future.done() and not future.cancelled() and future.exception() is None:
+                counts[future.result()] += 1
+        return counts
+
+    def close(self):
+        """关闭getaddrinfo专用线程池（未安装dnspython时才会创建）"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+async def preflight_records(resolver: DNSResolver, records: Iterable[Dict], url_key: str = 'website',
+                            status_key: str = 'dns_status') -> Dict[str, int]:
+    """批量解析记录中网站的主机名，并把解析状态写回每条记录"""
+    records = [record for record in records if record.get(url_key)]
+    statuses = await resolver.resolve_hosts(url_host(record[url_key]) for record in records)
+    for record in records:
+        record[status_key] = statuses.get(url_host(record[url_key]), DNS_NXDOMAIN)
+    return resolver.summary()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+按域名后缀判断大学所在国家
+导入时把后缀表构建为按标签倒序的字典树（uk -> ac -> ...），
+查询时只解析主机名并沿树走一遍，取最长匹配的后缀，
+不会出现 ".edu" 误匹配 ".edu.au"、".co" 误匹配 ".com" 的情况
+"""
+
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import urlparse
+
+UNKNOWN_COUNTRY = 'Unknown'
+
+# 域名后缀 -> 国家（不含开头的点）
+COUNTRY_SUFFIXES = {
+    'edu': 'USA',
+    'uk': 'UK', 'ac.uk': 'UK',
+    'ca': 'Canada', 'au': 'Australia', 'de': 'Germany', 'fr': 'France', 'jp': 'Japan',
+    'cn': 'China', 'in': 'India', 'br': 'Brazil', 'mx': 'Mexico', 'es': 'Spain', 'cat': 'Spain',
+    'it': 'Italy', 'nl': 'Netherlands', 'se': 'Sweden', 'no': 'Norway', 'dk': 'Denmark',
+    'fi': 'Finland', 'ch': 'Switzerland', 'at': 'Austria', 'be': 'Belgium', 'lu': 'Luxembourg',
+    'ie': 'Ireland', 'nz': 'New Zealand', 'za': 'South Africa', 'kr': 'South Korea',
+    'sg': 'Singapore', 'my': 'Malaysia', 'th': 'Thailand', 'vn': 'Vietnam', 'id': 'Indonesia',
+    'ph': 'Philippines', 'pk': 'Pakistan', 'bd': 'Bangladesh', 'lk': 'Sri Lanka', 'np': 'Nepal',
+    'mm': 'Myanmar', 'kh': 'Cambodia', 'la': 'Laos', 'mn': 'Mongolia', 'kz': 'Kazakhstan',
+    'uz': 'Uzbekistan', 'kg': 'Kyrgyzstan', 'tj': 'Tajikistan', 'tm': 'Turkmenistan',
+    'af': 'Afghanistan', 'ir': 'Iran', 'iq': 'Iraq', 'sa': 'Saudi Arabia', 'ae': 'UAE',
+    'kw': 'Kuwait', 'qa': 'Qatar', 'bh': 'Bahrain', 'om': 'Oman', 'ye': 'Yemen', 'jo': 'Jordan',
+    'lb': 'Lebanon', 'sy': 'Syria', 'ps': 'Palestine', 'il': 'Israel', 'tr': 'Turkey',
+    'cy': 'Cyprus', 'gr': 'Greece', 'bg': 'Bulgaria', 'ro': 'Romania', 'hu': 'Hungary',
+    'cz': 'Czech Republic', 'sk': 'Slovakia', 'pl': 'Poland', 'lt': 'Lithuania', 'lv': 'Latvia',
+    'ee': 'Estonia', 'ru': 'Russia', 'ua': 'Ukraine', 'by': 'Belarus', 'md': 'Moldova',
+    'ge': 'Georgia', 'am': 'Armenia', 'az': 'Azerbaijan', 'rs': 'Serbia', 'hr': 'Croatia',
+    'si': 'Slovenia', 'ba': 'Bosnia and Herzegovina', 'me': 'Montenegro', 'mk': 'North Macedonia',
+    'al': 'Albania', 'xk': 'Kosovo', 'pt': 'Portugal', 'mt': 'Malta', 'is': 'Iceland',
+    'fo': 'Faroe Islands', 'gl': 'Greenland', 'cl': 'Chile', 'ar': 'Argentina', 'pe': 'Peru',
+    'co': 'Colombia', 've': 'Venezuela', 'ec': 'Ecuador', 'bo': 'Bolivia', 'py': 'Paraguay',
+    'uy': 'Uruguay', 'gy': 'Guyana', 'sr': 'Suriname', 'gf': 'French Guiana',
+    'fk': 'Falkland Islands', 'gs': 'South Georgia', 'gt': 'Guatemala', 'bz': 'Belize',
+    'sv': 'El Salvador', 'hn': 'Honduras', 'ni': 'Nicaragua', 'cr': 'Costa Rica', 'pa': 'Panama',
+    'cu': 'Cuba', 'jm': 'Jamaica', 'ht': 'Haiti', 'do': 'Dominican Republic', 'pr': 'Puerto Rico',
+    'tt': 'Trinidad and Tobago', 'bb': 'Barbados', 'gd': 'Grenada', 'lc': 'Saint Lucia',
+    'vc': 'Saint Vincent and the Grenadines', 'ag': 'Antigua and Barbuda',
+    'kn': 'Saint Kitts and Nevis', 'dm': 'Dominica', 'bs': 'Bahamas',
+    'tw': 'Taiwan', 'hk': 'Hong Kong', 'mo': 'Macau', 'eg': 'Egypt', 'ma': 'Morocco',
+    'dz': 'Algeria', 'tn': 'Tunisia', 'ng': 'Nigeria', 'gh': 'Ghana', 'ke': 'Kenya',
+    'et': 'Ethiopia', 'tz': 'Tanzania', 'ug': 'Uganda',
+}
+
+# 字典树中保存国家的键（域名标签不会是空字符串）
+_COUNTRY = ''
+
+
+def _build_trie(suffixes: Dict[str, str]) -> Dict:
+    root: Dict = {}
+    for suffix, country in suffixes.items():
+        node = root
+        for label in reversed(suffix.split('.')):
+            node = node.setdefault(label, {})
+        node[_COUNTRY] = country
+    return root
+
+
+_TRIE = _build_trie(COUNTRY_SUFFIXES)
+
+
+def url_hostname(url: str) -> str:
+    """提取主机名（可以没有协议头），小写且去掉端口与末尾的点"""
+    if not url:
+        return ''
+    host = urlparse(url if '//' in url else f'//{url}').hostname or ''
+    return host.rstrip('.')
+
+
+def country_from_host(host: str, default: str = UNKNOWN_COUNTRY) -> str:
+    """按最长后缀匹配主机名对应的国家"""
+    node = _TRIE
+    country = default
+    labels = host.lower().rstrip('.').split('.')
+    # 至少保留一个标签作为注册名，"edu" 本身不算美国的网站
+    for label in reversed(labels[1:]):
+        node = node.get(label)
+        if node is None:
+            break
+        country = node.get(_COUNTRY, country)
+    return country
+
+
+def country_from_url(url: str, default: str = UNKNOWN_COUNTRY) -> str:
+    """从URL推断国家"""
+    host = url_hostname(url)
+    return country_from_host(host, default) if host else default
+
+
+def classify_urls(urls: Iterable[str], default: str = UNKNOWN_COUNTRY) -> List[str]:
+    """批量推断国家，相同主机只查询一次"""
+    cache: Dict[str, str] = {}
+    countries = []
+    for url in urls:
+        host = url_hostname(url)
+        if host not in cache:
+            cache[host] = country_from_host(host, default) if host else default
+        countries.append(cache[host])
+    return countries
+
+
+def annotate_countries(records: List[Dict], url_key: str = 'website', country_key: str = 'country',
+                       overwrite: bool = False, default: Optional[str] = UNKNOWN_COUNTRY) -> int:
+    """为大学列表补全国家字段，返回写入的条数"""
+    targets = [record for record in records if overwrite or not record.get(country_key)]
+    countries = classify_urls((record.get(url_key) or '' for record in targets), default)
+    for record, country in zip(targets, countries):
+        record[country_key] = country
+    return len(targets)
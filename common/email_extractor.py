@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+共享邮箱提取器
+单次扫描即可识别普通、带空格、[at]/[dot]混淆以及mailto:链接中的邮箱地址
+"""
+
+import re
+from typing import Iterator, List
+
+# 邮箱本地部分允许的字符
+_LOCAL_CHARS = frozenset('ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789._%+-')
+
+# 本地部分不能以这些字符开头（与原正则中的 \b 行为一致）
+_LOCAL_LEADING_JUNK = '._%+-'
+
+# 本地部分最大回溯长度，避免在超长字符串上退化
+_MAX_LOCAL_LENGTH = 64
+
+# 分隔符扫描：@ 或 [at] / (at)，首字符集合很小，可由正则引擎快速跳过无关文本
+_SEPARATOR = re.compile(r'@|[\[\(]\s*at\s*[\]\)]', re.IGNORECASE)
+
+# 从分隔符之后匹配域名：标签之间可以是 "."、前后都带空格的 " . " 或 [dot]/(dot)
+_DOMAIN = re.compile(
+    r'\s*((?:[A-Za-z0-9-]+(?:\.|\s+\.\s+|\s*[\[\(]\s*dot\s*[\]\)]\s*))+[A-Za-z]{2,})\b',
+    re.IGNORECASE
+)
+
+# 混淆的点号，仅在域名中出现混淆时才使用
+_DOT_SEPARATOR = re.compile(r'\s*[\[\(]\s*dot\s*[\]\)]\s*|\s+\.\s+', re.IGNORECASE)
+
+# 预过滤：页面中是否可能包含邮箱
+_OBFUSCATED_AT = re.compile(r'[\[\(]\s*at\s*[\]\)]', re.IGNORECASE)
+
+# 形如 logo@2x.png 的静态资源文件名不是邮箱
+_ASSET_SUFFIXES = ('.png', '.jpg', '.jpeg', '.gif', '.svg', '.webp', '.css', '.js')
+
+
+def has_email_tokens(text: str) -> bool:
+    """快速预过滤：不含 @ 或 [at]/(at) 的页面直接跳过"""
+    if not text:
+        return False
+    return '@' in text or _OBFUSCATED_AT.search(text) is not None
+
+
+def iter_emails(text: str) -> Iterator[str]:
+    """逐个产出文本中的邮箱地址（小写，可能重复）"""
+    if not has_email_tokens(text):
+        return
+
+    domain_match = _DOMAIN.match
+    for separator in _SEPARATOR.finditer(text):
+        start, end = separator.span()
+
+        # 向左跳过空格（"name @ domain" 形式），再回溯本地部分
+        i = start
+        while i > 0 and start - i < 3 and text[i - 1] in ' \t':
+            i -= 1
+        j = i
+        limit = max(0, i - _MAX_LOCAL_LENGTH)
+        while j > limit and text[j - 1] in _LOCAL_CHARS:
+            j -= 1
+        local = text[j:i].lstrip(_LOCAL_LEADING_JUNK)
+        if not local:
+            continue
+
+        match = domain_match(text, end)
+        if not match:
+            continue
+        domain = match.group(1)
+        if '[' in domain or '(' in domain or ' ' in domain or '\t' in domain or '\n' in domain:
+            domain = _DOT_SEPARATOR.sub('.', domain)
+
+        email = f"{local}@{domain}".lower()
+        if email.endswith(_ASSET_SUFFIXES):
+            continue
+        yield email
+
+
+def extract_emails(text: str) -> List[str]:
+    """提取去重后的邮箱地址，保持首次出现的顺序"""
+    return list(dict.fromkeys(iter_emails(text)))
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+批量邮箱验证
+先做语法检查（email_validator，不查DNS），结果按规范化地址放入LRU缓存；
+能否收信按域名判断（DNSResolver的MX/A查询），同一域名的所有地址只查询一次，
+确定的域名结论（有MX/A记录或NXDOMAIN）写入SQLite磁盘缓存，后续运行在有效期内直接复用；
+超时等无法确定的结果按能收信处理，但只在本次运行中有效
+"""
+
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional
+
+from common.dns_preflight import DNS_ERROR, DNS_NXDOMAIN, DNSResolver
+
+try:
+    from email_validator import EmailNotValidError, validate_email
+except ImportError:  # 未安装email_validator时用正则做基本的语法检查
+    validate_email = None
+
+logger = logging.getLogger(__name__)
+
+# 各收集器共用的默认域名结论缓存文件
+DEFAULT_VALIDATION_CACHE = 'email_validation.db'
+
+_SIMPLE_EMAIL = re.compile(r'^[a-z0-9._%+-]+@(?:[a-z0-9-]+\.)+[a-z]{2,}$')
+# 批量读取磁盘缓存时每条SQL的参数个数
+_SQL_CHUNK = 500
+
+
+def normalize_email(email: str) -> str:
+    """缓存键：去掉首尾空白并转为小写"""
+    return email.strip().lower()
+
+
+class DomainVerdictCache:
+    """基于SQLite的邮箱域名结论缓存（域名 -> 能否收信）"""
+
+    def __init__(self, path: str = DEFAULT_VALIDATION_CACHE, ttl: float = 7 * 24 * 3600):
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS mail_domains (
+                domain TEXT PRIMARY KEY,
+                accepts INTEGER NOT NULL,
+                checked_at REAL NOT NULL
+            )
+        ''')
+
+    def get_many(self, domains: List[str]) -> Dict[str, bool]:
+        """读取有效期内的结论，没有记录的域名不出现在结果中"""
+        cutoff = time.time() - self.ttl
+        verdicts = {}
+        with self._lock:
+            for start in range(0, len(domains), _SQL_CHUNK):
+                chunk = domains[start:start + _SQL_CHUNK]
+                rows = self._conn.execute(
+                    f"SELECT domain, accepts FROM mail_domains WHERE checked_at >= ? "
+                    f"AND domain IN ({','.join('?' * len(chunk))})", [cutoff, *chunk])
+                verdicts.update((domain, bool(accepts)) for domain, accepts in rows)
+        return verdicts
+
+    def put_many(self, verdicts: Dict[str, bool]):
+        now = time.time()
+        with self._lock:
+            self._conn.execute('BEGIN')
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO mail_domains (domain, accepts, checked_at) VALUES (?, ?, ?)',
+                [(domain, int(accepts), now) for domain, accepts in verdicts.items()])
+            self._conn.execute('COMMIT')
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class EmailValidator:
+    """邮箱批量验证：语法结果LRU缓存，域名结论内存+磁盘缓存"""
+
+    def __init__(self, resolver: Optional[DNSResolver] = None, check_deliverability: bool = True,
+                 cache_path: Optional[str] = DEFAULT_VALIDATION_CACHE, domain_ttl: float = 7 * 24 * 3600,
+                 max_entries: int = 100_000):
+        self.check_deliverability = check_deliverability
+        self.max_entries = max_entries
+        self._resolver = resolver
+        # 规范化地址 -> 语法是否合法
+        self._syntax: 'OrderedDict[str, bool]' = OrderedDict()
+        self._domains: Dict[str, bool] = {}
+        self._disk = DomainVerdictCache(cache_path, domain_ttl) if cache_path and check_deliverability else None
+        self.stats = {'syntax_checks': 0, 'syntax_hits': 0, 'domain_lookups': 0, 'domain_disk_hits': 0,
+                      'domain_unknown': 0}
+
+    @classmethod
+    def from_settings(cls, settings, **overrides) -> 'EmailValidator':
+        """从 app.core.config.Settings 构建验证器；settings为None（独立运行的脚本）时使用默认值"""
+        values = {}
+        if settings is not None:
+            values = {
+                'check_deliverability': settings.domain_validation_enabled,
+                'cache_path': settings.email_validation_cache_path,
+                'domain_ttl': settings.email_validation_cache_ttl,
+            }
+        values.update(overrides)
+        return cls(**values)
+
+    def check_syntax(self, email: str) -> bool:
+        """语法检查（不查询DNS），结果按规范化地址缓存"""
+        key = normalize_email(email)
+        valid = self._syntax.get(key)
+        if valid is not None:
+            self._syntax.move_to_end(key)
+            self.stats['syntax_hits'] += 1
+            return valid
+        self.stats['syntax_checks'] += 1
+        valid = self._check_syntax(key)
+        self._syntax[key] = valid
+        if len(self._syntax) > self.max_entries:
+            self._syntax.popitem(last=False)
+        return valid
+
+    @staticmethod
+    def _check_syntax(email: str) -> bool:
+        if validate_email is None:
+            return bool(_SIMPLE_EMAIL.match(email))
+        try:
+            validate_email(email, check_deliverability=False)
+            return True
+        except EmailNotValidError:
+            return False
+
+    async def check_domains(self, domains: Iterable[str]) -> Dict[str, bool]:
+        """批量判断域名能否收信：先查内存与磁盘缓存，其余并发查询DNS"""
+        domains = list(dict.fromkeys(domains))
+        pending = [domain for domain in domains if domain not in self._domains]
+        if pending and self._disk is not None:
+            cached = self._disk.get_many(pending)
+            self.stats['domain_disk_hits'] += len(cached)
+            self._domains.update(cached)
+            pending = [domain for domain in pending if domain not in cached]
+        if pending:
+            if self._resolver is None:
+                self._resolver = DNSResolver()
+            self.stats['domain_lookups'] += len(pending)
+            statuses = await self._resolver.mail_domain_statuses(pending)
+            # 无法确定时不丢弃地址，但不写入磁盘，避免一次DNS故障影响整个有效期
+            self._domains.update((domain, status != DNS_NXDOMAIN) for domain, status in statuses.items())
+            definite = {domain: status != DNS_NXDOMAIN for domain, status in statuses.items() if status != DNS_ERROR}
+            self.stats['domain_unknown'] += len(statuses) - len(definite)
+            if self._disk is not None and definite:
+                self._disk.put_many(definite)
+        return {domain: self._domains[domain] for domain in domains}
+
+    async def validate_many(self, emails: Iterable[str]) -> Dict[str, bool]:
+        """批量验证，返回 原地址 -> 是否有效"""
+        results = {email: self.check_syntax(email) for email in emails}
+        if self.check_deliverability:
+            domains = {normalize_email(email).rsplit('@', 1)[1] for email, valid in results.items() if valid}
+            verdicts = await self.check_domains(domains)
+            for email, valid in results.items():
+                if valid:
+                    results[email] = verdicts[normalize_email(email).rsplit('@', 1)[1]]
+        return results
+
+    async def filter_valid(self, emails: Iterable[str]) -> List[str]:
+        """保留有效地址，顺序不变"""
+        emails = list(emails)
+        results = await self.validate_many(emails)
+        return [email for email in emails if results[email]]
+
+    def close(self):
+        if self._disk is not None:
+            self._disk.close()
+            self._disk = None
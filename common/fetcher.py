@@ -0,0 +1,471 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+共享抓取引擎
+为所有收集器提供统一的HTTP抓取：全局连接预算、按主机令牌桶限速、
+指数退避重试、可选的持久化响应缓存以及逐请求计时统计
+"""
+
+import asyncio
+import logging
+import random
+import socket
+import threading
+import time
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+from common.http_cache import CacheEntry, ResponseCache
+
+try:
+    import aiohttp
+except ImportError:  # 仅使用同步抓取时无需aiohttp
+    aiohttp = None
+
+try:
+    import requests
+    from requests.adapters import HTTPAdapter
+except ImportError:  # 仅使用异步抓取时无需requests
+    requests = None
+    HTTPAdapter = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+
+# 需要重试的HTTP状态码
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+@dataclass
+class FetchConfig:
+    """抓取引擎配置"""
+    max_connections: int = 100  # 全局连接预算
+    per_host_connections: int = 10  # 单主机最大并发连接
+    rate_per_host: float = 2.0  # 单主机每秒请求数（令牌补充速率）
+    burst_per_host: int = 4  # 单主机令牌桶容量
+    host_rates: Dict[str, float] = field(default_factory=dict)  # 特定主机的限速覆盖
+    max_retries: int = 3
+    timeout: float = 30
+    connect_timeout: float = 10
+    dns_cache_ttl: int = 600  # 连接器DNS缓存时间（秒）
+    backoff_base: float = 0.5  # 退避基数（秒）
+    backoff_max: float = 30.0  # 单次退避上限（秒）
+    user_agent: str = DEFAULT_USER_AGENT
+    headers: Dict[str, str] = field(default_factory=dict)
+    cache_path: Optional[str] = None  # 响应缓存文件，None表示不缓存
+    cache_ttl: float = 24 * 3600  # 缓存有效期（秒），过期后条件请求重新验证
+    cache_max_mb: float = 512  # 缓存总大小上限（MB）
+
+    @classmethod
+    def from_settings(cls, settings, **overrides) -> 'FetchConfig':
+        """从 app.core.config.Settings 构建配置"""
+        values = {
+            'max_retries': settings.max_retries,
+            'timeout': settings.timeout,
+            'user_agent': settings.user_agent,
+        }
+        if getattr(settings, 'request_delay', 0) > 0:
+            values['rate_per_host'] = 1.0 / settings.request_delay
+        if getattr(settings, 'http_cache_path', None):
+            values['cache_path'] = settings.http_cache_path
+            values['cache_ttl'] = settings.http_cache_ttl
+            values['cache_max_mb'] = settings.http_cache_max_mb
+        values.update(overrides)
+        return cls(**values)
+
+    def request_headers(self) -> Dict[str, str]:
+        """合并默认请求头"""
+        headers = {'User-Agent': self.user_agent}
+        headers.update(self.headers)
+        return headers
+
+
+@dataclass
+class FetchResult:
+    """单次抓取结果"""
+    url: str
+    status: int = 0
+    text: Optional[str] = None
+    final_url: str = ''
+    headers: Dict[str, str] = field(default_factory=dict)
+    elapsed: float = 0.0  # 含重试与限速等待的总耗时（秒）
+    attempts: int = 0
+    bytes: int = 0
+    error: str = ''
+    cache: str = ''  # 'hit'：缓存仍有效；'revalidated'：304重新验证；空：未使用缓存
+
+    @property
+    def ok(self) -> bool:
+        return self.status == 200 and self.text is not None
+
+    @property
+    def host(self) -> str:
+        return urlparse(self.url).hostname or ''
+
+
+class HostRateLimiter:
+    """按主机的令牌桶限速器（预约式，同时支持协程与线程）"""
+
+    def __init__(self, rate: float, burst: int, host_rates: Optional[Dict[str, float]] = None):
+        self.rate = rate
+        self.burst = burst
+        self.host_rates = host_rates or {}
+        self._buckets: Dict[str, list] = {}  # host -> [tokens, last_refill]
+        self._lock = threading.Lock()
+
+    def _reserve(self, host: str) -> float:
+        """预约一个令牌，返回需要等待的秒数"""
+        rate = self.host_rates.get(host, self.rate)
+        if rate <= 0:
+            return 0.0
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = self._buckets[host] = [float(self.burst), now]
+            tokens = min(float(self.burst), bucket[0] + (now - bucket[1]) * rate)
+            tokens -= 1
+            bucket[0], bucket[1] = tokens, now
+        return -tokens / rate if tokens < 0 else 0.0
+
+    async def acquire(self, host: str):
+        """异步获取令牌"""
+        wait = self._reserve(host)
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def acquire_blocking(self, host: str):
+        """同步获取令牌"""
+        wait = self._reserve(host)
+        if wait > 0:
+            time.sleep(wait)
+
+
+class FetchStats:
+    """逐请求计时统计"""
+
+    def __init__(self, max_samples: int = 10000):
+        self._lock = threading.Lock()
+        self.started_at = time.monotonic()
+        self.requests = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.retries = 0
+        self.bytes_downloaded = 0
+        self.status_counts: Counter = Counter()
+        self.host_counts: Counter = Counter()
+        self.cache_counts: Counter = Counter()
+        self.in_flight: Counter = Counter()
+        self.latencies = deque(maxlen=max_samples)
+
+    def begin(self, host: str):
+        """记录一个发往主机的网络请求开始（含重试，end时结束）"""
+        with self._lock:
+            self.in_flight[host] += 1
+
+    def end(self, host: str):
+        """网络请求结束（无论成功、失败、异常还是被取消）"""
+        with self._lock:
+            if self.in_flight[host] > 1:
+                self.in_flight[host] -= 1
+            else:
+                del self.in_flight[host]
+
+    def in_flight_hosts(self) -> Dict[str, int]:
+        """各主机正在进行的请求数"""
+        with self._lock:
+            return {host: count for host, count in self.in_flight.items() if count > 0}
+
+    def record(self, result: FetchResult):
+        """记录一次抓取结果"""
+        with self._lock:
+            self.requests += 1
+            self.retries += max(result.attempts - 1, 0)
+            self.bytes_downloaded += result.bytes
+            self.status_counts[result.status] += 1
+            self.host_counts[result.host] += 1
+            if result.cache:
+                self.cache_counts[result.cache] += 1
+            # 直接命中缓存的请求没有网络耗时，不计入延迟分布
+            if result.attempts:
+                self.latencies.append(result.elapsed)
+            if result.ok:
+                self.succeeded += 1
+            else:
+                self.failed += 1
+
+    def percentile(self, p: float) -> float:
+        """延迟分位数（秒）"""
+        with self._lock:
+            samples = sorted(self.latencies)
+        if not samples:
+            return 0.0
+        index = min(len(samples) - 1, int(round(p / 100 * (len(samples) - 1))))
+        return samples[index]
+
+    def summary(self) -> Dict:
+        """统计摘要"""
+        elapsed = time.monotonic() - self.started_at
+        return {
+            'requests': self.requests,
+            'succeeded': self.succeeded,
+            'failed': self.failed,
+            'retries': self.retries,
+            'bytes_downloaded': self.bytes_downloaded,
+            'pages_per_second': round(self.requests / elapsed, 2) if elapsed > 0 else 0.0,
+            'latency_p50': round(self.percentile(50), 3),
+            'latency_p95': round(self.percentile(95), 3),
+            'status_counts': dict(self.status_counts),
+            'cache_hits': self.cache_counts['hit'],
+            'cache_revalidated': self.cache_counts['revalidated'],
+        }
+
+    def log_summary(self):
+        """输出统计摘要到日志"""
+        s = self.summary()
+        logger.info(
+            f"抓取统计: 请求 {s['requests']} 次, 成功 {s['succeeded']}, 失败 {s['failed']}, "
+            f"重试 {s['retries']}, 下载 {s['bytes_downloaded'] / 1024 / 1024:.1f} MB, "
+            f"{s['pages_per_second']} 页/秒, p50 {s['latency_p50']}s, p95 {s['latency_p95']}s, "
+            f"缓存命中 {s['cache_hits']}, 304重新验证 {s['cache_revalidated']}"
+        )
+
+
+def _backoff_delay(config: FetchConfig, attempt: int, retry_after: Optional[str] = None) -> float:
+    """计算第attempt次重试前的等待时间"""
+    if retry_after and retry_after.strip().isdigit():
+        return min(float(retry_after.strip()), config.backoff_max)
+    delay = min(config.backoff_max, config.backoff_base * (2 ** attempt))
+    return delay * random.uniform(0.5, 1.0)
+
+
+def _log_failure(result: FetchResult):
+    """记录失败请求（404多为探测的猜测路径，只记调试日志）"""
+    if not result.ok:
+        level = logging.DEBUG if result.status == 404 else logging.WARNING
+        logger.log(level, f"抓取失败 {result.url}: {result.error or f'HTTP {result.status}'}")
+
+
+def _open_cache(config: FetchConfig, cache: Optional[ResponseCache]) -> Optional[ResponseCache]:
+    """使用传入的缓存，或按配置打开缓存文件"""
+    if cache is not None or not config.cache_path:
+        return cache
+    return ResponseCache(config.cache_path, ttl=config.cache_ttl, max_mb=config.cache_max_mb)
+
+
+def _cache_hit(url: str, entry: CacheEntry) -> FetchResult:
+    """由有效缓存构造抓取结果"""
+    return FetchResult(url=url, status=200, text=entry.text, final_url=entry.final_url, cache='hit')
+
+
+def _use_revalidated(cache: ResponseCache, result: FetchResult, entry: CacheEntry):
+    """304：沿用缓存正文并刷新缓存有效期"""
+    cache.revalidated(result.url, result.headers)
+    result.status = 200
+    result.text = entry.text
+    result.final_url = entry.final_url
+    result.error = ''
+    result.cache = 'revalidated'
+
+
+def _is_dns_failure(error: Exception) -> bool:
+    """DNS解析失败不值得重试"""
+    os_error = getattr(error, 'os_error', None)
+    return isinstance(os_error, socket.gaierror) or isinstance(error, socket.gaierror)
+
+
+class AsyncFetcher:
+    """基于aiohttp的异步抓取引擎"""
+
+    def __init__(self, config: Optional[FetchConfig] = None, stats: Optional[FetchStats] = None,
+                 cache: Optional[ResponseCache] = None):
+        self.config = config or FetchConfig()
+        self.stats = stats or FetchStats()
+        self.limiter = HostRateLimiter(self.config.rate_per_host, self.config.burst_per_host,
+                                       self.config.host_rates)
+        self.cache = _open_cache(self.config, cache)
+        self.session = None
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def start(self):
+        """创建共享会话"""
+        if aiohttp is None:
+            raise RuntimeError("AsyncFetcher 需要安装 aiohttp")
+        if self.session is None:
+            timeout = aiohttp.ClientTimeout(total=self.config.timeout, connect=self.config.connect_timeout)
+            connector = aiohttp.TCPConnector(limit=self.config.max_connections,
+                                             limit_per_host=self.config.per_host_connections,
+                                             ttl_dns_cache=self.config.dns_cache_ttl)
+            self.session = aiohttp.ClientSession(timeout=timeout, connector=connector,
+                                                 headers=self.config.request_headers())
+
+    async def close(self):
+        """关闭会话"""
+        if self.session:
+            await self.session.close()
+            self.session = None
+
+    async def fetch(self, url: str, timeout: Optional[float] = None,
+                    headers: Optional[Dict[str, str]] = None) -> FetchResult:
+        """抓取URL，对瞬时错误做指数退避重试；启用缓存时优先使用缓存或条件请求"""
+        entry = self.cache.get(url) if self.cache else None
+        if entry and entry.is_fresh(self.cache.ttl):
+            result = _cache_hit(url, entry)
+            self.stats.record(result)
+            return result
+        if entry:
+            headers = {**entry.validators(), **(headers or {})}
+
+        result = FetchResult(url=url)
+        host = urlparse(url).hostname or ''
+        request_timeout = aiohttp.ClientTimeout(total=timeout, connect=self.config.connect_timeout) if timeout else None
+        started = time.monotonic()
+        self.stats.begin(host)
+        try:
+            for attempt in range(self.config.max_retries + 1):
+                result.attempts = attempt + 1
+                await self.limiter.acquire(host)
+                retry_after = None
+                try:
+                    async with self.session.get(url, headers=headers, allow_redirects=True,
+                                                timeout=request_timeout or self.session.timeout) as response:
+                        result.status = response.status
+                        result.final_url = str(response.url)
+                        result.headers = dict(response.headers)
+                        if response.status == 304 and entry:
+                            _use_revalidated(self.cache, result, entry)
+                            break
+                        if response.status in RETRY_STATUSES and attempt < self.config.max_retries:
+                            retry_after = response.headers.get('Retry-After')
+                        elif response.status == 200:
+                            body = await response.read()
+                            result.bytes = len(body)
+                            result.text = self._decode(response, body)
+                            result.error = ''
+                            if self.cache:
+                                self.cache.put(url, result.text, result.headers, result.final_url)
+                            break
+                        else:
+                            result.error = f"HTTP {response.status}"
+                            break
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    result.error = str(e) or e.__class__.__name__
+                    if _is_dns_failure(e) or attempt >= self.config.max_retries:
+                        break
+                await asyncio.sleep(_backoff_delay(self.config, attempt, retry_after))
+
+            result.elapsed = time.monotonic() - started
+            self.stats.record(result)
+        finally:
+            # 被取消（如找到邮箱后取消其余候选页）或抛出异常时也要结束计数
+            self.stats.end(host)
+        _log_failure(result)
+        return result
+
+    async def fetch_text(self, url: str, timeout: Optional[float] = None) -> Optional[str]:
+        """抓取URL并返回文本，失败返回None"""
+        result = await self.fetch(url, timeout=timeout)
+        return result.text if result.ok else None
+
+    @staticmethod
+    def _decode(response, body: bytes) -> str:
+        try:
+            encoding = response.get_encoding()
+            return body.decode(encoding, errors='replace')
+        except (LookupError, RuntimeError):
+            return body.decode('utf-8', errors='replace')
+
+
+class SyncFetcher:
+    """基于requests的同步抓取引擎，与AsyncFetcher共享限速、重试与统计策略"""
+
+    def __init__(self, config: Optional[FetchConfig] = None, stats: Optional[FetchStats] = None,
+                 cache: Optional[ResponseCache] = None):
+        if requests is None:
+            raise RuntimeError("SyncFetcher 需要安装 requests")
+        self.config = config or FetchConfig()
+        self.stats = stats or FetchStats()
+        self.limiter = HostRateLimiter(self.config.rate_per_host, self.config.burst_per_host,
+                                       self.config.host_rates)
+        self.cache = _open_cache(self.config, cache)
+        self.session = requests.Session()
+        self.session.headers.update(self.config.request_headers())
+        # pool_block：单主机连接用满时等待，多线程共享时即为单主机并发上限
+        adapter = HTTPAdapter(pool_connections=self.config.max_connections,
+                              pool_maxsize=self.config.per_host_connections, pool_block=True)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def close(self):
+        """关闭会话"""
+        self.session.close()
+
+    def fetch(self, url: str, timeout: Optional[float] = None,
+              headers: Optional[Dict[str, str]] = None) -> FetchResult:
+        """抓取URL，对瞬时错误做指数退避重试；启用缓存时优先使用缓存或条件请求"""
+        entry = self.cache.get(url) if self.cache else None
+        if entry and entry.is_fresh(self.cache.ttl):
+            result = _cache_hit(url, entry)
+            self.stats.record(result)
+            return result
+        if entry:
+            headers = {**entry.validators(), **(headers or {})}
+
+        result = FetchResult(url=url)
+        host = urlparse(url).hostname or ''
+        timeout = timeout or self.config.timeout
+        started = time.monotonic()
+        self.stats.begin(host)
+        try:
+            for attempt in range(self.config.max_retries + 1):
+                result.attempts = attempt + 1
+                self.limiter.acquire_blocking(host)
+                retry_after = None
+                try:
+                    response = self.session.get(url, timeout=(self.config.connect_timeout, timeout),
+                                                headers=headers)
+                    result.status = response.status_code
+                    result.final_url = response.url
+                    result.headers = dict(response.headers)
+                    if response.status_code == 304 and entry:
+                        _use_revalidated(self.cache, result, entry)
+                        break
+                    if response.status_code in RETRY_STATUSES and attempt < self.config.max_retries:
+                        retry_after = response.headers.get('Retry-After')
+                    elif response.status_code == 200:
+                        result.bytes = len(response.content)
+                        result.text = response.text
+                        result.error = ''
+                        if self.cache:
+                            self.cache.put(url, result.text, result.headers, result.final_url)
+                        break
+                    else:
+                        result.error = f"HTTP {response.status_code}"
+                        break
+                except requests.RequestException as e:
+                    result.error = str(e) or e.__class__.__name__
+                    if isinstance(e, requests.exceptions.InvalidURL) or attempt >= self.config.max_retries:
+                        break
+                time.sleep(_backoff_delay(self.config, attempt, retry_after))
+
+            result.elapsed = time.monotonic() - started
+            self.stats.record(result)
+        finally:
+            # 被取消（如找到邮箱后取消其余候选页）或抛出异常时也要结束计数
+            self.stats.end(host)
+        _log_failure(result)
+        return result
+
+    def fetch_text(self, url: str, timeout: Optional[float] = None) -> Optional[str]:
+        """抓取URL并返回文本，失败返回None"""
+        result = self.fetch(url, timeout=timeout)
+        return result.text if result.ok else None
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+轻量级链接扫描器
+基于标准库的流式HTML分词器，只提取<a>链接与mailto目标，不构建DOM树；
+每个页面只扫描一次，结果在邮箱提取与联系页面发现之间共享
+"""
+
+from dataclasses import dataclass, field
+from html.parser import HTMLParser
+from typing import List, Optional
+from urllib.parse import unquote, urljoin
+
+from common.email_extractor import extract_emails
+
+# 单个链接最多保留的文本片段数，避免超长锚文本占用内存
+_MAX_TEXT_PARTS = 20
+
+
+@dataclass
+class Link:
+    """页面中的一个链接"""
+    href: str
+    text: str = ''
+
+    def absolute(self, base_url: str) -> str:
+        """转换为绝对URL"""
+        return urljoin(base_url, self.href)
+
+
+@dataclass
+class ScannedPage:
+    """扫描后的页面：原文、链接与mailto邮箱"""
+    url: str
+    html: str
+    links: List[Link] = field(default_factory=list)
+    mailtos: List[str] = field(default_factory=list)
+
+    def emails(self) -> List[str]:
+        """页面正文与mailto链接中的全部邮箱（去重）"""
+        return list(dict.fromkeys(extract_emails(self.html) + self.mailtos))
+
+
+class _LinkParser(HTMLParser):
+    """只关心<a>标签的流式解析器"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.links: List[Link] = []
+        self._href: Optional[str] = None
+        self._text: List[str] = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag != 'a':
+            return
+        self._close_link()
+        for name, value in attrs:
+            if name == 'href' and value is not None:
+                self._href = value.strip()
+                self._text = []
+                break
+
+    def handle_endtag(self, tag):
+        if tag == 'a':
+            self._close_link()
+
+    def handle_data(self, data):
+        if self._href is not None and len(self._text) < _MAX_TEXT_PARTS:
+            self._text.append(data)
+
+    def close(self):
+        super().close()
+        self._close_link()
+
+    def _close_link(self):
+        if self._href is not None:
+            text = ' '.join(''.join(self._text).split())
+            self.links.append(Link(self._href, text))
+            self._href = None
+            self._text = []
+
+
+def parse_mailto(href: str) -> List[str]:
+    """解析mailto链接中的邮箱（支持多个收件人与URL编码）"""
+    if not href.lower().startswith('mailto:'):
+        return []
+    target = unquote(href[7:].split('?', 1)[0])
+    return extract_emails(target.replace(',', ' ').replace(';', ' '))
+
+
+def scan_links(html: str) -> List[Link]:
+    """扫描HTML中的全部<a href>链接"""
+    parser = _LinkParser()
+    try:
+        parser.feed(html)
+        parser.close()
+    except Exception:
+        # 严重畸形的HTML：保留已经解析出的链接
+        pass
+    return parser.links
+
+
+def scan_page(url: str, html: str) -> ScannedPage:
+    """扫描页面一次，拆分出普通链接与mailto邮箱"""
+    page = ScannedPage(url=url, html=html)
+    for link in scan_links(html):
+        if link.href.lower().startswith('mailto:'):
+            page.mailtos.extend(parse_mailto(link.href))
+        else:
+            page.links.append(link)
+    return page
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+持久化HTTP响应缓存
+按URL缓存压缩后的页面正文及ETag/Last-Modified，过期后用条件请求重新验证，
+总大小超出上限时按最近访问时间(LRU)淘汰
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# 各收集器共用的默认缓存文件
+DEFAULT_CACHE_PATH = 'http_cache.db'
+
+
+@dataclass
+class CacheEntry:
+    """一条缓存的响应"""
+    url: str
+    text: str
+    final_url: str
+    etag: str
+    last_modified: str
+    stored_at: float
+
+    def is_fresh(self, ttl: float) -> bool:
+        """是否仍在有效期内（无需重新验证）"""
+        return time.time() - self.stored_at < ttl
+
+    def validators(self) -> Dict[str, str]:
+        """条件请求头"""
+        headers = {}
+        if self.etag:
+            headers['If-None-Match'] = self.etag
+        if self.last_modified:
+            headers['If-Modified-Since'] = self.last_modified
+        return headers
+
+
+class ResponseCache:
+    """基于SQLite的响应缓存，可在线程与进程间共享"""
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, ttl: float = 24 * 3600, max_mb: float = 512):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY,
+                final_url TEXT,
+                etag TEXT,
+                last_modified TEXT,
+                body BLOB NOT NULL,
+                size INTEGER NOT NULL,
+                stored_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        ''')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses (accessed_at)')
+        self._total_bytes = self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+
+    def get(self, url: str) -> Optional[CacheEntry]:
+        """读取缓存并刷新访问时间"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT final_url, etag, last_modified, body, stored_at FROM responses WHERE url = ?', (url,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute('UPDATE responses SET accessed_at = ? WHERE url = ?', (time.time(), url))
+        final_url, etag, last_modified, body, stored_at = row
+        try:
+            text = zlib.decompress(body).decode('utf-8')
+        except (zlib.error, UnicodeDecodeError):
+            logger.debug(f"缓存条目损坏，已忽略: {url}")
+            return None
+        return CacheEntry(url, text, final_url or url, etag or '', last_modified or '', stored_at)
+
+    def put(self, url: str, text: str, headers: Dict[str, str], final_url: str = ''):
+        """写入或覆盖缓存，必要时按LRU淘汰"""
+        if not self._cacheable(headers):
+            return
+        body = zlib.compress(text.encode('utf-8'), 6)
+        now = time.time()
+        etag, last_modified = self._header(headers, 'ETag'), self._header(headers, 'Last-Modified')
+        with self._lock:
+            old = self._conn.execute('SELECT size FROM responses WHERE url = ?', (url,)).fetchone()
+            self._conn.execute(
+                'INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (url, final_url, etag, last_modified, body, len(body), now, now)
+            )
+            self._total_bytes += len(body) - (old[0] if old else 0)
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def revalidated(self, url: str, headers: Dict[str, str]):
+        """304之后刷新有效期（服务器可能返回新的校验值）"""
+        now = time.time()
+        etag, last_modified = self._header(headers, 'ETag'), self._header(headers, 'Last-Modified')
+        with self._lock:
+            self._conn.execute(
+                '''UPDATE responses SET stored_at = ?, accessed_at = ?,
+                       etag = COALESCE(NULLIF(?, ''), etag),
+                       last_modified = COALESCE(NULLIF(?, ''), last_modified)
+                   WHERE url = ?''',
+                (now, now, etag, last_modified, url)
+            )
+
+    def close(self):
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()
+
+    def _evict(self):
+        """淘汰最久未访问的条目，直到总大小降到上限的90%"""
+        target = int(self.max_bytes * 0.9)
+        rows = self._conn.execute('SELECT url, size FROM responses ORDER BY accessed_at').fetchall()
+        evicted = []
+        for url, size in rows:
+            if self._total_bytes <= target:
+                break
+            evicted.append((url,))
+            self._total_bytes -= size
+        self._conn.executemany('DELETE FROM responses WHERE url = ?', evicted)
+        logger.debug(f"HTTP缓存淘汰 {len(evicted)} 条")
+
+    @classmethod
+    def _cacheable(cls, headers: Dict[str, str]) -> bool:
+        return 'no-store' not in cls._header(headers, 'Cache-Control').lower()
+
+    @staticmethod
+    def _header(headers: Dict[str, str], name: str) -> str:
+        """大小写不敏感地读取响应头"""
+        for key, value in headers.items():
+            if key.lower() == name.lower():
+                return value
+        return ''
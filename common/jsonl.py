@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+流式JSON读写
+JSON Lines（每行一条记录）与JSON数组文件都按条读取，写入时逐条输出，
+内存占用与文件大小无关；附带JSON数组与JSON Lines的互相转换工具
+用法: python -m common.jsonl universities_501_1000.json [universities_501_1000.jsonl]
+"""
+
+import argparse
+import json
+import os
+from typing import Any, Dict, Iterable, Iterator, Optional, TextIO
+
+# 流式解析JSON数组时每次读取的字符数
+_CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = ' \t\r\n'
+
+# 数字可能在块边界被截断（如 "100" | ".0"）
+_NUMBER_CHARS = '0123456789.eE+-'
+
+
+def is_jsonl(path: str) -> bool:
+    """按扩展名判断是否为JSON Lines文件"""
+    return path.lower().endswith(('.jsonl', '.ndjson'))
+
+
+def prefer_jsonl(path: str) -> str:
+    """x.json 旁边存在更新的 x.jsonl 时使用后者；旧的 .jsonl 不会遮住更新过（或手工修改过）的 .json"""
+    if not is_jsonl(path):
+        candidate = os.path.splitext(path)[0] + '.jsonl'
+        if os.path.exists(candidate) and (not os.path.exists(path)
+                                          or os.path.getmtime(candidate) > os.path.getmtime(path)):
+            return candidate
+    return path
+
+
+def iter_records(path: str) -> Iterator[Any]:
+    """逐条读取JSON Lines或JSON数组文件"""
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        if is_jsonl(path):
+            yield from _iter_lines(f)
+        else:
+            yield from iter_json_array(f)
+
+
+def iter_json_array(f: TextIO) -> Iterator[Any]:
+    """增量解析顶层为数组的JSON文件，每次只在内存中保留一个元素"""
+    decoder = json.JSONDecoder()
+    buffer = ''
+    pos = 0
+    eof = False
+
+    def fill() -> bool:
+        """读入更多内容，返回是否读到了新数据"""
+        nonlocal buffer, pos, eof
+        chunk = f.read(_CHUNK_SIZE)
+        if not chunk:
+            eof = True
+            return False
+        buffer = buffer[pos:] + chunk
+        pos = 0
+        return True
+
+    def skip_whitespace():
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+                pos += 1
+            if pos < len(buffer) or not fill():
+                return
+
+    skip_whitespace()
+    if pos >= len(buffer):
+        return
+    if buffer[pos] != '[':
+        raise ValueError("不是JSON数组文件")
+    pos += 1
+
+    skip_whitespace()
+    if pos < len(buffer) and buffer[pos] == ']':
+        return
+    while True:
+        skip_whitespace()
+        while True:
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+                # 元素恰好结束在块边界时，读入更多内容后重新解析
+                if not eof and (end == len(buffer) or buffer[end] in _NUMBER_CHARS) and fill():
+                    continue
+                break
+            except json.JSONDecodeError:
+                if eof or not fill():
+                    raise
+        pos = end
+        yield item
+        skip_whitespace()
+        if pos >= len(buffer):
+            raise ValueError("JSON数组不完整")
+        if buffer[pos] == ']':
+            return
+        if buffer[pos] != ',':
+            raise ValueError(f"JSON数组格式错误: 意外的字符 {buffer[pos]!r}")
+        pos += 1
+
+
+def _iter_lines(f: TextIO) -> Iterator[Any]:
+    for line_number, line in enumerate(f, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"第 {line_number} 行不是有效的JSON: {e}") from e
+
+
+def write_records(path: str, records: Iterable[Any]) -> int:
+    """
+    逐条写入记录：.jsonl 写为每行一条，其他扩展名写为JSON数组（每行一个元素）。
+    先写临时文件再原子替换，返回写入的条数
+    """
+    count = 0
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        if is_jsonl(path):
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False))
+                f.write('\n')
+                count += 1
+        else:
+            f.write('[')
+            for record in records:
+                f.write(',\n' if count else '\n')
+                f.write(json.dumps(record, ensure_ascii=False))
+                count += 1
+            f.write('\n]\n' if count else ']\n')
+    os.replace(tmp_path, path)
+    return count
+
+
+def convert(src: str, dst: Optional[str] = None) -> Dict[str, Any]:
+    """JSON数组与JSON Lines互相转换（格式由扩展名决定），默认把 x.json 转为 x.jsonl"""
+    if dst is None:
+        dst = os.path.splitext(src)[0] + ('.json' if is_jsonl(src) else '.jsonl')
+    count = write_records(dst, iter_records(src))
+    return {'src': src, 'dst': dst, 'records': count}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='JSON数组与JSON Lines互相转换')
+    parser.add_argument('src', help='输入文件（.json 或 .jsonl）')
+    parser.add_argument('dst', nargs='?', help='输出文件（默认同名换扩展名）')
+    args = parser.parse_args()
+
+    result = convert(args.src, args.dst)
+    print(f"已转换 {result['records']} 条记录: {result['src']} -> {result['dst']}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+收集器运行指标
+把抓取统计（FetchStats）、结果统计（ResultAggregator）和队列长度整理为
+Prometheus文本格式：抓取速率、各主机进行中的请求、队列深度、成功率、
+p50/p95延迟、下载字节数与预计剩余时间。可定期写入文本文件
+（node_exporter textfile收集器），或在本地HTTP端口的 /metrics 提供
+"""
+
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple, Union
+
+from common.fetcher import FetchStats
+from common.result_stats import ResultAggregator
+
+logger = logging.getLogger(__name__)
+
+# 默认写入文本文件的间隔（秒）
+METRICS_INTERVAL = 5.0
+
+
+def _escape(value: str) -> str:
+    """转义标签值中的反斜杠、双引号和换行"""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else f"{value:.6g}"
+
+
+class CollectorMetrics:
+    """汇总一个收集器的运行指标"""
+
+    def __init__(self, fetch_stats: Optional[FetchStats] = None, results: Optional[ResultAggregator] = None,
+                 target: Union[int, Callable[[], int]] = 0, namespace: str = 'collector'):
+        self.fetch_stats = fetch_stats
+        self.results = results
+        # 目标大学数；可以是函数，发现阶段未结束时目标会变化
+        self.target = target
+        self.namespace = namespace
+        self.started_at = time.monotonic()
+        # 续抓时已有的结果不计入本次处理速率
+        self._results_at_start = results.total if results else 0
+        self._queues: Dict[str, Callable[[], int]] = {}
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def watch_queue(self, name: str, queue):
+        """登记需要报告长度的队列（任何带 qsize() 的对象）"""
+        self._queues[name] = queue.qsize
+
+    def unwatch_queue(self, name: str):
+        self._queues.pop(name, None)
+
+    def target_count(self) -> int:
+        return self.target() if callable(self.target) else self.target
+
+    def eta_seconds(self) -> Optional[float]:
+        """按本次运行的平均处理速率估算剩余时间，无法估算时返回None"""
+        if not self.results:
+            return None
+        done = self.results.total - self._results_at_start
+        remaining = self.target_count() - self.results.total
+        elapsed = time.monotonic() - self.started_at
+        if done <= 0 or remaining <= 0 or elapsed <= 0:
+            return None if remaining > 0 else 0.0
+        return remaining / (done / elapsed)
+
+    def snapshot(self) -> Dict:
+        """当前全部指标"""
+        elapsed = time.monotonic() - self.started_at
+        snapshot: Dict = {'uptime_seconds': round(elapsed, 1)}
+        if self.fetch_stats:
+            snapshot['fetch'] = self.fetch_stats.summary()
+            snapshot['in_flight'] = self.fetch_stats.in_flight_hosts()
+        snapshot['queues'] = {name: qsize() for name, qsize in list(self._queues.items())}
+        if self.results:
+            done = self.results.total - self._results_at_start
+            snapshot['results'] = {
+                'total': self.results.total,
+                'with_emails': self.results.with_emails,
+                'success_rate': round(self.results.success_rate, 1),
+                'per_second': round(done / elapsed, 3) if elapsed > 0 else 0.0,
+                'target': self.target_count(),
+                'eta_seconds': self.eta_seconds(),
+            }
+        return snapshot
+
+    def render(self) -> str:
+        """Prometheus文本格式"""
+        lines: List[str] = []
+
+        def metric(name: str, kind: str, help_text: str, samples: List[Tuple[Dict[str, str], float]]):
+            full = f"{self.namespace}_{name}"
+            lines.append(f"# HELP {full} {help_text}")
+            lines.append(f"# TYPE {full} {kind}")
+            for labels, value in samples:
+                label_text = ','.join(f'{key}="{_escape(val)}"' for key, val in labels.items())
+                lines.append(f"{full}{{{label_text}}} {_format_value(value)}" if label_text
+                             else f"{full} {_format_value(value)}")
+
+        snapshot = self.snapshot()
+        metric('uptime_seconds', 'gauge', '运行时间（秒）', [({}, snapshot['uptime_seconds'])])
+        fetch = snapshot.get('fetch')
+        if fetch:
+            metric('fetch_requests_total', 'counter', '抓取请求数（含缓存命中）', [({}, fetch['requests'])])
+            metric('fetch_failures_total', 'counter', '失败的抓取请求数', [({}, fetch['failed'])])
+            metric('fetch_retries_total', 'counter', '重试次数', [({}, fetch['retries'])])
+            metric('fetch_bytes_total', 'counter', '下载字节数', [({}, fetch['bytes_downloaded'])])
+            metric('fetch_pages_per_second', 'gauge', '平均抓取速率（页/秒）', [({}, fetch['pages_per_second'])])
+            metric('fetch_latency_seconds', 'summary', '抓取延迟分位数（含重试）',
+                   [({'quantile': '0.5'}, fetch['latency_p50']), ({'quantile': '0.95'}, fetch['latency_p95'])])
+            metric('fetch_cache_hits_total', 'counter', '响应缓存命中数', [({}, fetch['cache_hits'])])
+            metric('fetch_in_flight', 'gauge', '各主机正在进行的请求数',
+                   [({'host': host}, count) for host, count in sorted(snapshot['in_flight'].items())])
+        if snapshot['queues']:
+            metric('queue_depth', 'gauge', '队列中等待处理的条目数',
+                   [({'queue': name}, depth) for name, depth in snapshot['queues'].items()])
+        results = snapshot.get('results')
+        if results:
+            metric('results_total', 'counter', '已完成的大学数', [({}, results['total'])])
+            metric('results_with_email_total', 'counter', '成功获取邮箱的大学数', [({}, results['with_emails'])])
+            metric('success_ratio', 'gauge', '邮箱获取成功率', [({}, results['success_rate'] / 100)])
+            metric('results_per_second', 'gauge', '本次运行的平均处理速率（所/秒）', [({}, results['per_second'])])
+            metric('target', 'gauge', '目标大学数', [({}, results['target'])])
+            if results['eta_seconds'] is not None:
+                metric('eta_seconds', 'gauge', '预计剩余时间（秒）', [({}, results['eta_seconds'])])
+        return '\n'.join(lines) + '\n'
+
+    def write_textfile(self, path: str):
+        """原子地写入指标文件（先写临时文件再替换）"""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(self.render())
+        os.replace(tmp_path, path)
+
+    def start_textfile(self, path: str, interval: float = METRICS_INTERVAL) -> asyncio.Task:
+        """在当前事件循环中定期写入指标文件"""
+        async def loop():
+            while True:
+                try:
+                    self.write_textfile(path)
+                except OSError as e:
+                    logger.warning(f"写入指标文件失败: {e}")
+                await asyncio.sleep(interval)
+
+        self._task = asyncio.create_task(loop())
+        return self._task
+
+    def serve(self, port: int, host: str = '127.0.0.1') -> ThreadingHTTPServer:
+        """在后台线程中提供 /metrics（Prometheus格式）和 /metrics.json"""
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path == '/metrics':
+                    body = metrics.render().encode('utf-8')
+                    content_type = 'text/plain; version=0.0.4; charset=utf-8'
+                elif self.path == '/metrics.json':
+                    body = json.dumps(metrics.snapshot(), ensure_ascii=False).encode('utf-8')
+                    content_type = 'application/json; charset=utf-8'
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        logger.info(f"指标服务: http://{host}:{self._server.server_address[1]}/metrics")
+        return self._server
+
+    def stop(self, path: Optional[str] = None):
+        """停止定期写入与HTTP服务；给出path时最后写入一次"""
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        if path:
+            try:
+                self.write_textfile(path)
+            except OSError as e:
+                logger.warning(f"写入指标文件失败: {e}")
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
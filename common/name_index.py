@@ -0,0 +1,265 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+大学名称模糊索引
+名称经去重音、统一各语言的"大学"等通用词、去停用词后按词集合建键分块；
+词序相同才直接视为同一所，只有词序不同的名称（"University of Miami" 与 "Miami University"
+是两所大学）须官网域名一致才合并，如 "Universitat Pompeu Fabra" 与 "Pompeu Fabra University"。
+官网域名相同直接视为同一所大学，域名冲突时名称相同也不合并；其余情况用字符三元组分块
+生成候选再按相似度确认，每条记录只与共享三元组的少量候选比较，整体接近线性
+"""
+
+import re
+import unicodedata
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+from urllib.parse import urlparse
+
+# 各语言中"大学"的写法（去重音后）
+_UNIVERSITY_WORDS = {
+    'university', 'universidad', 'universitat', 'universita', 'universite', 'universiteit',
+    'universidade', 'uniwersytet', 'univerzita', 'universitet', 'universiti', 'universitas',
+    'universitaet', 'univ',
+}
+
+# 其他常见通用词的统一写法
+_TOKEN_ALIASES = {
+    'politecnica': 'polytechnic', 'politecnico': 'polytechnic', 'polytechnique': 'polytechnic',
+    'politechnika': 'polytechnic', 'polytechnical': 'polytechnic',
+    'technische': 'technical', 'tecnica': 'technical', 'tecnico': 'technical', 'technique': 'technical',
+    'instituto': 'institute', 'institut': 'institute', 'istituto': 'institute',
+    'colegio': 'college', 'escuela': 'school', 'ecole': 'school', 'scuola': 'school',
+    'nacional': 'national', 'nazionale': 'national', 'nationale': 'national',
+    'st': 'saint', 'san': 'saint', 'santo': 'saint', 'sankt': 'saint',
+}
+
+# 不参与建键的停用词（英语、西语、加泰罗尼亚语、法语、意大利语、德语、葡语）
+_STOPWORDS = {
+    'the', 'of', 'and', 'at', 'in', 'for', 'de', 'del', 'la', 'las', 'los', 'el', 'y', 'i', 'e',
+    'd', 'l', 'di', 'della', 'degli', 'dei', 'du', 'des', 'et', 'der', 'die', 'das', 'und',
+    'do', 'da', 'dos',
+}
+
+# 通用词：保留在键中，不参与三元组分块与相似度计算；模糊匹配要求两边的通用词相同、词数相同，
+# 避免 "Ohio State University" 与 "Ohio University" 被合并
+_GENERIC_TOKENS = {
+    'university', 'college', 'institute', 'school', 'technical', 'technology', 'polytechnic',
+    'national', 'state', 'higher', 'education', 'sciences', 'science', 'academy',
+}
+
+_NON_WORD = re.compile(r'[^0-9a-z]+')
+
+# 三元组相似度（Dice系数）阈值
+DEFAULT_THRESHOLD = 0.88
+
+# 出现在过多记录中的三元组区分度低，不用于生成候选
+DEFAULT_MAX_BLOCK = 500
+
+
+def fold_text(text: str) -> str:
+    """去重音、转小写，标点替换为空格"""
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return _NON_WORD.sub(' ', text.casefold().replace('&', ' and ')).strip()
+
+
+def name_tokens(name: str) -> List[str]:
+    """规范化后的词列表（统一通用词、去掉停用词）"""
+    tokens = []
+    for token in fold_text(name).split():
+        if token in _UNIVERSITY_WORDS:
+            token = 'university'
+        token = _TOKEN_ALIASES.get(token, token)
+        if token not in _STOPWORDS:
+            tokens.append(token)
+    return tokens
+
+
+def name_key(name: str) -> str:
+    """与词序无关的名称键（用于分块，键相同还须词序相同或官网一致）"""
+    return ' '.join(sorted(set(name_tokens(name))))
+
+
+def ordered_name_key(name: str) -> str:
+    """保留词序的名称键"""
+    return ' '.join(name_tokens(name))
+
+
+def website_domain(url: str) -> str:
+    """官网域名（去掉 www. 前缀），无法解析时返回空字符串"""
+    if not url:
+        return ''
+    host = urlparse(url if '//' in url else f'//{url}').hostname or ''
+    return host[4:] if host.startswith('www.') else host
+
+
+def _trigrams(tokens: Iterable[str]) -> Set[str]:
+    grams = set()
+    for token in tokens:
+        if token in _GENERIC_TOKENS:
+            continue
+        padded = f' {token} '
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def _generic_tokens(tokens: Iterable[str]) -> frozenset:
+    return frozenset(token for token in tokens if token in _GENERIC_TOKENS)
+
+
+def _shape(tokens: Sequence[str]) -> Tuple[str, ...]:
+    """通用词所在的位置："University of X" 为 ('university', '')，"X University" 为 ('', 'university')"""
+    return tuple(token if token in _GENERIC_TOKENS else '' for token in tokens)
+
+
+@dataclass
+class IndexEntry:
+    """索引中的一所大学"""
+    id: int
+    name: str
+    domain: str = ''
+    country: str = ''
+    keys: Set[str] = field(default_factory=set)
+    ordered_keys: Set[str] = field(default_factory=set)
+    data: Any = None
+
+
+class NameIndex:
+    """按名称键、官网域名和三元组分块查找同一所大学"""
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD, max_block: int = DEFAULT_MAX_BLOCK):
+        self.threshold = threshold
+        self.max_block = max_block
+        self.entries: List[IndexEntry] = []
+        self._by_key: Dict[str, List[int]] = {}
+        self._by_domain: Dict[str, int] = {}
+        self._grams: Dict[str, List[int]] = {}
+        # 按变体编号记录：所属条目、三元组数、通用词集合、通用词位置
+        self._variants: List[Tuple[int, int, frozenset, Tuple[str, ...]]] = []
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def find(self, name: str, website: str = '', country: str = '',
+             aliases: Sequence[str] = ()) -> Optional[IndexEntry]:
+        """查找同一所大学：域名相同，或任一名称变体的键相同/足够相似（国家与域名不冲突，
+        只有词序不同时还须官网一致）"""
+        domain = website_domain(website)
+        if domain and domain in self._by_domain:
+            return self.entries[self._by_domain[domain]]
+        names = [name, *aliases]
+        for variant in names:
+            tokens = name_tokens(variant)
+            ordered = ' '.join(tokens)
+            for entry_id in self._by_key.get(' '.join(sorted(set(tokens))), ()):
+                entry = self.entries[entry_id]
+                if not self._compatible(entry, country, domain):
+                    continue
+                if ordered in entry.ordered_keys or self._same_site(entry, domain):
+                    return entry
+        for variant in names:
+            entry = self._fuzzy_match(name_tokens(variant), country, domain)
+            if entry is not None:
+                return entry
+        return None
+
+    def add(self, name: str, website: str = '', country: str = '', aliases: Sequence[str] = (),
+            data: Any = None) -> IndexEntry:
+        """加入一所大学（不检查重复）"""
+        entry = IndexEntry(len(self.entries), name, website_domain(website), fold_text(country), data=data)
+        self.entries.append(entry)
+        self._register(entry, [name, *aliases], entry.domain)
+        return entry
+
+    def match_or_add(self, name: str, website: str = '', country: str = '', aliases: Sequence[str] = (),
+                     data: Any = None) -> Tuple[IndexEntry, bool]:
+        """返回 (条目, 是否新增)；已存在时把新的名称变体和域名并入原条目"""
+        entry = self.find(name, website, country, aliases)
+        if entry is None:
+            return self.add(name, website, country, aliases, data), True
+        domain = website_domain(website)
+        if domain and domain not in self._by_domain:
+            entry.domain = entry.domain or domain
+        self._register(entry, [name, *aliases], domain)
+        return entry, False
+
+    def _register(self, entry: IndexEntry, names: Sequence[str], domain: str):
+        if domain:
+            self._by_domain.setdefault(domain, entry.id)
+        for variant in names:
+            tokens = name_tokens(variant)
+            ordered = ' '.join(tokens)
+            if not ordered or ordered in entry.ordered_keys:
+                continue
+            entry.ordered_keys.add(ordered)
+            key = ' '.join(sorted(set(tokens)))
+            if key not in entry.keys:
+                entry.keys.add(key)
+                self._by_key.setdefault(key, []).append(entry.id)
+            grams = _trigrams(tokens)
+            if grams:
+                variant_id = len(self._variants)
+                self._variants.append((entry.id, len(grams), _generic_tokens(tokens), _shape(tokens)))
+                for gram in grams:
+                    self._grams.setdefault(gram, []).append(variant_id)
+
+    def _fuzzy_match(self, tokens: List[str], country: str, domain: str) -> Optional[IndexEntry]:
+        grams = _trigrams(tokens)
+        if not grams:
+            return None
+        shared: Counter = Counter()
+        for gram in grams:
+            postings = self._grams.get(gram)
+            if postings and len(postings) <= self.max_block:
+                shared.update(postings)
+        generic = _generic_tokens(tokens)
+        shape = _shape(tokens)
+        best, best_score = None, self.threshold
+        for variant_id, overlap in shared.items():
+            entry_id, gram_count, variant_generic, variant_shape = self._variants[variant_id]
+            score = 2 * overlap / (len(grams) + gram_count)
+            if score < best_score or variant_generic != generic or len(variant_shape) != len(shape):
+                continue
+            entry = self.entries[entry_id]
+            if not self._compatible(entry, country, domain):
+                continue
+            if variant_shape == shape or self._same_site(entry, domain):
+                best, best_score = entry, score
+        return best
+
+    @staticmethod
+    def _same_site(entry: IndexEntry, domain: str) -> bool:
+        """两边都有官网且是同一网站（_compatible 已排除无关域名）"""
+        return bool(entry.domain and domain)
+
+    @staticmethod
+    def _compatible(entry: IndexEntry, country: str, domain: str) -> bool:
+        """国家不冲突，且官网不是两个无关的域名（子域名视为同一网站）"""
+        country = fold_text(country)
+        if entry.country and country and entry.country != country:
+            return False
+        if entry.domain and domain:
+            return (entry.domain == domain or entry.domain.endswith('.' + domain)
+                    or domain.endswith('.' + entry.domain))
+        return True
+
+
+def merge_records(records: Iterable[Dict], name_field: str = 'name', website_field: str = 'website',
+                  country_field: str = 'country', alias_fields: Sequence[str] = (),
+                  index: Optional[NameIndex] = None) -> List[Dict]:
+    """合并重复的大学记录：保留第一次出现的记录，用后续重复记录补全其空字段"""
+    index = index if index is not None else NameIndex()
+    merged: List[Dict] = []
+    for record in records:
+        aliases = [record[alias] for alias in alias_fields if record.get(alias)]
+        entry, is_new = index.match_or_add(record.get(name_field) or '', record.get(website_field) or '',
+                                           record.get(country_field) or '', aliases)
+        if is_new:
+            entry.data = dict(record)
+            merged.append(entry.data)
+        else:
+            for key, value in record.items():
+                if value not in (None, '', [], {}) and entry.data.get(key) in (None, '', [], {}):
+                    entry.data[key] = value
+    return merged
@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+收集器分阶段性能剖析
+用 with profiler.stage('fetch', 大学名): ... 包住各阶段（抓取、解析、提取、排序、断点、导出），
+记录每所大学每个阶段的墙钟时间与CPU时间，导出为Chrome trace / Perfetto 可直接打开的JSON，
+或 flamegraph.pl / speedscope 使用的折叠栈文本。未启用时 stage() 返回共享的空上下文，几乎没有开销
+"""
+
+import asyncio
+import csv
+import json
+import logging
+import os
+import threading
+import time
+import weakref
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class _NullStage:
+    """未启用剖析时使用的空上下文"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Lane:
+    """一个协程（或线程）上的阶段栈，对应trace中的一条轨道"""
+    __slots__ = ('tid', 'stack')
+
+    def __init__(self, tid: int):
+        self.tid = tid
+        self.stack: List['_Stage'] = []
+
+
+class _Stage:
+    """一次阶段计时"""
+    __slots__ = ('profiler', 'name', 'item', 'cpu', 'lane', 'start', 'cpu_start', 'child')
+
+    def __init__(self, profiler: 'StageProfiler', name: str, item: str, cpu: bool):
+        self.profiler = profiler
+        self.name = name
+        self.item = item
+        self.cpu = cpu
+
+    def __enter__(self):
+        self.lane = self.profiler._lane()
+        # 未指明大学时归入外层阶段的大学
+        if not self.item and self.lane.stack:
+            self.item = self.lane.stack[-1].item
+        self.lane.stack.append(self)
+        self.child = 0.0
+        self.cpu_start = time.thread_time() if self.cpu else 0.0
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        end = time.perf_counter()
+        cpu = time.thread_time() - self.cpu_start if self.cpu else None
+        self.profiler._finish(self, end, cpu)
+        return False
+
+
+class StageProfiler:
+    """按阶段、按大学记录耗时"""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+        self._task_lanes: 'weakref.WeakKeyDictionary' = weakref.WeakKeyDictionary()
+        self._thread_lanes: Dict[int, _Lane] = {}
+        self._next_tid = 1
+        self.events: List[Dict] = []
+        # 折叠栈 -> 自身耗时（微秒）
+        self.collapsed: Dict[str, float] = defaultdict(float)
+        # 阶段 -> [次数, 墙钟秒, CPU秒]
+        self.totals: Dict[str, List[float]] = {}
+        # 大学 -> 阶段 -> [墙钟秒, CPU秒]
+        self.items: Dict[str, Dict[str, List[float]]] = defaultdict(dict)
+
+    def stage(self, name: str, item: str = '', cpu: bool = True):
+        """阶段计时上下文；item为空时沿用外层阶段的大学。
+        包含await的阶段应传 cpu=False（等待期间其他协程的CPU时间也会计入本线程）"""
+        if not self.enabled:
+            return _NULL_STAGE
+        return _Stage(self, name, item, cpu)
+
+    def _lane(self) -> _Lane:
+        try:
+            task = asyncio.current_task()
+        except RuntimeError:
+            task = None
+        with self._lock:
+            if task is not None:
+                lane = self._task_lanes.get(task)
+                if lane is None:
+                    lane = self._task_lanes[task] = self._new_lane()
+            else:
+                ident = threading.get_ident()
+                lane = self._thread_lanes.get(ident)
+                if lane is None:
+                    lane = self._thread_lanes[ident] = self._new_lane()
+            return lane
+
+    def _new_lane(self) -> _Lane:
+        lane = _Lane(self._next_tid)
+        self._next_tid += 1
+        return lane
+
+    def _finish(self, stage: _Stage, end: float, cpu: Optional[float]):
+        wall = end - stage.start
+        stack = stage.lane.stack
+        with self._lock:
+            path = ';'.join(frame.name for frame in stack)
+            if stack and stack[-1] is stage:
+                stack.pop()
+            elif stage in stack:
+                stack.remove(stage)
+            if stack:
+                stack[-1].child += wall
+            self.collapsed[path] += max(wall - stage.child, 0.0) * 1e6
+            total = self.totals.setdefault(stage.name, [0, 0.0, 0.0])
+            total[0] += 1
+            total[1] += wall
+            total[2] += cpu or 0.0
+            if stage.item:
+                item = self.items[stage.item].setdefault(stage.name, [0.0, 0.0])
+                item[0] += wall
+                item[1] += cpu or 0.0
+            args = {'item': stage.item} if stage.item else {}
+            if cpu is not None:
+                args['cpu_ms'] = round(cpu * 1000, 3)
+            self.events.append({
+                'name': stage.name, 'cat': 'collector', 'ph': 'X',
+                'ts': round((stage.start - self._origin) * 1e6, 1), 'dur': round(wall * 1e6, 1),
+                'pid': os.getpid(), 'tid': stage.lane.tid, 'args': args,
+            })
+
+    def write_chrome_trace(self, path: str):
+        """导出Chrome trace JSON（chrome://tracing 或 ui.perfetto.dev 打开）"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': self.events, 'displayTimeUnit': 'ms'}, f, ensure_ascii=False)
+
+    def write_collapsed(self, path: str):
+        """导出折叠栈（每行 "阶段;子阶段 自身微秒数"），可交给 flamegraph.pl 或 speedscope"""
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, micros in sorted(self.collapsed.items()):
+                f.write(f"{stack} {int(round(micros))}\n")
+
+    def write_items(self, path: str):
+        """导出每所大学各阶段的墙钟与CPU毫秒数（CSV）"""
+        stages = list(self.totals)
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(['item'] + [f"{stage}_{kind}_ms" for stage in stages for kind in ('wall', 'cpu')])
+            for item, timings in self.items.items():
+                row = [item]
+                for stage in stages:
+                    wall, cpu = timings.get(stage, (0.0, 0.0))
+                    row += [round(wall * 1000, 3), round(cpu * 1000, 3)]
+                writer.writerow(row)
+
+    def export(self, path: str):
+        """按扩展名导出：.json 为Chrome trace，其他为折叠栈；同时写出 <path>.items.csv"""
+        if path.lower().endswith('.json'):
+            self.write_chrome_trace(path)
+        else:
+            self.write_collapsed(path)
+        self.write_items(f"{os.path.splitext(path)[0]}.items.csv")
+        logger.info(f"性能剖析已导出: {path}（{len(self.events)} 个阶段记录）")
+
+    def log_summary(self, slowest: int = 10):
+        """输出各阶段总耗时与最慢的大学"""
+        for stage, (count, wall, cpu) in sorted(self.totals.items(), key=lambda item: item[1][1], reverse=True):
+            logger.info(f"阶段 {stage}: {int(count)} 次, 墙钟 {wall:.2f}s, CPU {cpu:.2f}s, "
+                        f"平均 {wall / count * 1000:.1f}ms")
+        # 外层阶段已包含内层阶段，按最长的阶段排序而不是求和
+        ranked = sorted(self.items.items(), key=lambda item: max(t[0] for t in item[1].values()), reverse=True)
+        for item, timings in ranked[:slowest]:
+            detail = ', '.join(f"{stage} {wall * 1000:.0f}ms" for stage, (wall, _) in timings.items())
+            logger.info(f"最慢: {item}: {detail}")
+
+
+# 默认的禁用剖析器，收集器不启用剖析时共用
+NULL_PROFILER = StageProfiler(enabled=False)
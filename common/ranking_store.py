@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+排名数据访问层
+为 database/rankings.db 的 universities 表建立 (year, rank)、(year, country) 等复合索引，
+排名区间、各国前N名、国家分布、逐年变化等查询全部在SQL中完成；
+新一年的排名文件按 (year, 规范化名称) 在单个事务中批量upsert
+"""
+
+import csv
+import sqlite3
+from dataclasses import asdict, dataclass, field
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from common.jsonl import is_jsonl, iter_records
+
+# 默认排名数据库
+DEFAULT_DB_PATH = 'database/rankings.db'
+
+# universities 表的排名字段（按查询顺序）
+RANKING_COLUMNS = ('id', 'rank', 'university', 'country', 'research', 'reputation', 'employment',
+                   'international', 'total_score', 'star_rating', 'year')
+
+_SELECT = f"SELECT {', '.join(RANKING_COLUMNS)} FROM universities"
+
+# 可写入的排名字段（不含id）
+_VALUE_COLUMNS = RANKING_COLUMNS[1:]
+
+_INDEXES = (
+    'CREATE INDEX IF NOT EXISTS idx_universities_year_rank ON universities (year, rank)',
+    'CREATE INDEX IF NOT EXISTS idx_universities_year_country ON universities (year, country)',
+    # 逐年对比按名称连接
+    'CREATE INDEX IF NOT EXISTS idx_universities_year_name ON universities (year, LOWER(TRIM(university)))',
+)
+
+
+@dataclass
+class Ranking:
+    """一所大学在某一年的排名记录"""
+    id: int
+    rank: int
+    university: str
+    country: str
+    research: Optional[float]
+    reputation: Optional[float]
+    employment: Optional[float]
+    international: Optional[float]
+    total_score: Optional[float]
+    star_rating: Optional[str]
+    year: int
+
+    def to_dict(self) -> Dict:
+        """导出用的字典（不含数据库内部id）"""
+        data = asdict(self)
+        data.pop('id')
+        return data
+
+
+@dataclass
+class RankChange:
+    """同一所大学相邻两年的排名变化"""
+    university: str
+    country: str
+    previous_rank: int
+    rank: int
+    rank_change: int  # 正数表示上升
+    score_change: Optional[float]
+
+
+@dataclass
+class IngestReport:
+    """一次导入与库中已有数据的差异"""
+    year: int
+    added: List[str] = field(default_factory=list)
+    removed: List[str] = field(default_factory=list)  # prune=True 时删除的大学
+    stale: List[str] = field(default_factory=list)  # 库中有、文件中没有但未删除的大学（未指定prune）
+    reranked: List[Tuple[str, int, int]] = field(default_factory=list)  # (名称, 原排名, 新排名)
+    unchanged: int = 0
+    duplicates: List[str] = field(default_factory=list)  # 文件内重复出现的名称（保留第一条）
+    db_duplicates: List[str] = field(default_factory=list)  # 库中同名的多余记录（prune=True 时已删除）
+
+    def summary(self) -> Dict[str, int]:
+        """各类变化的数量"""
+        return {
+            'added': len(self.added),
+            'removed': len(self.removed),
+            'stale': len(self.stale),
+            'reranked': len(self.reranked),
+            'unchanged': self.unchanged,
+            'duplicates': len(self.duplicates),
+            'db_duplicates': len(self.db_duplicates),
+        }
+
+
+def name_key(name: str) -> str:
+    """规范化大学名称：合并空白并忽略大小写"""
+    return ' '.join((name or '').split()).casefold()
+
+
+def _to_number(value, cast):
+    if value is None or value == '':
+        return None
+    try:
+        return cast(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def normalize_ranking_record(raw: Dict, default_year: Optional[int] = None) -> Optional[Dict]:
+    """把CSV(Rank, Total_Score...)或JSON(rank, total_score...)格式的一行统一为数据库字段；无名称时返回None"""
+    row = {str(key).strip().lower(): value for key, value in raw.items()}
+    university = ' '.join(str(row.get('university') or '').split())
+    if not university:
+        return None
+    year = _to_number(row.get('year'), int) or default_year
+    return {
+        'rank': _to_number(row.get('rank'), int),
+        'university': university,
+        'country': (row.get('country') or '').strip(),
+        'research': _to_number(row.get('research'), float),
+        'reputation': _to_number(row.get('reputation'), float),
+        'employment': _to_number(row.get('employment'), float),
+        'international': _to_number(row.get('international'), float),
+        'total_score': _to_number(row.get('total_score'), float),
+        'star_rating': row.get('star_rating') or '',
+        'year': year,
+    }
+
+
+def read_ranking_file(path: str, default_year: Optional[int] = None) -> List[Dict]:
+    """读取排名CSV、JSON数组或JSON Lines文件，返回规范化后的记录"""
+    if path.lower().endswith('.json') or is_jsonl(path):
+        records = [normalize_ranking_record(raw, default_year) for raw in iter_records(path)]
+    else:
+        with open(path, 'r', encoding='utf-8-sig', newline='') as f:
+            records = [normalize_ranking_record(raw, default_year) for raw in csv.DictReader(f)]
+    return [record for record in records if record is not None]
+
+
+class RankingStore:
+    """排名数据库的查询与批量导入接口（首次打开时补建索引）"""
+
+    def __init__(self, path: str = DEFAULT_DB_PATH):
+        self.path = path
+        self._conn = sqlite3.connect(path)
+        # 删除大学时级联删除 contacts 表中的邮箱
+        self._conn.execute('PRAGMA foreign_keys = ON')
+        self.ensure_indexes()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def ensure_indexes(self):
+        """建立复合索引（已存在则跳过）"""
+        with self._conn:
+            for statement in _INDEXES:
+                self._conn.execute(statement)
+
+    def years(self) -> List[int]:
+        """库中已有的排名年份"""
+        rows = self._conn.execute('SELECT DISTINCT year FROM universities ORDER BY year').fetchall()
+        return [row[0] for row in rows]
+
+    def count(self, year: int) -> int:
+        """某年的大学数量"""
+        return self._conn.execute('SELECT COUNT(*) FROM universities WHERE year = ?', (year,)).fetchone()[0]
+
+    def iter_year(self, year: int) -> Iterator[Ranking]:
+        """按排名逐条产出某年的全部记录"""
+        cursor = self._conn.execute(f'{_SELECT} WHERE year = ? ORDER BY rank', (year,))
+        for row in cursor:
+            yield Ranking(*row)
+
+    def rank_range(self, year: int, start: int, end: int, country: Optional[str] = None) -> List[Ranking]:
+        """排名在 [start, end] 之间的大学，可按国家过滤"""
+        sql = f'{_SELECT} WHERE year = ? AND rank BETWEEN ? AND ?'
+        params: Tuple = (year, start, end)
+        if country:
+            sql += ' AND country = ?'
+            params += (country,)
+        rows = self._conn.execute(sql + ' ORDER BY rank', params).fetchall()
+        return [Ranking(*row) for row in rows]
+
+    def top(self, year: int, limit: int = 10) -> List[Ranking]:
+        """某年排名前limit的大学"""
+        rows = self._conn.execute(f'{_SELECT} WHERE year = ? ORDER BY rank LIMIT ?', (year, limit)).fetchall()
+        return [Ranking(*row) for row in rows]
+
+    def top_per_country(self, year: int, limit: int = 3) -> Dict[str, List[Ranking]]:
+        """每个国家排名前limit的大学"""
+        rows = self._conn.execute(f'''
+            SELECT {', '.join(RANKING_COLUMNS)} FROM (
+                SELECT *, ROW_NUMBER() OVER (PARTITION BY country ORDER BY rank) AS country_rank
+                FROM universities WHERE year = ?
+            )
+            WHERE country_rank <= ?
+            ORDER BY country, rank
+        ''', (year, limit)).fetchall()
+        result: Dict[str, List[Ranking]] = {}
+        for row in rows:
+            ranking = Ranking(*row)
+            result.setdefault(ranking.country, []).append(ranking)
+        return result
+
+    def country_histogram(self, year: int, start: Optional[int] = None,
+                          end: Optional[int] = None) -> List[Tuple[str, int]]:
+        """各国大学数量（按数量降序），可限定排名区间"""
+        sql = 'SELECT country, COUNT(*) AS total FROM universities WHERE year = ?'
+        params: Tuple = (year,)
+        if start is not None:
+            sql += ' AND rank >= ?'
+            params += (start,)
+        if end is not None:
+            sql += ' AND rank <= ?'
+            params += (end,)
+        sql += ' GROUP BY country ORDER BY total DESC, country'
+        return self._conn.execute(sql, params).fetchall()
+
+    def year_over_year(self, year: int, previous: Optional[int] = None,
+                       limit: Optional[int] = None) -> List[RankChange]:
+        """与上一年（默认 year-1）相比的排名变化，按变化幅度降序；大学名称忽略大小写和首尾空白"""
+        previous = year - 1 if previous is None else previous
+        sql = '''
+            SELECT cur.university, cur.country, prev.rank, cur.rank,
+                   prev.rank - cur.rank AS rank_change,
+                   cur.total_score - prev.total_score
+            FROM universities AS cur
+            JOIN universities AS prev
+              ON prev.year = ? AND LOWER(TRIM(prev.university)) = LOWER(TRIM(cur.university))
+            WHERE cur.year = ?
+            ORDER BY ABS(prev.rank - cur.rank) DESC, cur.rank
+        '''
+        params: Tuple = (previous, year)
+        if limit is not None:
+            sql += ' LIMIT ?'
+            params += (limit,)
+        return [RankChange(*row) for row in self._conn.execute(sql, params).fetchall()]
+
+    def upsert_year(self, year: int, records: Iterable[Dict], prune: bool = False) -> IngestReport:
+        """
+        在单个事务中导入某年的排名：按规范化名称匹配已有记录，匹配到的更新，其余插入；
+        prune=True 时删除文件中不再出现的记录以及库中的同名重复记录（否则分别列为stale和db_duplicates）。
+        返回新增/移除/排名变化报告
+        """
+        report = IngestReport(year)
+        existing: Dict[str, Tuple[int, Optional[int], str]] = {}
+        duplicate_ids: List[Tuple[int]] = []  # 库中规范化名称相同的多余记录
+        rows = self._conn.execute(
+            'SELECT id, rank, university FROM universities WHERE year = ? ORDER BY rank, id', (year,)
+        )
+        for row_id, rank, university in rows:
+            key = name_key(university)
+            if key in existing:
+                duplicate_ids.append((row_id,))
+                report.db_duplicates.append(university)
+            else:
+                existing[key] = (row_id, rank, university)
+
+        updates, inserts, seen = [], [], set()
+        for record in records:
+            key = name_key(record['university'])
+            if key in seen:
+                report.duplicates.append(record['university'])
+                continue
+            seen.add(key)
+            values = tuple(record.get(column) for column in _VALUE_COLUMNS[:-1]) + (year,)
+            if key in existing:
+                row_id, old_rank, _ = existing[key]
+                updates.append(values + (row_id,))
+                if old_rank != record.get('rank'):
+                    report.reranked.append((record['university'], old_rank, record.get('rank')))
+                else:
+                    report.unchanged += 1
+            else:
+                inserts.append(values)
+                report.added.append(record['university'])
+
+        stale_ids = list(duplicate_ids)
+        for key, (row_id, _, university) in existing.items():
+            if key not in seen:
+                (report.removed if prune else report.stale).append(university)
+                stale_ids.append((row_id,))
+
+        assignments = ', '.join(f'{column} = ?' for column in _VALUE_COLUMNS)
+        with self._conn:
+            self._conn.executemany(f'UPDATE universities SET {assignments} WHERE id = ?', updates)
+            self._conn.executemany(
+                f"INSERT INTO universities ({', '.join(_VALUE_COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(_VALUE_COLUMNS))})",
+                inserts
+            )
+            if prune:
+                self._conn.executemany('DELETE FROM universities WHERE id = ?', stale_ids)
+        return report
+
+    def close(self):
+        """关闭数据库连接"""
+        self._conn.close()
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+邮箱收集结果的增量统计
+收集器每得到一条结果就调用 add()，按国家、数据源、邮箱域名和是否成功累计计数，
+任何时候都能直接生成报告，无需重新遍历结果列表或重读结果文件
+"""
+
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+@dataclass
+class GroupStats:
+    """一个分组（国家/数据源）的计数"""
+    total: int = 0
+    with_emails: int = 0
+
+    @property
+    def success_rate(self) -> float:
+        return self.with_emails / self.total * 100 if self.total else 0.0
+
+
+class ResultAggregator:
+    """逐条累计收集结果的统计"""
+
+    def __init__(self, email_field: str = 'email', country_field: str = 'country', source_field: str = 'source',
+                 count_field: Optional[str] = 'emails_found'):
+        self.email_field = email_field
+        self.country_field = country_field
+        self.source_field = source_field
+        self.count_field = count_field
+        self.total = 0
+        self.with_emails = 0
+        # 所有结果中找到的邮箱总数（结果中没有 count_field 时按是否成功计1）
+        self.emails_found = 0
+        self.by_country: Dict[str, GroupStats] = {}
+        self.by_source: Dict[str, GroupStats] = {}
+        self.email_domains: Counter = Counter()
+
+    def add(self, result: Dict):
+        """累计一条结果"""
+        email = result.get(self.email_field) or ''
+        success = bool(email)
+        self.total += 1
+        self.with_emails += success
+        found = result.get(self.count_field) if self.count_field else None
+        self.emails_found += found if isinstance(found, int) else int(success)
+        for groups, key in ((self.by_country, result.get(self.country_field) or 'Unknown'),
+                            (self.by_source, result.get(self.source_field) or 'unknown')):
+            stats = groups.get(key)
+            if stats is None:
+                stats = groups[key] = GroupStats()
+            stats.total += 1
+            stats.with_emails += success
+        if '@' in email:
+            self.email_domains[email.rsplit('@', 1)[1].lower()] += 1
+
+    def extend(self, results: Iterable[Dict]) -> 'ResultAggregator':
+        """累计多条结果"""
+        for result in results:
+            self.add(result)
+        return self
+
+    @property
+    def success_rate(self) -> float:
+        return self.with_emails / self.total * 100 if self.total else 0.0
+
+    def top_countries(self, limit: Optional[int] = None, successful: bool = False) -> List[Tuple[str, GroupStats]]:
+        """按大学数（successful=True 时按成功数）从多到少排列的国家"""
+        return _ranked(self.by_country, 'with_emails' if successful else 'total', limit)
+
+    def top_sources(self, limit: Optional[int] = None) -> List[Tuple[str, GroupStats]]:
+        """按大学数从多到少排列的数据源"""
+        return _ranked(self.by_source, 'total', limit)
+
+    def snapshot(self, limit: int = 20) -> Dict:
+        """当前统计的摘要，可直接序列化为JSON"""
+        return {
+            'total': self.total,
+            'with_emails': self.with_emails,
+            'success_rate': round(self.success_rate, 1),
+            'emails_found': self.emails_found,
+            'countries': {country: vars(stats) for country, stats in self.top_countries(limit)},
+            'sources': {source: vars(stats) for source, stats in self.top_sources()},
+            'email_domains': dict(self.email_domains.most_common(limit)),
+        }
+
+
+def _ranked(groups: Dict[str, GroupStats], field: str, limit: Optional[int]) -> List[Tuple[str, GroupStats]]:
+    """数量为0的分组不列出；数量相同时保持首次出现顺序"""
+    ranked = sorted((item for item in groups.items() if getattr(item[1], field)),
+                    key=lambda item: getattr(item[1], field), reverse=True)
+    return ranked[:limit] if limit is not None else ranked
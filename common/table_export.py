@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+流式表格导出
+记录逐条写入CSV（csv模块）与Excel（openpyxl只写模式），同一遍遍历中累计
+各列的填充数与分组计数；主表写完后再由统计结果生成附加工作表，
+内存占用只与分组数有关，与记录数无关
+"""
+
+import csv
+import json
+import os
+from collections import Counter
+from itertools import chain
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+try:
+    from openpyxl import Workbook
+except ImportError:  # 只导出CSV时无需openpyxl
+    Workbook = None
+
+EXCEL_AVAILABLE = Workbook is not None
+
+
+class ExportSummary:
+    """导出过程中逐条累计的统计"""
+
+    def __init__(self, group_fields: Sequence[str] = (), keyword_fields: Optional[Dict[str, Sequence[str]]] = None,
+                 missing: str = '未知'):
+        self.total = 0
+        self.missing = missing
+        # 各列非空的记录数
+        self.filled: Counter = Counter()
+        # 分组字段 -> 各取值的记录数（按首次出现顺序）
+        self.groups: Dict[str, Counter] = {name: Counter() for name in group_fields}
+        # 字段 -> 各关键词出现在该字段中的记录数（不区分大小写）
+        self.keywords: Dict[str, Counter] = {name: Counter() for name in (keyword_fields or {})}
+        self._keyword_fields = {name: [word.lower() for word in words] for name, words in (keyword_fields or {}).items()}
+
+    def add(self, record: Dict):
+        """累计一条记录"""
+        self.total += 1
+        for key, value in record.items():
+            if value:
+                self.filled[key] += 1
+        for name, counter in self.groups.items():
+            counter[record.get(name, self.missing)] += 1
+        for name, words in self._keyword_fields.items():
+            text = str(record.get(name) or '').lower()
+            for word in words:
+                if word in text:
+                    self.keywords[name][word] += 1
+
+    def share(self, count: int) -> str:
+        """占总数的百分比文本"""
+        return f"{count / self.total * 100:.1f}%" if self.total else "0.0%"
+
+    def ranked(self, name: str, limit: Optional[int] = None) -> List[Tuple[str, int]]:
+        """分组取值按数量从多到少排列（数量相同保持首次出现顺序）"""
+        return self.groups[name].most_common(limit)
+
+
+def _cell(value):
+    """Excel单元格不接受列表、字典，序列化为JSON文本"""
+    if isinstance(value, (list, tuple, dict)):
+        return json.dumps(value, ensure_ascii=False)
+    return value
+
+
+def _columns(rows: Sequence[Dict]) -> List[str]:
+    """各行字段的并集，保持首次出现顺序"""
+    return list(dict.fromkeys(key for row in rows for key in row))
+
+
+def export_records(records: Iterable[Dict], csv_path: Optional[str] = None, excel_path: Optional[str] = None,
+                   columns: Optional[Sequence[str]] = None, sheet_name: str = '数据',
+                   summary: Optional[ExportSummary] = None,
+                   extra_sheets: Optional[Callable[[ExportSummary], List[Tuple[str, List[Dict]]]]] = None
+                   ) -> ExportSummary:
+    """单遍导出记录到CSV和/或Excel，返回累计的统计
+
+    columns 为None时取第一条记录的字段；extra_sheets 根据统计结果返回
+    [(工作表名, 行列表)]，追加在Excel主表之后。两个文件都先写临时文件再替换
+    """
+    if excel_path and not EXCEL_AVAILABLE:
+        raise RuntimeError("导出Excel需要安装openpyxl")
+    summary = summary if summary is not None else ExportSummary()
+    records = iter(records)
+    if columns is None:
+        first = next(records, None)
+        columns = list(first) if first is not None else []
+        if first is not None:
+            records = chain([first], records)
+    columns = list(columns)
+
+    csv_file = writer = workbook = sheet = None
+    csv_tmp = f"{csv_path}.tmp" if csv_path else None
+    excel_tmp = f"{excel_path}.tmp" if excel_path else None
+    try:
+        if csv_path:
+            # utf-8-sig 便于Excel直接打开中文CSV；换行符与原pandas导出(to_csv)一致
+            csv_file = open(csv_tmp, 'w', encoding='utf-8-sig', newline='')
+            writer = csv.DictWriter(csv_file, fieldnames=columns, extrasaction='ignore', lineterminator=os.linesep)
+            writer.writeheader()
+        if excel_path:
+            workbook = Workbook(write_only=True)
+            sheet = workbook.create_sheet(sheet_name)
+            sheet.append(columns)
+
+        for record in records:
+            if writer is not None:
+                writer.writerow(record)
+            if sheet is not None:
+                sheet.append([_cell(record.get(column)) for column in columns])
+            summary.add(record)
+
+        if csv_file is not None:
+            csv_file.close()
+            csv_file = None
+            os.replace(csv_tmp, csv_path)
+        if workbook is not None:
+            for name, rows in (extra_sheets(summary) if extra_sheets else []):
+                extra = workbook.create_sheet(name)
+                extra_columns = _columns(rows)
+                extra.append(extra_columns)
+                for row in rows:
+                    extra.append([_cell(row.get(column)) for column in extra_columns])
+            workbook.save(excel_tmp)
+            os.replace(excel_tmp, excel_path)
+    finally:
+        if csv_file is not None:
+            csv_file.close()
+        for tmp in (csv_tmp, excel_tmp):
+            if tmp and os.path.exists(tmp):
+                os.remove(tmp)
+    return summary
@@ -6,22 +6,27 @@
 目标：获取5000+全球大学的官方邮箱
 """
 
+import argparse
 import asyncio
-import aiohttp
 import pandas as pd
-import re
 import json
 import time
 import logging
-from urllib.parse import urljoin, urlparse
+from urllib.parse import urlparse
 from typing import List, Dict, Set, Optional
 import csv
 from datetime import datetime
 import random
-from bs4 import BeautifulSoup
 import requests
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
+from common.contact_frontier import ContactFrontier, discover_contact_emails
+from common.email_extractor import extract_emails
+from common.fetcher import AsyncFetcher, FetchConfig
+from common.html_links import ScannedPage, scan_page
+from common.http_cache import DEFAULT_CACHE_PATH
+from common.profiler import NULL_PROFILER, StageProfiler
+
 # 配置日志
 logging.basicConfig(
     level=logging.INFO,
@@ -36,13 +41,11 @@ logger = logging.getLogger(__name__)
 class GlobalUniversityEmailCollector:
     def __init__(self):
         self.session = None
+        self.fetcher = None
         self.results = []
         self.processed_urls = set()
-        self.email_patterns = [
-            r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b',
-            r'\b[A-Za-z0-9._%+-]+\[at\][A-Za-z0-9.-]+\[dot\][A-Z|a-z]{2,}\b',
-            r'\b[A-Za-z0-9._%+-]+\s*@\s*[A-Za-z0-9.-]+\s*\.\s*[A-Z|a-z]{2,}\b'
-        ]
+        # 分阶段性能剖析（由main的 --profile 启用）
+        self.profiler = NULL_PROFILER
         
         # 优先级邮箱关键词
         self.priority_keywords = [
@@ -256,37 +259,21 @@ class GlobalUniversityEmailCollector:
 
     async def init_session(self):
         """初始化异步会话"""
-        timeout = aiohttp.ClientTimeout(total=30, connect=10)
-        connector = aiohttp.TCPConnector(limit=100, limit_per_host=10)
-        self.session = aiohttp.ClientSession(
-            timeout=timeout,
-            connector=connector,
-            headers={
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-            }
-        )
+        self.fetcher = AsyncFetcher(FetchConfig(max_connections=100, per_host_connections=10,
+                                                cache_path=DEFAULT_CACHE_PATH))
+        await self.fetcher.start()
+        self.session = self.fetcher.session
 
     async def close_session(self):
         """关闭会话"""
-        if self.session:
-            await self.session.close()
+        if self.fetcher:
+            self.fetcher.stats.log_summary()
+            await self.fetcher.close()
+            self.session = None
 
     def extract_emails_from_text(self, text: str) -> List[str]:
         """从文本中提取邮箱地址"""
-        emails = []
-        for pattern in self.email_patterns:
-            found_emails = re.findall(pattern, text, re.IGNORECASE)
-            for email in found_emails:
-                # 清理邮箱地址
-                email = email.strip()
-                email = email.replace('[at]', '@').replace('[dot]', '.')
-                email = re.sub(r'\s+', '', email)
-                
-                # 验证邮箱格式
-                if re.match(r'^[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}$', email):
-                    emails.append(email.lower())
-        
-        return list(set(emails))  # 去重
+        return extract_emails(text)
 
     def prioritize_emails(self, emails: List[str]) -> List[str]:
         """根据关键词优先级排序邮箱"""
@@ -307,78 +294,51 @@ class GlobalUniversityEmailCollector:
         
         return prioritized + others
 
+    def extract_page_emails(self, html: str) -> List[str]:
+        """从页面中提取邮箱（计入 'extract' 阶段）"""
+        with self.profiler.stage('extract'):
+            return extract_emails(html)
+
     async def fetch_page_content(self, url: str) -> Optional[str]:
         """异步获取页面内容"""
         if url in self.processed_urls:
             return None
         
         self.processed_urls.add(url)
-        
-        try:
-            async with self.session.get(url, allow_redirects=True) as response:
-                if response.status == 200:
-                    content = await response.text()
-                    return content
-                else:
-                    logger.warning(f"HTTP {response.status} for {url}")
-                    return None
-        except Exception as e:
-            logger.error(f"Error fetching {url}: {str(e)}")
-            return None
+        with self.profiler.stage('fetch', cpu=False):
+            return await self.fetcher.fetch_text(url)
 
-    async def extract_emails_from_url(self, url: str) -> List[str]:
-        """从URL中提取邮箱地址"""
+    async def fetch_page(self, url: str) -> Optional[ScannedPage]:
+        """获取页面并只扫描一次链接，结果供邮箱提取与联系页面发现共用"""
         content = await self.fetch_page_content(url)
         if not content:
+            return None
+        with self.profiler.stage('parse'):
+            return scan_page(url, content)
+
+    async def extract_emails_from_url(self, url: str, page: Optional[ScannedPage] = None) -> List[str]:
+        """从URL中提取邮箱地址（正文与mailto链接）"""
+        page = page or await self.fetch_page(url)
+        if not page:
             return []
-        
-        # 从HTML中提取邮箱
-        emails = self.extract_emails_from_text(content)
-        
-        # 尝试从页面中查找更多邮箱链接
-        soup = BeautifulSoup(content, 'html.parser')
-        
-        # 查找包含邮箱的链接
-        email_links = soup.find_all('a', href=re.compile(r'mailto:'))
-        for link in email_links:
-            href = link.get('href', '')
-            if href.startswith('mailto:'):
-                email = href[7:]  # 移除 'mailto:'
-                if email and '@' in email:
-                    emails.append(email.lower())
-        
-        return list(set(emails))  # 去重
+        return page.emails()
 
-    async def find_contact_pages(self, base_url: str) -> List[str]:
-        """查找联系页面"""
-        contact_urls = []
-        
+    async def find_contact_pages(self, base_url: str, page: Optional[ScannedPage] = None) -> List[str]:
+        """查找联系页面，按锚文本、路径深度和语言版本评分排序"""
         try:
-            content = await self.fetch_page_content(base_url)
-            if not content:
-                return contact_urls
+            page = page or await self.fetch_page(base_url)
+            if not page:
+                return []
             
-            soup = BeautifulSoup(content, 'html.parser')
-            
-            # 查找联系页面链接
-            contact_keywords = ['contact', 'about', 'info', 'international', 'global', 'admissions']
-            
-            for link in soup.find_all('a', href=True):
-                href = link.get('href', '').lower()
-                text = link.get_text().lower()
-                
-                # 检查链接文本和URL是否包含联系相关关键词
-                if any(keyword in href or keyword in text for keyword in contact_keywords):
-                    full_url = urljoin(base_url, link['href'])
-                    if full_url.startswith('http'):
-                        contact_urls.append(full_url)
+            frontier = ContactFrontier(base_url)
+            frontier.add_links(page.links)
             
             # 限制联系页面数量
-            return contact_urls[:10]
+            return frontier.pop_batch(10)
             
         except Exception as e:
             logger.error(f"Error finding contact pages for {base_url}: {str(e)}")
-            return contact_urls
+            return []
 
     async def collect_university_emails(self, university: Dict) -> Dict:
         """收集单个大学的邮箱"""
@@ -391,21 +351,21 @@ class GlobalUniversityEmailCollector:
         all_emails = []
         
         try:
-            # 1. 从主页提取邮箱
-            main_emails = await self.extract_emails_from_url(website)
-            all_emails.extend(main_emails)
+            # 1. 从主页提取邮箱（主页只获取和扫描一次）
+            home_page = await self.fetch_page(website)
             
-            # 2. 查找并访问联系页面
-            contact_pages = await self.find_contact_pages(website)
-            
-            for contact_url in contact_pages[:5]:  # 限制联系页面数量
-                contact_emails = await self.extract_emails_from_url(contact_url)
-                all_emails.extend(contact_emails)
-                await asyncio.sleep(0.5)  # 避免请求过快
+            # 2. 按得分并发访问联系页面，找到international@/admissions@/info@即停止
+            # 'crawl' 包含联系页面的网络等待，只有邮箱提取本身计入 'extract'
+            if home_page:
+                with self.profiler.stage('crawl', cpu=False):
+                    all_emails = await discover_contact_emails(self.fetch_page_content, website,
+                                                               home_page=home_page, extract=self.extract_page_emails,
+                                                               guessed_paths=())
             
             # 去重并排序
-            unique_emails = list(set(all_emails))
-            prioritized_emails = self.prioritize_emails(unique_emails)
+            with self.profiler.stage('prioritize'):
+                unique_emails = list(set(all_emails))
+                prioritized_emails = self.prioritize_emails(unique_emails)
             
             # 选择最佳邮箱
             best_email = prioritized_emails[0] if prioritized_emails else None
@@ -453,7 +413,8 @@ class GlobalUniversityEmailCollector:
         
         async def collect_with_semaphore(university):
             async with semaphore:
-                return await self.collect_university_emails(university)
+                with self.profiler.stage('university', university['name'], cpu=False):
+                    return await self.collect_university_emails(university)
         
         # 并发收集邮箱
         tasks = [collect_with_semaphore(uni) for uni in universities]
@@ -543,6 +504,10 @@ class GlobalUniversityEmailCollector:
 
 async def main():
     """主函数"""
+    parser = argparse.ArgumentParser(description='全球大学官方邮箱收集器')
+    parser.add_argument('--profile', help='记录各阶段耗时并导出：.json 为Chrome trace，其他扩展名为折叠栈')
+    args = parser.parse_args()
+    
     print("=== 全球大学官方邮箱收集器 ===")
     print("专业版本 - 多源数据收集策略")
     print("目标：获取5000+全球大学的官方邮箱")
@@ -550,6 +515,8 @@ async def main():
     
     # 创建收集器实例
     collector = GlobalUniversityEmailCollector()
+    if args.profile:
+        collector.profiler = StageProfiler()
     
     try:
         # 收集邮箱
@@ -558,11 +525,13 @@ async def main():
         
         # 导出到CSV
         print("\n导出结果...")
-        csv_filename = collector.export_to_csv(results)
+        with collector.profiler.stage('export'):
+            csv_filename = collector.export_to_csv(results)
         
         # 生成汇总报告
         print("\n生成汇总报告...")
-        report_filename = collector.generate_summary_report(results)
+        with collector.profiler.stage('report'):
+            report_filename = collector.generate_summary_report(results)
         
         print(f"\n✓ 收集完成！")
         print(f"✓ CSV文件: {csv_filename}")
@@ -573,6 +542,10 @@ async def main():
     except Exception as e:
         print(f"\n发生错误: {str(e)}")
         logger.error(f"主程序错误: {str(e)}")
+    finally:
+        if args.profile:
+            collector.profiler.export(args.profile)
+            collector.profiler.log_summary()
 
 if __name__ == "__main__":
     asyncio.run(main()) 
\ No newline at end of file
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+把邮箱收集结果导入 database/rankings.db 的 contacts 表
+按 (year, rank) 关联到 universities.id，没有排名的文件（global_universities_emails_*.csv）按名称匹配
+用法: python import_contacts.py [文件 ...] [--year 2025] [--verify] [--top 500 --role international]
+"""
+
+import argparse
+import asyncio
+import glob
+import time
+
+from common.contact_store import ContactStore
+from common.dns_preflight import DNSResolver
+from common.ranking_store import DEFAULT_DB_PATH
+
+# 未指定文件时导入的结果文件
+DEFAULT_PATTERNS = (
+    'progress_simple_*.json',
+    'universities_emails_test.json',
+    'successful_emails.csv',
+    'global_universities_emails_*.csv',
+)
+
+async def verify_domains(store: ContactStore) -> int:
+    """检查未验证邮箱的域名能否收信（MX记录），可收信的记录验证时间"""
+    emails = store.unverified_emails()
+    domains = {email.split('@', 1)[1] for email in emails}
+    resolver = DNSResolver(concurrency=100)
+    try:
+        accepted = await resolver.check_mail_domains(domains)
+    finally:
+        resolver.close()
+    return store.mark_verified(email for email in emails if accepted.get(email.split('@', 1)[1]))
+
+def main():
+    parser = argparse.ArgumentParser(description='导入邮箱收集结果到contacts表')
+    parser.add_argument('files', nargs='*', help='结果文件（默认导入所有已知格式的结果文件）')
+    parser.add_argument('--db', default=DEFAULT_DB_PATH, help=f'数据库路径 (默认: {DEFAULT_DB_PATH})')
+    parser.add_argument('--year', type=int, default=2025, help='记录中没有year字段时使用的排名年份 (默认: 2025)')
+    parser.add_argument('--verify', action='store_true', help='导入后检查邮箱域名的MX记录')
+    parser.add_argument('--top', type=int, help='导入后列出排名前N且有邮箱的大学')
+    parser.add_argument('--role', help='与 --top 一起使用：只列出该角色的邮箱 (international/admissions/info/other)')
+    args = parser.parse_args()
+
+    files = args.files or sorted({path for pattern in DEFAULT_PATTERNS for path in glob.glob(pattern)})
+    if not files:
+        print("没有找到结果文件")
+        return
+
+    with ContactStore(args.db) as store:
+        start_time = time.time()
+        for path in files:
+            report = store.load_file(path, default_year=args.year)
+            print(f"{path}: {report.rows} 条记录，关联 {report.matched} 所大学，新增 {report.inserted} 个邮箱，"
+                  f"更新 {report.updated} 个"
+                  + (f"，未匹配 {len(report.unmatched)}" if report.unmatched else ""))
+        print(f"导入用时 {time.time() - start_time:.2f} 秒")
+
+        if args.verify:
+            verified = asyncio.run(verify_domains(store))
+            print(f"已验证 {verified} 个邮箱")
+
+        print(f"\n{args.year}年各角色邮箱覆盖的大学数:")
+        for role, count in store.role_counts(args.year):
+            print(f"  {role:<15} {count}")
+
+        if args.top:
+            rows = store.universities_with_contact(args.year, args.top, args.role, verified=args.verify)
+            print(f"\n排名前{args.top}且有{args.role or ''}邮箱的记录: {len(rows)}")
+            for rank, university, country, email, role, _ in rows:
+                print(f"  {rank:<6} {university:<45} {country:<20} {email} ({role})")
+
+if __name__ == "__main__":
+    main()
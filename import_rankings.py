@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+导入排名数据到 database/rankings.db
+支持 data/sample_data.csv、2025_university_rankings.json 及其JSON Lines版本，
+按 (year, 规范化名称) 批量upsert，并报告新增、移除（或文件中已没有）和排名变化的大学
+用法: python import_rankings.py data/sample_data.csv [--year 2025] [--prune] [--report report.json]
+"""
+
+import argparse
+import json
+import sys
+import time
+from collections import defaultdict
+from dataclasses import asdict
+
+from common.ranking_store import DEFAULT_DB_PATH, RankingStore, read_ranking_file
+
+def print_report(report, show: int, prune: bool = False):
+    """打印一年的导入差异"""
+    summary = report.summary()
+    print(f"\n{report.year}年: 新增 {summary['added']}，移除 {summary['removed']}，"
+          f"排名变化 {summary['reranked']}，未变化 {summary['unchanged']}，文件内重复 {summary['duplicates']}")
+    if report.stale:
+        print(f"  文件中没有但仍保留在库中 {summary['stale']}（使用 --prune 删除）")
+    if report.db_duplicates:
+        action = '已删除' if prune else '使用 --prune 删除'
+        print(f"  库中同名重复记录 {summary['db_duplicates']}（{action}）")
+    for name in report.added[:show]:
+        print(f"  + {name}")
+    for name in report.removed[:show]:
+        print(f"  - {name}")
+    for name in report.stale[:show]:
+        print(f"  ? {name}")
+    for name in report.db_duplicates[:show]:
+        print(f"  = {name}")
+    movers = sorted(report.reranked, key=lambda item: abs((item[1] or 0) - (item[2] or 0)), reverse=True)
+    for name, old_rank, new_rank in movers[:show]:
+        print(f"  ~ {name}: {old_rank} -> {new_rank}")
+
+def main():
+    parser = argparse.ArgumentParser(description='导入排名CSV/JSON到排名数据库')
+    parser.add_argument('files', nargs='+', help='排名CSV、JSON或JSON Lines文件')
+    parser.add_argument('--db', default=DEFAULT_DB_PATH, help=f'数据库路径 (默认: {DEFAULT_DB_PATH})')
+    parser.add_argument('--year', type=int, help='文件中没有year列时使用的年份')
+    parser.add_argument('--prune', action='store_true', help='删除文件中不再出现的大学')
+    parser.add_argument('--report', help='把差异报告写入JSON文件')
+    parser.add_argument('--show', type=int, default=10, help='每类变化显示的条数 (默认: 10)')
+    args = parser.parse_args()
+
+    # 按年份分组，每年一个事务
+    by_year = defaultdict(list)
+    for path in args.files:
+        records = read_ranking_file(path, default_year=args.year)
+        print(f"读取 {path}: {len(records)} 条记录")
+        for record in records:
+            if record['year'] is None:
+                print(f"错误: {path} 中的 {record['university']} 没有年份，请使用 --year 指定")
+                sys.exit(1)
+            by_year[record['year']].append(record)
+
+    reports = []
+    with RankingStore(args.db) as store:
+        for year in sorted(by_year):
+            start_time = time.time()
+            report = store.upsert_year(year, by_year[year], prune=args.prune)
+            print_report(report, args.show, args.prune)
+            print(f"  用时 {time.time() - start_time:.3f} 秒")
+            reports.append(report)
+
+    if args.report:
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump([asdict(report) for report in reports], f, ensure_ascii=False, indent=2)
+        print(f"\n差异报告已保存到: {args.report}")
+
+if __name__ == "__main__":
+    main()
@@ -6,22 +6,33 @@
 特性：支持断点续抓，自动保存进度
 """
 
+import argparse
 import asyncio
-import aiohttp
 import pandas as pd
 import re
 import json
 import time
 import logging
 from urllib.parse import urljoin, urlparse
-from typing import List, Dict, Set, Optional
+from typing import List, Dict, Set, Optional, Callable, Awaitable
 import csv
 from datetime import datetime
 import random
-from bs4 import BeautifulSoup
 import os
 import pickle
 
+from common.checkpoint import CheckpointStore
+from common.dns_preflight import DNS_ERROR, DNS_NXDOMAIN, DNS_OK, DNSResolver, preflight_records, url_host
+from common.domain_country import country_from_url
+from common.email_extractor import extract_emails
+from common.fetcher import AsyncFetcher, FetchConfig
+from common.html_links import scan_links
+from common.http_cache import DEFAULT_CACHE_PATH
+from common.metrics import METRICS_INTERVAL, CollectorMetrics
+from common.name_index import NameIndex
+from common.profiler import NULL_PROFILER, StageProfiler
+from common.result_stats import ResultAggregator
+
 # 配置日志
 logging.basicConfig(
     level=logging.INFO,
@@ -36,17 +47,14 @@ logger = logging.getLogger(__name__)
 class MassiveUniversityCollector:
     def __init__(self, max_universities=10000):
         self.session = None
+        self.fetcher = None
+        self.resolver = None
         self.max_universities = max_universities
         self.processed_urls = set()
-        self.progress_file = 'progress_universities.pkl'
+        self.progress_file = 'progress_universities.pkl'  # 旧版进度文件，仅用于导入
+        self.checkpoint_file = 'progress_universities.db'
         self.results_file = 'universities_emails.csv'
         
-        # 邮箱匹配模式
-        self.email_patterns = [
-            r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b',
-            r'\b[A-Za-z0-9._%+-]+\s*@\s*[A-Za-z0-9.-]+\s*\.\s*[A-Z|a-z]{2,}\b'
-        ]
-        
         # 优先级邮箱关键词
         self.priority_keywords = [
             'international', 'global', 'cooperation', 'partnership', 'info', 
@@ -58,75 +66,144 @@ class MassiveUniversityCollector:
             '4icu': {
                 'base_url': 'https://www.4icu.org/top-universities-world/',
                 'pages': 50,  # 4ICU前50页，每页约200所大学
-                'pattern': r'https://www\.4icu\.org/reviews/universities/\d+\.htm'
+                'pattern': r'https://www\.4icu\.org/reviews/universities/\d+\.htm',
+                'link_pattern': r'/reviews/universities/\d+\.htm',
+                'own_prefix': 'https://www.4icu.org',
+                'host': 'www.4icu.org',
+                'rate': 5.0  # 每秒请求数
             },
             'webometrics': {
                 'base_url': 'https://www.webometrics.info/en/world',
                 'pages': 50,  # Webometrics前50页
-                'pattern': r'https://www\.webometrics\.info/en/Detail/\d+'
+                'pattern': r'https://www\.webometrics\.info/en/Detail/\d+',
+                'link_pattern': r'/en/Detail/\d+',
+                'own_prefix': 'https://www.webometrics.info',
+                'host': 'www.webometrics.info',
+                'rate': 5.0
             }
         }
         
+        # 流水线配置
+        self.directory_workers = 20  # 详情页解析并发数
+        self.detail_queue_size = 200  # 详情页URL队列容量
+        self.email_workers = 10  # 邮箱收集并发数
+        self.email_queue_size = 100  # 待收集邮箱的大学队列容量
+        
+        # 运行指标（由main按命令行参数启用）
+        self.metrics: Optional[CollectorMetrics] = None
+        self.metrics_file: Optional[str] = None
+        # 分阶段性能剖析（由main的 --profile 启用）
+        self.profiler = NULL_PROFILER
+        
         # 加载进度
         self.load_progress()
 
     def load_progress(self):
-        """加载进度"""
-        self.completed_universities = set()
-        self.universities_list = []
-        
-        if os.path.exists(self.progress_file):
-            try:
-                with open(self.progress_file, 'rb') as f:
-                    data = pickle.load(f)
-                    self.completed_universities = data.get('completed', set())
-                    self.universities_list = data.get('universities', [])
-                logger.info(f"加载进度：已完成 {len(self.completed_universities)} 所大学")
-            except Exception as e:
-                logger.error(f"加载进度文件失败: {e}")
+        """加载进度：从追加式断点库恢复，无需重放整个进度文件"""
+        self.checkpoint = CheckpointStore(self.checkpoint_file)
+        self.import_legacy_progress()
+        
+        self.completed_universities = self.checkpoint.keys('result')
+        self.universities_list = list(self.checkpoint.values('university'))
+        # 汇总统计随结果逐条更新，续抓时先计入已保存的结果
+        self.stats = ResultAggregator().extend(self.checkpoint.values('result'))
+        self.discovery_complete = self.checkpoint.get_meta('discovery_complete') == '1'
+        if self.completed_universities or self.universities_list:
+            logger.info(f"加载进度：已完成 {len(self.completed_universities)} 所大学")
+
+    def import_legacy_progress(self):
+        """一次性导入旧版pickle进度文件"""
+        if not os.path.exists(self.progress_file) or self.checkpoint.get_meta('legacy_imported'):
+            return
+        try:
+            with open(self.progress_file, 'rb') as f:
+                data = pickle.load(f)
+            for university in data.get('universities', []):
+                self.checkpoint.add('university', university['name'].lower().strip(), university)
+            # 旧版只记录了大学名称，没有结果数据
+            for name in data.get('completed', set()):
+                self.checkpoint.add('result', name)
+            # 旧版进度文件只在发现完成后才保存大学列表
+            if data.get('discovery_complete', bool(data.get('universities'))):
+                self.checkpoint.set_meta('discovery_complete', '1')
+            self.checkpoint.set_meta('legacy_imported', self.progress_file)
+            logger.info(f"已导入旧版进度文件 {self.progress_file}")
+        except Exception as e:
+            logger.error(f"导入旧版进度文件失败: {e}")
+
+    def record_university(self, university: Dict):
+        """记录新发现的大学"""
+        self.universities_list.append(university)
+        self.checkpoint.add('university', university['name'].lower().strip(), university)
+
+    def record_result(self, result: Dict):
+        """记录单所大学的邮箱结果，每条结果只写入一次"""
+        with self.profiler.stage('checkpoint', result['university_name']):
+            if result['university_name'] not in self.completed_universities:
+                self.stats.add(result)
+            self.completed_universities.add(result['university_name'])
+            self.checkpoint.put('result', result['university_name'], result)
+
+    def mark_discovery_complete(self):
+        """标记大学发现阶段已完成"""
+        self.discovery_complete = True
+        self.checkpoint.set_meta('discovery_complete', '1')
 
     def save_progress(self):
-        """保存进度"""
+        """保存进度：结果已逐条提交，这里只合并WAL"""
         try:
-            data = {
-                'completed': self.completed_universities,
-                'universities': self.universities_list,
-                'timestamp': datetime.now().isoformat()
-            }
-            with open(self.progress_file, 'wb') as f:
-                pickle.dump(data, f)
-            logger.info(f"保存进度：已完成 {len(self.completed_universities)} 所大学")
+            with self.profiler.stage('checkpoint'):
+                self.checkpoint.checkpoint()
+            logger.info(f"保存进度：已完成 {len(self.completed_universities)} 所大学，"
+                        f"成功 {self.stats.with_emails} 所 ({self.stats.success_rate:.1f}%)")
         except Exception as e:
             logger.error(f"保存进度失败: {e}")
 
     async def init_session(self):
         """初始化异步会话"""
-        timeout = aiohttp.ClientTimeout(total=30, connect=10)
-        connector = aiohttp.TCPConnector(limit=100, limit_per_host=10)
-        self.session = aiohttp.ClientSession(
-            timeout=timeout,
-            connector=connector,
-            headers={
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-            }
-        )
+        # 全局100连接、单主机10连接；按主机令牌桶限速代替固定sleep
+        host_rates = {source['host']: source['rate'] for source in self.data_sources.values()}
+        self.fetcher = AsyncFetcher(FetchConfig(max_connections=100, per_host_connections=10,
+                                                host_rates=host_rates, cache_path=DEFAULT_CACHE_PATH))
+        await self.fetcher.start()
+        self.session = self.fetcher.session
+        # DNS预检：批量解析官网主机名，跳过不存在的域名
+        self.resolver = DNSResolver(concurrency=200)
+
+    def enable_metrics(self, textfile: Optional[str] = None, port: Optional[int] = None,
+                       interval: float = METRICS_INTERVAL):
+        """启用运行指标：定期写入Prometheus文本文件，和/或在本地端口提供 /metrics（需在init_session之后调用）"""
+        self.metrics = CollectorMetrics(self.fetcher.stats, self.stats, target=self.target_count,
+                                        namespace='massive_collector')
+        self.metrics_file = textfile
+        if textfile:
+            self.metrics.start_textfile(textfile, interval)
+        if port is not None:
+            self.metrics.serve(port)
+
+    def target_count(self) -> int:
+        """预计要处理的大学数：发现阶段结束前按目标数量估计"""
+        if self.discovery_complete:
+            return len(self.universities_list)
+        return max(self.max_universities, len(self.universities_list))
 
     async def close_session(self):
-        """关闭会话"""
-        if self.session:
-            await self.session.close()
+        """关闭会话（可重复调用）"""
+        if self.metrics:
+            self.metrics.stop(self.metrics_file)
+            self.metrics = None
+        if self.fetcher:
+            self.fetcher.stats.log_summary()
+            await self.fetcher.close()
+            self.fetcher = None
+            self.session = None
+        if self.resolver:
+            self.resolver.close()
+            self.resolver = None
 
     def extract_emails_from_text(self, text: str) -> List[str]:
         """从文本中提取邮箱地址"""
-        emails = []
-        for pattern in self.email_patterns:
-            found_emails = re.findall(pattern, text, re.IGNORECASE)
-            for email in found_emails:
-                email = email.strip()
-                email = re.sub(r'\s+', '', email)
-                if re.match(r'^[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}$', email):
-                    emails.append(email.lower())
-        return list(set(emails))
+        return extract_emails(text)
 
     def prioritize_emails(self, emails: List[str]) -> List[str]:
         """根据关键词优先级排序邮箱"""
@@ -147,99 +224,39 @@ class MassiveUniversityCollector:
         
         return prioritized + others
 
+    async def preflight_universities(self, universities: List[Dict]):
+        """批量解析大学官网主机名，把解析状态写回每条记录"""
+        if not self.resolver:
+            return
+        counts = await preflight_records(self.resolver, universities)
+        logger.info(f"DNS预检：可解析 {counts[DNS_OK]}，不存在 {counts[DNS_NXDOMAIN]}，"
+                    f"临时失败 {counts[DNS_ERROR]}")
+
+    async def filter_deliverable_emails(self, emails: List[str]) -> List[str]:
+        """去掉域名无法收信（无MX且无A记录）的邮箱"""
+        if not self.resolver or not emails:
+            return emails
+        domains = await self.resolver.check_mail_domains(email.split('@', 1)[1] for email in emails)
+        return [email for email in emails if domains.get(email.split('@', 1)[1], True)]
+
     async def fetch_page_content(self, url: str) -> Optional[str]:
         """异步获取页面内容"""
         if url in self.processed_urls:
             return None
         
         self.processed_urls.add(url)
-        
-        try:
-            async with self.session.get(url, allow_redirects=True) as response:
-                if response.status == 200:
-                    content = await response.text()
-                    return content
-                else:
-                    logger.warning(f"HTTP {response.status} for {url}")
-                    return None
-        except Exception as e:
-            logger.error(f"Error fetching {url}: {str(e)}")
-            return None
+        with self.profiler.stage('fetch', cpu=False):
+            return await self.fetcher.fetch_text(url)
 
     async def collect_universities_from_4icu(self) -> List[Dict]:
         """从4ICU收集大学信息"""
         universities = []
         
-        for page in range(1, self.data_sources['4icu']['pages'] + 1):
-            if len(universities) >= self.max_universities:
-                break
-                
-            url = f"{self.data_sources['4icu']['base_url']}page-{page}.htm"
-            logger.info(f"正在采集4ICU第{page}页: {url}")
-            
-            try:
-                content = await self.fetch_page_content(url)
-                if not content:
-                    continue
-                
-                soup = BeautifulSoup(content, 'html.parser')
-                
-                # 查找大学链接
-                university_links = soup.find_all('a', href=re.compile(r'/reviews/universities/\d+\.htm'))
-                
-                for link in university_links:
-                    if len(universities) >= self.max_universities:
-                        break
-                    
-                    href = link.get('href', '')
-                    name = link.get_text().strip()
-                    
-                    if name and href:
-                        # 获取大学详情页
-                        detail_url = urljoin(url, href)
-                        detail_content = await self.fetch_page_content(detail_url)
-                        
-                        if detail_content:
-                            detail_soup = BeautifulSoup(detail_content, 'html.parser')
-                            
-                            # 查找官网链接
-                            website = ""
-                            website_links = detail_soup.find_all('a', href=True)
-                            for web_link in website_links:
-                                web_href = web_link.get('href', '')
-                                if (web_href.startswith('http') and 
-                                    not web_href.startswith('https://www.4icu.org') and
-                                    any(keyword in web_link.get_text().lower() for keyword in ['website', 'official', 'homepage'])):
-                                    website = web_href
-                                    break
-                            
-                            # 如果没有找到明确的官网链接，尝试从页面中提取
-                            if not website:
-                                for web_link in website_links:
-                                    web_href = web_link.get('href', '')
-                                    if (web_href.startswith('http') and 
-                                        not web_href.startswith('https://www.4icu.org') and
-                                        '.edu' in web_href or '.ac.' in web_href or '.university' in web_href):
-                                        website = web_href
-                                        break
-                            
-                            if website:
-                                universities.append({
-                                    'name': name,
-                                    'website': website,
-                                    'source': '4icu',
-                                    'country': self.extract_country_from_url(website)
-                                })
-                                logger.info(f"✓ 4ICU: {name} -> {website}")
-                        
-                        await asyncio.sleep(0.5)  # 避免请求过快
-                
-                await asyncio.sleep(1)  # 页面间暂停
-                
-            except Exception as e:
-                logger.error(f"处理4ICU第{page}页时出错: {e}")
-                continue
+        async def emit(university):
+            universities.append(university)
+            return len(universities) < self.max_universities
         
+        await self.crawl_directory('4icu', emit)
         logger.info(f"从4ICU收集到 {len(universities)} 所大学")
         return universities
 
@@ -247,250 +264,241 @@ class MassiveUniversityCollector:
         """从Webometrics收集大学信息"""
         universities = []
         
-        for page in range(1, self.data_sources['webometrics']['pages'] + 1):
-            if len(universities) >= self.max_universities:
-                break
-                
-            url = f"{self.data_sources['webometrics']['base_url']}?page={page}"
-            logger.info(f"正在采集Webometrics第{page}页: {url}")
-            
-            try:
-                content = await self.fetch_page_content(url)
-                if not content:
-                    continue
-                
-                soup = BeautifulSoup(content, 'html.parser')
+        async def emit(university):
+            universities.append(university)
+            return len(universities) < self.max_universities
+        
+        await self.crawl_directory('webometrics', emit)
+        logger.info(f"从Webometrics收集到 {len(universities)} 所大学")
+        return universities
+
+    def listing_page_url(self, source: str, page: int) -> str:
+        """生成目录列表页URL"""
+        base_url = self.data_sources[source]['base_url']
+        if source == '4icu':
+            return f"{base_url}page-{page}.htm"
+        return f"{base_url}?page={page}"
+
+    async def crawl_directory(self, source: str, emit: Callable[[Dict], Awaitable[bool]],
+                              skip_name: Optional[Callable[[str], bool]] = None):
+        """流水线采集目录网站
+        
+        列表页作为生产者把详情页URL放入有界队列，工作协程池并发解析详情页，
+        解析出的大学立即交给emit回调；emit返回False表示数量已够，停止采集。
+        skip_name用于跳过已知大学，避免重复抓取详情页。
+        """
+        config = self.data_sources[source]
+        detail_queue = asyncio.Queue(maxsize=self.detail_queue_size)
+        stop = asyncio.Event()
+        if self.metrics:
+            self.metrics.watch_queue(f'detail_{source}', detail_queue)
+        
+        async def produce():
+            for page in range(1, config['pages'] + 1):
+                if stop.is_set():
+                    break
                 
-                # 查找大学链接
-                university_links = soup.find_all('a', href=re.compile(r'/en/Detail/\d+'))
+                url = self.listing_page_url(source, page)
+                logger.info(f"正在采集{source}第{page}页: {url}")
                 
-                for link in university_links:
-                    if len(universities) >= self.max_universities:
-                        break
-                    
-                    href = link.get('href', '')
-                    name = link.get_text().strip()
+                try:
+                    content = await self.fetch_page_content(url)
+                    if not content:
+                        continue
                     
-                    if name and href:
-                        # 获取大学详情页
-                        detail_url = urljoin(url, href)
-                        detail_content = await self.fetch_page_content(detail_url)
-                        
-                        if detail_content:
-                            detail_soup = BeautifulSoup(detail_content, 'html.parser')
-                            
-                            # 查找官网链接
-                            website = ""
-                            website_links = detail_soup.find_all('a', href=True)
-                            for web_link in website_links:
-                                web_href = web_link.get('href', '')
-                                if (web_href.startswith('http') and 
-                                    not web_href.startswith('https://www.webometrics.info') and
-                                    any(keyword in web_link.get_text().lower() for keyword in ['website', 'official', 'homepage'])):
-                                    website = web_href
-                                    break
-                            
-                            if website:
-                                universities.append({
-                                    'name': name,
-                                    'website': website,
-                                    'source': 'webometrics',
-                                    'country': self.extract_country_from_url(website)
-                                })
-                                logger.info(f"✓ Webometrics: {name} -> {website}")
-                        
-                        await asyncio.sleep(0.5)
-                
-                await asyncio.sleep(1)
-                
-            except Exception as e:
-                logger.error(f"处理Webometrics第{page}页时出错: {e}")
-                continue
+                    # 查找大学链接
+                    link_pattern = re.compile(config['link_pattern'])
+                    with self.profiler.stage('parse', f"{source}#{page}"):
+                        links = scan_links(content)
+                    for link in links:
+                        if stop.is_set():
+                            break
+                        if not link_pattern.search(link.href):
+                            continue
+                        href = link.href
+                        name = link.text
+                        if name and href and not (skip_name and skip_name(name)):
+                            await detail_queue.put((name, urljoin(url, href)))
+                except Exception as e:
+                    logger.error(f"处理{source}第{page}页时出错: {e}")
+        
+        async def resolve():
+            while True:
+                item = await detail_queue.get()
+                if item is None:
+                    break
+                if stop.is_set():
+                    continue
+                name, detail_url = item
+                try:
+                    university = await self.resolve_directory_detail(source, name, detail_url)
+                    if university and not stop.is_set():
+                        if not await emit(university):
+                            stop.set()
+                except Exception as e:
+                    logger.error(f"解析{source}详情页 {detail_url} 时出错: {e}")
+        
+        workers = [asyncio.create_task(resolve()) for _ in range(self.directory_workers)]
+        try:
+            await produce()
+        finally:
+            for _ in workers:
+                await detail_queue.put(None)
+            await asyncio.gather(*workers, return_exceptions=True)
+            if self.metrics:
+                self.metrics.unwatch_queue(f'detail_{source}')
+
+    async def resolve_directory_detail(self, source: str, name: str, detail_url: str) -> Optional[Dict]:
+        """解析目录详情页，返回带官网的大学信息"""
+        detail_content = await self.fetch_page_content(detail_url)
+        if not detail_content:
+            return None
         
-        logger.info(f"从Webometrics收集到 {len(universities)} 所大学")
-        return universities
+        own_prefix = self.data_sources[source]['own_prefix']
+        with self.profiler.stage('parse', name):
+            website_links = scan_links(detail_content)
+        
+        # 查找官网链接
+        website = ""
+        for web_link in website_links:
+            web_href = web_link.href
+            if (web_href.startswith('http') and 
+                not web_href.startswith(own_prefix) and
+                any(keyword in web_link.text.lower() for keyword in ['website', 'official', 'homepage'])):
+                website = web_href
+                break
+        
+        # 4ICU没有找到明确的官网链接时，尝试按域名特征提取
+        if not website and source == '4icu':
+            for web_link in website_links:
+                web_href = web_link.href
+                if (web_href.startswith('http') and 
+                    not web_href.startswith(own_prefix) and
+                    ('.edu' in web_href or '.ac.' in web_href or '.university' in web_href)):
+                    website = web_href
+                    break
+        
+        if not website:
+            return None
+        
+        logger.info(f"✓ {source}: {name} -> {website}")
+        return {
+            'name': name,
+            'website': website,
+            'source': source,
+            'country': self.extract_country_from_url(website)
+        }
 
     def extract_country_from_url(self, url: str) -> str:
-        """从URL推断国家"""
-        url_lower = url.lower()
-        
-        country_mapping = {
-            '.edu': 'USA',
-            '.ac.uk': 'UK',
-            '.ca': 'Canada',
-            '.au': 'Australia',
-            '.de': 'Germany',
-            '.fr': 'France',
-            '.jp': 'Japan',
-            '.cn': 'China',
-            '.in': 'India',
-            '.br': 'Brazil',
-            '.mx': 'Mexico',
-            '.es': 'Spain',
-            '.it': 'Italy',
-            '.nl': 'Netherlands',
-            '.se': 'Sweden',
-            '.no': 'Norway',
-            '.dk': 'Denmark',
-            '.fi': 'Finland',
-            '.ch': 'Switzerland',
-            '.at': 'Austria',
-            '.be': 'Belgium',
-            '.ie': 'Ireland',
-            '.nz': 'New Zealand',
-            '.za': 'South Africa',
-            '.kr': 'South Korea',
-            '.sg': 'Singapore',
-            '.my': 'Malaysia',
-            '.th': 'Thailand',
-            '.vn': 'Vietnam',
-            '.id': 'Indonesia',
-            '.ph': 'Philippines',
-            '.pk': 'Pakistan',
-            '.bd': 'Bangladesh',
-            '.lk': 'Sri Lanka',
-            '.np': 'Nepal',
-            '.mm': 'Myanmar',
-            '.kh': 'Cambodia',
-            '.la': 'Laos',
-            '.mn': 'Mongolia',
-            '.kz': 'Kazakhstan',
-            '.uz': 'Uzbekistan',
-            '.kg': 'Kyrgyzstan',
-            '.tj': 'Tajikistan',
-            '.tm': 'Turkmenistan',
-            '.af': 'Afghanistan',
-            '.ir': 'Iran',
-            '.iq': 'Iraq',
-            '.sa': 'Saudi Arabia',
-            '.ae': 'UAE',
-            '.kw': 'Kuwait',
-            '.qa': 'Qatar',
-            '.bh': 'Bahrain',
-            '.om': 'Oman',
-            '.ye': 'Yemen',
-            '.jo': 'Jordan',
-            '.lb': 'Lebanon',
-            '.sy': 'Syria',
-            '.ps': 'Palestine',
-            '.il': 'Israel',
-            '.tr': 'Turkey',
-            '.cy': 'Cyprus',
-            '.gr': 'Greece',
-            '.bg': 'Bulgaria',
-            '.ro': 'Romania',
-            '.hu': 'Hungary',
-            '.cz': 'Czech Republic',
-            '.sk': 'Slovakia',
-            '.pl': 'Poland',
-            '.lt': 'Lithuania',
-            '.lv': 'Latvia',
-            '.ee': 'Estonia',
-            '.ru': 'Russia',
-            '.ua': 'Ukraine',
-            '.by': 'Belarus',
-            '.md': 'Moldova',
-            '.ge': 'Georgia',
-            '.am': 'Armenia',
-            '.az': 'Azerbaijan',
-            '.rs': 'Serbia',
-            '.hr': 'Croatia',
-            '.si': 'Slovenia',
-            '.ba': 'Bosnia and Herzegovina',
-            '.me': 'Montenegro',
-            '.mk': 'North Macedonia',
-            '.al': 'Albania',
-            '.xk': 'Kosovo',
-            '.pt': 'Portugal',
-            '.mt': 'Malta',
-            '.is': 'Iceland',
-            '.fo': 'Faroe Islands',
-            '.gl': 'Greenland',
-            '.cl': 'Chile',
-            '.ar': 'Argentina',
-            '.pe': 'Peru',
-            '.co': 'Colombia',
-            '.ve': 'Venezuela',
-            '.ec': 'Ecuador',
-            '.bo': 'Bolivia',
-            '.py': 'Paraguay',
-            '.uy': 'Uruguay',
-            '.gy': 'Guyana',
-            '.sr': 'Suriname',
-            '.gf': 'French Guiana',
-            '.fk': 'Falkland Islands',
-            '.gs': 'South Georgia',
-            '.br': 'Brazil',
-            '.mx': 'Mexico',
-            '.gt': 'Guatemala',
-            '.bz': 'Belize',
-            '.sv': 'El Salvador',
-            '.hn': 'Honduras',
-            '.ni': 'Nicaragua',
-            '.cr': 'Costa Rica',
-            '.pa': 'Panama',
-            '.cu': 'Cuba',
-            '.jm': 'Jamaica',
-            '.ht': 'Haiti',
-            '.do': 'Dominican Republic',
-            '.pr': 'Puerto Rico',
-            '.tt': 'Trinidad and Tobago',
-            '.bb': 'Barbados',
-            '.gd': 'Grenada',
-            '.lc': 'Saint Lucia',
-            '.vc': 'Saint Vincent and the Grenadines',
-            '.ag': 'Antigua and Barbuda',
-            '.kn': 'Saint Kitts and Nevis',
-            '.dm': 'Dominica',
-            '.bs': 'Bahamas',
-            '.bz': 'Belize',
-            '.bz': 'Belize',
-        }
+        """从URL推断国家（按主机名的最长域名后缀匹配）"""
+        return country_from_url(url)
+
+    async def discover_universities(self, emit: Optional[Callable[[Dict], Awaitable[None]]] = None) -> int:
+        """流式发现大学：按规范化名称与官网域名去重后追加到大学列表并逐个交给emit，返回大学总数"""
+        # "Universitat Pompeu Fabra" 与 "Pompeu Fabra University" 视为同一所
+        index = NameIndex()
+        for uni in self.universities_list:
+            index.add(uni['name'], uni.get('website', ''), self._known_country(uni))
+        
+        def is_known(name: str) -> bool:
+            return index.find(name) is not None
+        
+        async def accept(university):
+            if len(index) < self.max_universities:
+                _, is_new = index.match_or_add(university['name'], university.get('website', ''),
+                                               self._known_country(university))
+                if is_new:
+                    self.record_university(university)
+                    if emit:
+                        await emit(university)
+            return len(index) < self.max_universities
+        
+        # 从4ICU收集
+        if len(index) < self.max_universities:
+            logger.info("开始从4ICU收集大学信息...")
+            await self.crawl_directory('4icu', accept, skip_name=is_known)
         
-        for domain, country in country_mapping.items():
-            if domain in url_lower:
-                return country
+        # 如果不足1万，从Webometrics补充
+        if len(index) < self.max_universities:
+            logger.info("开始从Webometrics收集大学信息...")
+            await self.crawl_directory('webometrics', accept, skip_name=is_known)
         
-        return "Unknown"
+        self.mark_discovery_complete()
+        return len(index)
+    
+    @staticmethod
+    def _known_country(university: Dict) -> str:
+        """去重时使用的国家（无法从URL推断时为空）"""
+        country = university.get('country', '')
+        return '' if country == 'Unknown' else country
 
     async def collect_all_universities(self) -> List[Dict]:
         """收集所有大学信息"""
-        all_universities = []
-        
-        # 如果已有大学列表，直接使用
-        if self.universities_list:
-            all_universities = self.universities_list
-            logger.info(f"使用已保存的大学列表: {len(all_universities)} 所")
+        # 如果已有完整的大学列表，直接使用
+        if self.universities_list and self.discovery_complete:
+            logger.info(f"使用已保存的大学列表: {len(self.universities_list)} 所")
         else:
-            # 从4ICU收集
-            logger.info("开始从4ICU收集大学信息...")
-            universities_4icu = await self.collect_universities_from_4icu()
-            all_universities.extend(universities_4icu)
-            
-            # 如果不足1万，从Webometrics补充
-            if len(all_universities) < self.max_universities:
-                logger.info("开始从Webometrics收集大学信息...")
-                universities_webometrics = await self.collect_universities_from_webometrics()
-                all_universities.extend(universities_webometrics)
-            
-            # 去重并限制数量
-            unique_universities = []
-            seen_names = set()
-            
-            for uni in all_universities:
-                if len(unique_universities) >= self.max_universities:
+            await self.discover_universities()
+            self.save_progress()
+        
+        logger.info(f"总共收集到 {len(self.universities_list)} 所大学")
+        return self.universities_list
+
+    async def collect_pipeline(self) -> List[Dict]:
+        """发现与邮箱收集流水线：解析出的大学直接进入邮箱阶段，无需等待发现阶段结束"""
+        results = []
+        email_queue = asyncio.Queue(maxsize=self.email_queue_size)
+        if self.metrics:
+            self.metrics.watch_queue('email', email_queue)
+        
+        async def enqueue(university):
+            # 跳过已完成的大学
+            if university['name'] not in self.completed_universities:
+                # 排队期间提前解析主机名
+                if self.resolver and university.get('website'):
+                    self.resolver.prefetch(url_host(university['website']))
+                await email_queue.put(university)
+        
+        async def email_worker():
+            while True:
+                university = await email_queue.get()
+                if university is None:
                     break
-                name_key = uni['name'].lower().strip()
-                if name_key not in seen_names:
-                    seen_names.add(name_key)
-                    unique_universities.append(uni)
-            
-            all_universities = unique_universities
-            self.universities_list = all_universities
+                try:
+                    with self.profiler.stage('university', university['name'], cpu=False):
+                        result = await self.collect_single_university_email(university)
+                except Exception as e:
+                    logger.error(f"收集邮箱时出现异常: {e}")
+                    continue
+                results.append(result)
+                self.record_result(result)
+                
+                # 每50所合并一次WAL
+                if len(results) % 50 == 0:
+                    self.save_progress()
+        
+        workers = [asyncio.create_task(email_worker()) for _ in range(self.email_workers)]
+        try:
+            # 先处理已保存的大学，再继续未完成的发现
+            if self.universities_list:
+                logger.info(f"使用已保存的大学列表: {len(self.universities_list)} 所")
+                await self.preflight_universities(
+                    [uni for uni in self.universities_list if uni['name'] not in self.completed_universities]
+                )
+                for university in list(self.universities_list):
+                    await enqueue(university)
+            if not self.discovery_complete:
+                total = await self.discover_universities(enqueue)
+                logger.info(f"总共收集到 {total} 所大学")
+        finally:
+            for _ in workers:
+                await email_queue.put(None)
+            await asyncio.gather(*workers, return_exceptions=True)
             self.save_progress()
         
-        logger.info(f"总共收集到 {len(all_universities)} 所大学")
-        return all_universities
+        # 返回包括之前运行在内的全部结果，断点续抓后导出仍然完整
+        logger.info(f"本次新完成 {len(results)} 所大学")
+        return list(self.checkpoint.values('result'))
 
     async def collect_emails_for_universities(self, universities: List[Dict]) -> List[Dict]:
         """为大学收集邮箱地址"""
@@ -499,9 +507,15 @@ class MassiveUniversityCollector:
         # 使用信号量限制并发数
         semaphore = asyncio.Semaphore(10)
         
+        # 先批量解析所有官网主机名
+        await self.preflight_universities(
+            [uni for uni in universities if uni['name'] not in self.completed_universities]
+        )
+        
         async def collect_email_for_university(university):
             async with semaphore:
-                return await self.collect_single_university_email(university)
+                with self.profiler.stage('university', university['name'], cpu=False):
+                    return await self.collect_single_university_email(university)
         
         # 分批处理
         batch_size = 50
@@ -523,15 +537,12 @@ class MassiveUniversityCollector:
                 for result in batch_results:
                     if isinstance(result, dict):
                         results.append(result)
-                        self.completed_universities.add(result['university_name'])
+                        self.record_result(result)
                     else:
                         logger.error(f"收集邮箱时出现异常: {result}")
                 
                 # 保存进度
                 self.save_progress()
-            
-            # 批次间暂停
-            await asyncio.sleep(2)
         
         return results
 
@@ -551,6 +562,20 @@ class MassiveUniversityCollector:
                 'source': university.get('source', 'unknown')
             }
         
+        # 域名不存在时不再等待抓取超时
+        dns_status = await self.resolver.resolve_host(url_host(website)) if self.resolver else DNS_OK
+        if dns_status == DNS_NXDOMAIN:
+            logger.warning(f"✗ {university_name}: 域名不存在 {website}")
+            return {
+                'university_name': university_name,
+                'country': country,
+                'website': website,
+                'email': '',
+                'emails_found': 0,
+                'source': university.get('source', 'unknown'),
+                'dns_status': dns_status
+            }
+        
         try:
             # 尝试从主页获取邮箱
             content = await self.fetch_page_content(website)
@@ -564,9 +589,13 @@ class MassiveUniversityCollector:
                     'source': university.get('source', 'unknown')
                 }
             
-            # 提取邮箱
-            emails = self.extract_emails_from_text(content)
-            prioritized_emails = self.prioritize_emails(emails)
+            # 提取邮箱，并检查邮箱域名的MX记录
+            with self.profiler.stage('extract'):
+                found = self.extract_emails_from_text(content)
+            with self.profiler.stage('mx_check', cpu=False):
+                emails = await self.filter_deliverable_emails(found)
+            with self.profiler.stage('prioritize'):
+                prioritized_emails = self.prioritize_emails(emails)
             
             best_email = prioritized_emails[0] if prioritized_emails else ''
             
@@ -625,31 +654,9 @@ class MassiveUniversityCollector:
         logger.info(f"✓ 成功导出 {len(csv_data)} 条记录到 {filename}")
         return filename
 
-    def generate_summary_report(self, results: List[Dict]):
-        """生成汇总报告"""
-        total_universities = len(results)
-        universities_with_emails = len([r for r in results if r.get('email')])
-        total_emails_found = sum(r.get('emails_found', 0) for r in results)
-        
-        # 按国家统计
-        country_stats = {}
-        for result in results:
-            country = result.get('country', 'Unknown')
-            if country not in country_stats:
-                country_stats[country] = {'total': 0, 'with_emails': 0}
-            country_stats[country]['total'] += 1
-            if result.get('email'):
-                country_stats[country]['with_emails'] += 1
-        
-        # 按数据源统计
-        source_stats = {}
-        for result in results:
-            source = result.get('source', 'unknown')
-            if source not in source_stats:
-                source_stats[source] = {'total': 0, 'with_emails': 0}
-            source_stats[source]['total'] += 1
-            if result.get('email'):
-                source_stats[source]['with_emails'] += 1
+    def generate_summary_report(self, results: Optional[List[Dict]] = None):
+        """生成汇总报告；不传结果时直接使用收集过程中累计的统计"""
+        stats = ResultAggregator().extend(results) if results is not None else self.stats
         
         # 生成报告
         report = f"""
@@ -658,23 +665,20 @@ class MassiveUniversityCollector:
 目标数量: {self.max_universities}
 
 总体统计:
-- 总大学数量: {total_universities}
-- 成功获取邮箱: {universities_with_emails}
-- 成功率: {universities_with_emails/total_universities*100:.1f}%
-- 总邮箱数量: {total_emails_found}
+- 总大学数量: {stats.total}
+- 成功获取邮箱: {stats.with_emails}
+- 成功率: {stats.success_rate:.1f}%
+- 总邮箱数量: {stats.emails_found}
 
 按国家统计 (前20):
 """
         
-        sorted_countries = sorted(country_stats.items(), key=lambda x: x[1]['total'], reverse=True)
-        for country, stats in sorted_countries[:20]:
-            success_rate = stats['with_emails'] / stats['total'] * 100 if stats['total'] > 0 else 0
-            report += f"- {country}: {stats['with_emails']}/{stats['total']} ({success_rate:.1f}%)\n"
+        for country, group in stats.top_countries(20):
+            report += f"- {country}: {group.with_emails}/{group.total} ({group.success_rate:.1f}%)\n"
         
         report += "\n按数据源统计:\n"
-        for source, stats in source_stats.items():
-            success_rate = stats['with_emails'] / stats['total'] * 100 if stats['total'] > 0 else 0
-            report += f"- {source}: {stats['with_emails']}/{stats['total']} ({success_rate:.1f}%)\n"
+        for source, group in stats.by_source.items():
+            report += f"- {source}: {group.with_emails}/{group.total} ({group.success_rate:.1f}%)\n"
         
         # 保存报告
         report_filename = f'massive_collection_report_{datetime.now().strftime("%Y%m%d_%H%M%S")}.txt'
@@ -688,6 +692,14 @@ class MassiveUniversityCollector:
 
 async def main():
     """主函数"""
+    parser = argparse.ArgumentParser(description='大规模全球大学邮箱收集器')
+    parser.add_argument('--metrics-file', help='定期写入Prometheus格式指标的文件（如 massive_collector.prom）')
+    parser.add_argument('--metrics-port', type=int, help='在本地端口提供 /metrics 指标服务（如 9108）')
+    parser.add_argument('--metrics-interval', type=float, default=METRICS_INTERVAL,
+                        help=f'写入指标文件的间隔秒数 (默认: {METRICS_INTERVAL})')
+    parser.add_argument('--profile', help='记录各阶段耗时并导出：.json 为Chrome trace，其他扩展名为折叠栈')
+    args = parser.parse_args()
+    
     print("=== 大规模全球大学邮箱收集器 ===")
     print("目标：采集前1万所大学的官方邮箱")
     print("特性：支持断点续抓，自动保存进度")
@@ -695,31 +707,30 @@ async def main():
     
     # 创建收集器实例
     collector = MassiveUniversityCollector(max_universities=10000)
+    if args.profile:
+        collector.profiler = StageProfiler()
     
     try:
         # 初始化会话
         await collector.init_session()
+        if args.metrics_file or args.metrics_port is not None:
+            collector.enable_metrics(args.metrics_file, args.metrics_port, args.metrics_interval)
         
-        # 收集大学信息
-        print("第一步：收集大学信息...")
-        universities = await collector.collect_all_universities()
-        
-        print(f"收集到 {len(universities)} 所大学信息")
+        # 发现大学并收集邮箱（流水线：发现的大学直接进入邮箱阶段）
+        print("第一、二步：发现大学并收集邮箱地址...")
+        results = await collector.collect_pipeline()
         
-        # 收集邮箱
-        print("\n第二步：收集邮箱地址...")
-        results = await collector.collect_emails_for_universities(universities)
-        
-        # 关闭会话
-        await collector.close_session()
+        print(f"收集到 {len(collector.universities_list)} 所大学信息")
         
         # 导出到CSV
         print("\n第三步：导出结果...")
-        csv_filename = collector.export_to_csv(results)
+        with collector.profiler.stage('export'):
+            csv_filename = collector.export_to_csv(results)
         
         # 生成汇总报告
         print("\n第四步：生成汇总报告...")
-        report_filename = collector.generate_summary_report(results)
+        with collector.profiler.stage('report'):
+            report_filename = collector.generate_summary_report()
         
         print(f"\n✓ 收集完成！")
         print(f"✓ CSV文件: {csv_filename}")
@@ -728,12 +739,16 @@ async def main():
     except KeyboardInterrupt:
         print("\n用户中断操作")
         collector.save_progress()
-        await collector.close_session()
     except Exception as e:
         print(f"\n发生错误: {str(e)}")
         logger.error(f"主程序错误: {str(e)}")
         collector.save_progress()
+    finally:
+        # 无论成功、中断还是出错都只关闭一次
         await collector.close_session()
+        if args.profile:
+            collector.profiler.export(args.profile)
+            collector.profiler.log_summary()
 
 if __name__ == "__main__":
     asyncio.run(main()) 
\ No newline at end of file
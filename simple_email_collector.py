@@ -5,14 +5,18 @@
 使用Google搜索和网页解析获取大学官方邮箱
 """
 
-import json
-import time
-import re
-import requests
-from bs4 import BeautifulSoup
+import argparse
 import pandas as pd
 import logging
-from urllib.parse import urljoin, urlparse
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor
+
+from common.checkpoint import CheckpointStore
+from common.email_extractor import extract_emails
+from common.fetcher import SyncFetcher, FetchConfig
+from common.html_links import scan_links
+from common.http_cache import DEFAULT_CACHE_PATH
+from common.jsonl import iter_records, prefer_jsonl, write_records
 
 # 配置日志
 logging.basicConfig(
@@ -25,17 +29,26 @@ logging.basicConfig(
 )
 
 class SimpleEmailCollector:
-    def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        })
+    def __init__(self, workers=1, google_rate=1.0, per_host_connections=4, retry_empty=False):
+        # 并发处理的大学数；1表示逐所顺序处理
+        self.workers = workers
+        # 为True时忽略断点库中没有邮箱的旧结果，重新收集
+        self.retry_empty = retry_empty
+        # Google搜索单独限速（每秒请求数），其余主机使用默认令牌桶；
+        # 每个主机最多 per_host_connections 个并发连接
+        self.fetcher = SyncFetcher(FetchConfig(host_rates={'www.google.com': google_rate},
+                                               max_connections=max(workers * 2, 10),
+                                               per_host_connections=per_host_connections,
+                                               cache_path=DEFAULT_CACHE_PATH))
+        self.session = self.fetcher.session
+        # 逐条追加的断点库，中断后跳过已完成的大学
+        self.checkpoint = CheckpointStore('progress_simple.db')
         
     def load_universities(self, json_file):
-        """加载大学数据"""
+        """加载大学数据（JSON数组或JSON Lines，同名 .jsonl 更新时优先读取）；
+        批处理按下标切片并显示总数，因此整体读入列表"""
         try:
-            with open(json_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            return list(iter_records(prefer_jsonl(json_file)))
         except Exception as e:
             logging.error(f"加载大学数据失败: {e}")
             return []
@@ -55,22 +68,17 @@ class SimpleEmailCollector:
                 try:
                     # 使用Google搜索
                     url = f"https://www.google.com/search?q={query}"
-                    response = self.session.get(url, timeout=10)
+                    content = self.fetcher.fetch_text(url, timeout=10)
                     
-                    if response.status_code == 200:
-                        soup = BeautifulSoup(response.content, 'html.parser')
-                        
+                    if content:
                         # 查找搜索结果中的链接
-                        links = soup.find_all('a', href=True)
-                        for link in links:
-                            href = link['href']
+                        for link in scan_links(content):
+                            href = link.href
                             if href.startswith('/url?q='):
                                 actual_url = href.split('/url?q=')[1].split('&')[0]
                                 if self.is_university_website(actual_url, university_name):
                                     return actual_url
                     
-                    time.sleep(1)  # 避免请求过快
-                    
                 except Exception as e:
                     logging.error(f"搜索查询失败 {query}: {e}")
                     continue
@@ -108,40 +116,36 @@ class SimpleEmailCollector:
         
         try:
             # 获取主页
-            response = self.session.get(website_url, timeout=15)
-            if response.status_code == 200:
-                emails.update(self.extract_emails_from_text(response.text))
+            content = self.fetcher.fetch_text(website_url, timeout=15)
+            if content:
+                emails.update(self.extract_emails_from_text(content))
                 
                 # 解析HTML查找联系页面
-                soup = BeautifulSoup(response.content, 'html.parser')
-                contact_links = self.find_contact_links(soup, website_url)
+                contact_links = self.find_contact_links(scan_links(content), website_url)
                 
                 # 访问联系页面
                 for link in contact_links[:2]:  # 限制访问数量
-                    try:
-                        contact_response = self.session.get(link, timeout=10)
-                        if contact_response.status_code == 200:
-                            emails.update(self.extract_emails_from_text(contact_response.text))
-                    except:
-                        continue
+                    contact_content = self.fetcher.fetch_text(link, timeout=10)
+                    if contact_content:
+                        emails.update(self.extract_emails_from_text(contact_content))
                         
         except Exception as e:
             logging.error(f"提取邮箱失败 {website_url}: {e}")
         
         return list(emails)
     
-    def find_contact_links(self, soup, base_url):
+    def find_contact_links(self, links, base_url):
         """查找联系页面链接"""
         contact_links = []
         contact_keywords = ['contact', 'admissions', 'enquiry', 'inquiry', 'info']
         
-        for link in soup.find_all('a', href=True):
-            href = link.get('href', '').lower()
-            text = link.get_text().lower()
+        for link in links:
+            href = link.href.lower()
+            text = link.text.lower()
             
             for keyword in contact_keywords:
                 if keyword in href or keyword in text:
-                    full_url = urljoin(base_url, link['href'])
+                    full_url = link.absolute(base_url)
                     contact_links.append(full_url)
                     break
         
@@ -149,15 +153,7 @@ class SimpleEmailCollector:
     
     def extract_emails_from_text(self, text):
         """从文本中提取邮箱"""
-        emails = set()
-        email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-        
-        found_emails = re.findall(email_pattern, text)
-        for email in found_emails:
-            if self.is_official_email(email):
-                emails.add(email.lower())
-        
-        return emails
+        return {email for email in extract_emails(text) if self.is_official_email(email)}
     
     def is_official_email(self, email):
         """判断是否为官方邮箱"""
@@ -188,12 +184,10 @@ class SimpleEmailCollector:
             for query in search_queries:
                 try:
                     url = f"https://www.google.com/search?q={query}"
-                    response = self.session.get(url, timeout=10)
+                    content = self.fetcher.fetch_text(url, timeout=10)
                     
-                    if response.status_code == 200:
-                        emails.update(self.extract_emails_from_text(response.text))
-                    
-                    time.sleep(1)
+                    if content:
+                        emails.update(self.extract_emails_from_text(content))
                     
                 except Exception as e:
                     logging.error(f"Google搜索失败 {query}: {e}")
@@ -205,52 +199,66 @@ class SimpleEmailCollector:
         return list(emails)
     
     def collect_emails_batch(self, universities, start_idx, end_idx):
-        """批量收集邮箱"""
-        results = []
+        """批量收集邮箱（workers > 1 时多所大学并发处理，结果顺序不变）"""
+        indices = range(start_idx, end_idx)
         
-        for i in range(start_idx, end_idx):
-            university = universities[i]
-            rank = university['rank']
-            name = university['university']
-            country = university['country']
-            
-            logging.info(f"处理第 {i+1}/{end_idx} 所大学: {name} (排名 {rank})")
-            
-            # 策略1: 搜索官网并提取邮箱
-            website = self.search_university_website(name, country)
-            website_emails = []
-            
-            if website:
-                logging.info(f"找到官网: {website}")
-                website_emails = self.extract_emails_from_website(website, name)
-            
-            # 策略2: Google搜索邮箱
-            google_emails = self.search_emails_google(name, country)
-            
-            # 合并邮箱
-            all_emails = list(set(website_emails + google_emails))
-            
-            # 选择最佳邮箱
-            official_email = self.select_best_email(all_emails)
-            contact_email = self.select_contact_email(all_emails, official_email)
-            
-            # 更新大学数据
-            university['website'] = website or ''
-            university['official_email'] = official_email or ''
-            university['contact_email'] = contact_email or ''
-            university['all_emails_found'] = len(all_emails)
-            
-            results.append(university)
-            
-            # 保存进度
-            if (i + 1) % 10 == 0:
-                self.save_progress(results, f"progress_simple_{start_idx}_{i+1}.json")
-            
-            # 避免请求过于频繁
-            time.sleep(2)
+        if self.workers > 1:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                results = list(executor.map(
+                    lambda i: self.collect_university(universities[i], i, end_idx), indices
+                ))
+        else:
+            results = [self.collect_university(universities[i], i, end_idx) for i in indices]
+        
+        # 批次结束时写出一次进度快照
+        if results:
+            self.save_progress(results, f"progress_simple_{start_idx}_{end_idx}.json")
         
         return results
     
+    def collect_university(self, university, i, end_idx):
+        """收集单所大学的邮箱"""
+        rank = university['rank']
+        name = university['university']
+        country = university['country']
+        
+        # 已完成的大学直接使用断点库中的结果
+        saved = self.checkpoint.get('result', name)
+        if saved is not None and not (self.retry_empty and not saved.get('all_emails_found')):
+            university.update(saved)
+            return university
+        
+        logging.info(f"处理第 {i+1}/{end_idx} 所大学: {name} (排名 {rank})")
+        
+        # 策略1: 搜索官网并提取邮箱
+        website = self.search_university_website(name, country)
+        website_emails = []
+        
+        if website:
+            logging.info(f"找到官网: {website}")
+            website_emails = self.extract_emails_from_website(website, name)
+        
+        # 策略2: Google搜索邮箱
+        google_emails = self.search_emails_google(name, country)
+        
+        # 合并邮箱
+        all_emails = list(set(website_emails + google_emails))
+        
+        # 选择最佳邮箱
+        official_email = self.select_best_email(all_emails)
+        contact_email = self.select_contact_email(all_emails, official_email)
+        
+        # 更新大学数据
+        university['website'] = website or ''
+        university['official_email'] = official_email or ''
+        university['contact_email'] = contact_email or ''
+        university['all_emails_found'] = len(all_emails)
+        
+        # 找到邮箱才追加断点记录；抓取失败（429、超时等）与确实没有邮箱无法区分，空结果留待下次重试
+        if all_emails:
+            self.checkpoint.put('result', name, university)
+        return university
+    
     def select_best_email(self, emails):
         """选择最佳官方邮箱"""
         if not emails:
@@ -281,10 +289,9 @@ class SimpleEmailCollector:
         return ""
     
     def save_progress(self, data, filename):
-        """保存进度"""
+        """保存进度（逐条写入临时文件再原子替换）"""
         try:
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            write_records(filename, data)
             logging.info(f"进度已保存到: {filename}")
         except Exception as e:
             logging.error(f"保存进度失败: {e}")
@@ -300,7 +307,15 @@ class SimpleEmailCollector:
 
 def main():
     """主函数"""
-    collector = SimpleEmailCollector()
+    parser = argparse.ArgumentParser(description='简化版大学邮箱收集器')
+    parser.add_argument('--workers', type=int, default=8, help='并发处理的大学数（1为顺序处理）')
+    parser.add_argument('--google-rate', type=float, default=2.0, help='Google搜索每秒请求数')
+    parser.add_argument('--per-host', type=int, default=4, help='单个主机的最大并发连接数')
+    parser.add_argument('--retry-empty', action='store_true', help='重新收集断点库中没有邮箱的大学')
+    args = parser.parse_args()
+    
+    collector = SimpleEmailCollector(workers=args.workers, google_rate=args.google_rate,
+                                     per_host_connections=args.per_host, retry_empty=args.retry_empty)
     
     # 加载大学数据
     universities = collector.load_universities('universities_501_1000.json')
@@ -6,22 +6,23 @@
 输出：spain_universities_emails_日期.csv（大学名称, 邮箱地址）
 """
 
-import requests
-from bs4 import BeautifulSoup
-import re
+import argparse
+import asyncio
+import glob
 import csv
 from tqdm import tqdm
-from time import sleep
 from datetime import datetime
 
+from common.email_extractor import extract_emails
+from common.fetcher import AsyncFetcher, FetchConfig
+from common.html_links import scan_links
+from common.http_cache import DEFAULT_CACHE_PATH
+
 # 邮箱优先关键词
 PRIORITY_KEYWORDS = [
     'international', 'cooperation', 'global', 'info', 'contact', 'admission', 'relaciones', 'cooperacion', 'relacionesinternacionales', 'internacional', 'oficina', 'office', 'general'
 ]
 
-# 邮箱正则
-EMAIL_REGEX = r'[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}'
-
 # 常见联系页面关键词
 CONTACT_PATHS = [
     'contact', 'contacto', 'contact-us', 'contactar', 'contactos', 'international', 'internacional', 'info', 'about', 'relaciones', 'cooperacion', 'oficina', 'office'
@@ -40,10 +41,6 @@ def load_universities(filename):
                 universities.append({'name': row['name'], 'website': row['website']})
     return universities
 
-def extract_emails(text):
-    emails = re.findall(EMAIL_REGEX, text, re.IGNORECASE)
-    return list(set([e.lower() for e in emails]))
-
 def prioritize_email(emails):
     if not emails:
         return None
@@ -54,50 +51,71 @@ def prioritize_email(emails):
     return emails[0]
 
 def find_contact_pages(base_url, html):
-    soup = BeautifulSoup(html, 'html.parser')
-    links = soup.find_all('a', href=True)
     contact_pages = set()
-    for link in links:
-        href = link['href'].lower()
+    for link in scan_links(html):
+        href = link.href.lower()
+        if href.startswith(('mailto:', 'javascript:', '#')):
+            continue
         for kw in CONTACT_PATHS:
             if kw in href:
-                if href.startswith('http'):
-                    contact_pages.add(href)
-                elif href.startswith('/'):
-                    contact_pages.add(base_url.rstrip('/') + href)
-                else:
-                    contact_pages.add(base_url.rstrip('/') + '/' + href)
+                # 按页面地址解析相对链接，保留原始大小写
+                contact_pages.add(link.absolute(base_url))
+                break
     return list(contact_pages)
 
-def fetch_url(url, timeout=10):
-    try:
-        resp = requests.get(url, headers=HEADERS, timeout=timeout)
-        if resp.status_code == 200:
-            return resp.text
-    except Exception:
-        pass
-    return ''
-
-def collect_email_for_university(uni):
+async def collect_email_for_university_async(fetcher, uni):
+    """异步版本：首页之后并发抓取联系页面"""
     name = uni['name']
     website = uni['website']
     # 1. 抓取首页
-    html = fetch_url(website)
+    html = await fetcher.fetch_text(website, timeout=10) or ''
     emails = extract_emails(html)
-    # 2. 查找联系页面
-    contact_pages = find_contact_pages(website, html)
-    for contact_url in contact_pages[:3]:  # 最多访问3个联系页
-        contact_html = fetch_url(contact_url)
-        emails += extract_emails(contact_html)
-        sleep(0.5)
+    # 2. 并发抓取联系页面
+    contact_pages = find_contact_pages(website, html)[:3]  # 最多访问3个联系页
+    for contact_html in await asyncio.gather(*(fetcher.fetch_text(url, timeout=10) for url in contact_pages)):
+        emails += extract_emails(contact_html or '')
     emails = list(set(emails))
     best_email = prioritize_email(emails)
     return {'name': name, 'email': best_email or ''}
 
+async def collect_emails_concurrently(universities, out_csv, workers=20, per_host=4):
+    """并发抓取所有大学，按输入顺序边完成边写入CSV"""
+    config = FetchConfig(per_host_connections=per_host, headers=HEADERS, timeout=10,
+                         max_retries=1, cache_path=DEFAULT_CACHE_PATH)
+    semaphore = asyncio.Semaphore(workers)
+    
+    async def collect(uni):
+        async with semaphore:
+            try:
+                return await collect_email_for_university_async(fetcher, uni)
+            except Exception as e:
+                tqdm.write(f"处理 {uni['name']} ({uni['website']}) 出错: {e}")
+                return {'name': uni['name'], 'email': ''}
+    
+    async with AsyncFetcher(config) as fetcher:
+        with open(out_csv, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=['name', 'email'])
+            writer.writeheader()
+            with tqdm(total=len(universities), ncols=80) as progress:
+                tasks = [asyncio.create_task(collect(uni)) for uni in universities]
+                for task in tasks:
+                    task.add_done_callback(lambda _: progress.update(1))
+                # 按输入顺序写入：前面的大学都完成后立即写出，行顺序每次运行都相同
+                for task in tasks:
+                    writer.writerow(await task)
+                    f.flush()
+        summary = fetcher.stats.summary()
+        print(f"抓取统计: 请求 {summary['requests']} 次, 成功 {summary['succeeded']}, "
+              f"{summary['pages_per_second']} 页/秒")
+
 def main():
-    # 自动查找最新的西班牙大学列表CSV
-    import glob
-    files = sorted(glob.glob('spain_universities_*.csv'))
+    parser = argparse.ArgumentParser(description='西班牙大学官网邮箱批量抓取')
+    parser.add_argument('--workers', type=int, default=20, help='并发处理的大学数')
+    parser.add_argument('--per-host', type=int, default=4, help='单个主机的最大并发连接数')
+    args = parser.parse_args()
+    
+    # 自动查找最新的西班牙大学列表CSV（排除邮箱结果文件）
+    files = sorted(f for f in glob.glob('spain_universities_*.csv') if '_emails_' not in f)
     if not files:
         print('未找到西班牙大学列表CSV，请先运行spain_universities_scraper.py')
         return
@@ -105,21 +123,10 @@ def main():
     print(f'加载大学列表: {input_csv}')
     universities = load_universities(input_csv)
     print(f'共需抓取 {len(universities)} 所大学邮箱')
-    results = []
-    for uni in tqdm(universities, ncols=80):
-        try:
-            result = collect_email_for_university(uni)
-            results.append(result)
-        except Exception as e:
-            results.append({'name': uni['name'], 'email': ''})
-    # 导出结果
+    # 边抓取边导出结果
     out_csv = f'spain_universities_emails_{datetime.now().strftime("%Y%m%d_%H%M%S")}.csv'
-    with open(out_csv, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.DictWriter(f, fieldnames=['name', 'email'])
-        writer.writeheader()
-        for row in results:
-            writer.writerow(row)
+    asyncio.run(collect_emails_concurrently(universities, out_csv, workers=args.workers, per_host=args.per_host))
     print(f'✓ 已导出: {out_csv}')
 
 if __name__ == '__main__':
-    main() 
\ No newline at end of file
+    main()
@@ -0,0 +1,36 @@
+import sqlite3
+import sys
+from pathlib import Path
+
+import pytest
+
+# 添加仓库根目录到Python路径，以使用共享的common模块
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+# database/rankings.db 中 universities 表的结构（由Node端创建，Python端只读写）
+UNIVERSITIES_SCHEMA = '''
+    CREATE TABLE universities (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        rank INTEGER,
+        university TEXT NOT NULL,
+        country TEXT,
+        research REAL,
+        reputation REAL,
+        employment REAL,
+        international REAL,
+        total_score REAL,
+        star_rating TEXT,
+        year INTEGER
+    )
+'''
+
+
+@pytest.fixture
+def rankings_db(tmp_path) -> str:
+    """只有空 universities 表的临时排名数据库"""
+    path = str(tmp_path / 'rankings.db')
+    conn = sqlite3.connect(path)
+    conn.execute(UNIVERSITIES_SCHEMA)
+    conn.commit()
+    conn.close()
+    return path
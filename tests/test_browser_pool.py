@@ -0,0 +1,68 @@
+import threading
+import time
+
+import pytest
+
+pytest.importorskip('selenium')
+
+from common.browser_pool import BrowserPool
+
+
+class FakeDriver:
+    """按URL中的延迟返回页面的假浏览器"""
+
+    def __init__(self, registry):
+        self.registry = registry
+        self.quit_called = False
+        self.page_source = ''
+        registry.append(self)
+
+    def set_page_load_timeout(self, timeout):
+        self.timeout = timeout
+
+    def get(self, url):
+        if 'crash' in url:
+            raise RuntimeError('chrome crashed')
+        time.sleep(float(url.rsplit('=', 1)[1]))
+        self.page_source = f'<html>{url}</html>'
+
+    def execute_script(self, script):
+        return 'complete'
+
+    def quit(self):
+        self.quit_called = True
+
+
+def test_render_many_keeps_input_order_and_quits_browsers():
+    drivers = []
+    urls = [f'https://uni{i}.edu/?delay={delay}' for i, delay in enumerate([0.2, 0.0, 0.1, 0.0, 0.05])]
+    with BrowserPool(size=3, render_wait=0.1, driver_factory=lambda: FakeDriver(drivers)) as pool:
+        pages = pool.render_many(urls)
+        workers = list(pool._workers)
+    assert pages == [f'<html>{url}</html>' for url in urls]
+    assert 1 <= len(drivers) <= 3
+    assert all(driver.quit_called for driver in drivers)
+    assert not any(worker.is_alive() for worker in workers)
+    with pytest.raises(RuntimeError):
+        pool.submit(urls[0])
+
+
+def test_crashed_browser_is_replaced_and_recycled_after_page_budget():
+    drivers = []
+    lock = threading.Lock()
+
+    def factory():
+        with lock:
+            return FakeDriver(drivers)
+
+    pool = BrowserPool(size=1, render_wait=0.1, max_pages_per_browser=2, driver_factory=factory)
+    try:
+        pages = pool.render_many(['https://a.edu/?delay=0', 'https://a.edu/crash?delay=0',
+                                  'https://b.edu/?delay=0', 'https://c.edu/?delay=0', 'https://d.edu/?delay=0'])
+    finally:
+        pool.close()
+    assert pages[1] is None
+    assert pages[4] == '<html>https://d.edu/?delay=0</html>'
+    # 崩溃后重建一次，之后每2个页面重启一次
+    assert len(drivers) == 3
+    assert all(driver.quit_called for driver in drivers)
@@ -0,0 +1,33 @@
+from common.checkpoint import CheckpointStore
+
+
+def test_resume_after_reopening(tmp_path):
+    path = str(tmp_path / 'progress.db')
+    store = CheckpointStore(path)
+    assert store.add('university', 'Universidad de Sevilla', {'email': 'internacional@us.es'})
+    assert not store.add('university', 'Universidad de Sevilla', {'email': 'other@us.es'})
+    store.add('university', 'Universitat Pompeu Fabra', {'email': ''})
+    store.add('page', 'https://us.es/contacto')
+    store.set_meta('last_index', '2')
+    # 模拟中断：不调用checkpoint()，直接关闭
+    store.close()
+
+    resumed = CheckpointStore(path)
+    try:
+        assert resumed.keys('university') == {'Universidad de Sevilla', 'Universitat Pompeu Fabra'}
+        assert resumed.has('page', 'https://us.es/contacto')
+        assert not resumed.has('page', 'https://upf.edu')
+        assert resumed.get('university', 'Universidad de Sevilla') == {'email': 'internacional@us.es'}
+        assert resumed.get_meta('last_index') == '2'
+        assert resumed.get_meta('missing', 'x') == 'x'
+
+        # put 覆盖时保留原来的写入顺序；没有数据的条目不出现在 values() 中
+        resumed.put('university', 'Universidad de Sevilla', {'email': 'info@us.es'})
+        resumed.put('university', 'Universidad de Granada', {'email': 'info@ugr.es'})
+        assert list(resumed.values('university')) == [
+            {'email': 'info@us.es'}, {'email': ''}, {'email': 'info@ugr.es'}]
+        assert list(resumed.values('page')) == []
+        assert resumed.count('university') == 3
+        resumed.checkpoint()
+    finally:
+        resumed.close()
@@ -0,0 +1,93 @@
+import asyncio
+
+from common.contact_frontier import ContactFrontier, discover_contact_emails, is_priority_mailbox, site_url
+from common.html_links import Link, scan_page
+
+
+def test_frontier_orders_by_score_and_filters_links():
+    frontier = ContactFrontier('https://www.uni.edu/')
+    frontier.add_links([
+        Link('/about', 'About'),
+        Link('/contact', 'Contact us'),
+        Link('https://international.uni.edu/', 'International Office'),
+        Link('https://other.edu/contact', 'Contact'),
+        Link('/files/contact.pdf', 'Contact'),
+        Link('mailto:info@uni.edu', 'Contact'),
+        Link('/news', 'News'),
+        Link('/contact/', 'Contact again'),
+        Link('/fr/contact', 'Contact'),
+    ])
+    assert frontier.pop_batch(10) == [
+        'https://www.uni.edu/contact',
+        'https://international.uni.edu/',
+        'https://www.uni.edu/fr/contact',
+        'https://www.uni.edu/about',
+    ]
+    assert len(frontier) == 0
+
+
+def test_home_language_is_not_penalised():
+    frontier = ContactFrontier('https://www.us.es/es/')
+    assert frontier.score_link(Link('/es/contacto', 'Contacto')) > frontier.score_link(Link('/fr/contact', 'Contact'))
+
+
+def test_guesses_rank_below_explicit_contact_links():
+    frontier = ContactFrontier('https://uni.edu')
+    frontier.add_links([Link('/get-in-touch', 'Contact')])
+    frontier.add_guesses(['contact', 'contact-us', 'get-in-touch'])
+    assert frontier.pop_batch(5) == ['https://uni.edu/get-in-touch', 'https://uni.edu/contact',
+                                     'https://uni.edu/contact-us']
+
+
+def test_helpers():
+    assert site_url('https://uni.edu/', '/contact') == 'https://uni.edu/contact'
+    assert site_url('https://uni.edu/en', 'contact') == 'https://uni.edu/en/contact'
+    assert is_priority_mailbox('Admissions@uni.edu')
+    assert not is_priority_mailbox('webmaster@uni.edu')
+
+
+def test_discover_stops_after_priority_mailbox():
+    pages = {
+        'https://uni.edu': '<a href="/contact">Contact</a><a href="/about">About</a> webmaster@uni.edu',
+        'https://uni.edu/contact': 'intl@uni.edu admissions@uni.edu',
+        'https://uni.edu/about': 'press@uni.edu',
+    }
+    fetched = []
+
+    async def fetch_text(url):
+        fetched.append(url)
+        return pages.get(url)
+
+    emails = asyncio.run(discover_contact_emails(fetch_text, 'https://uni.edu', batch_size=1))
+    assert emails == ['webmaster@uni.edu', 'intl@uni.edu', 'admissions@uni.edu']
+    assert fetched == ['https://uni.edu', 'https://uni.edu/contact']
+
+
+def test_discover_cancels_slow_pages_once_found():
+    cancelled = []
+
+    async def fetch_text(url):
+        if url.endswith('/contact'):
+            return 'info@uni.edu'
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(url)
+            raise
+
+    home = scan_page('https://uni.edu', '<a href="/contact">Contact</a><a href="/admissions">Admissions</a>')
+    emails = asyncio.run(discover_contact_emails(fetch_text, 'https://uni.edu', home_page=home, guessed_paths=()))
+    assert emails == ['info@uni.edu']
+    assert cancelled == ['https://uni.edu/admissions']
+
+
+def test_discover_respects_page_budget():
+    fetched = []
+
+    async def fetch_text(url):
+        fetched.append(url)
+        return None
+
+    emails = asyncio.run(discover_contact_emails(fetch_text, 'https://uni.edu', max_pages=3))
+    assert emails == []
+    assert len(fetched) == 1 + 3
@@ -0,0 +1,105 @@
+import json
+import sqlite3
+
+from common.contact_store import ContactRow, ContactStore, classify_role, contact_row, read_contact_file
+from common.ranking_store import RankingStore
+
+
+def seed(rankings_db):
+    with RankingStore(rankings_db) as store:
+        store.upsert_year(2025, [
+            {'rank': 237, 'university': 'University of Miami', 'country': 'United States'},
+            {'rank': 1605, 'university': 'Miami University', 'country': 'United States'},
+            {'rank': 300, 'university': 'Universidad de Sevilla', 'country': 'Spain'},
+        ])
+
+
+def university_of(store, email):
+    return store._conn.execute('''
+        SELECT u.university FROM contacts AS c JOIN universities AS u ON u.id = c.university_id
+        WHERE c.email = ?
+    ''', (email,)).fetchone()[0]
+
+
+def test_reimport_counts_inserts_and_updates_separately(rankings_db):
+    seed(rankings_db)
+    rows = [ContactRow('University of Miami', rank=237, year=2025, emails=['intl@miami.edu', 'info@miami.edu'])]
+    with ContactStore(rankings_db) as store:
+        first = store.load_rows(rows, 'a.json', seen_at='2025-06-01T00:00:00')
+        assert (first.matched, first.inserted, first.updated) == (1, 2, 0)
+
+        again = store.load_rows(rows, 'a.json', seen_at='2025-06-01T00:00:00')
+        assert (again.inserted, again.updated) == (0, 0)
+
+        later = store.load_rows(rows, 'b.json', seen_at='2025-07-01T00:00:00')
+        assert (later.inserted, later.updated) == (0, 0)
+
+        # 更早的文件提前首次发现时间并补上官网
+        earlier = [ContactRow('University of Miami', rank=237, year=2025, website='https://miami.edu',
+                              emails=['intl@miami.edu', 'admissions@miami.edu'])]
+        report = store.load_rows(earlier, 'old.json', seen_at='2025-01-01T00:00:00')
+        assert (report.inserted, report.updated) == (1, 1)
+        first_seen, website = store._conn.execute(
+            "SELECT first_seen, website FROM contacts WHERE email = 'intl@miami.edu'").fetchone()
+        assert first_seen == '2025-01-01T00:00:00'
+        assert website == 'https://miami.edu'
+
+
+def test_name_fallback_keeps_word_order_pairs_apart(rankings_db):
+    seed(rankings_db)
+    rows = [
+        ContactRow('Miami University', year=2025, country='United States', emails=['admission@miamioh.edu']),
+        ContactRow('University of Miami', year=2025, country='United States', emails=['info@miami.edu']),
+        ContactRow('University of Sevilla', year=2025, country='Spain', emails=['internacional@us.es']),
+        ContactRow('Unknown College', year=2025, emails=['info@unknown.edu']),
+    ]
+    with ContactStore(rankings_db) as store:
+        report = store.load_rows(rows, 'names.json')
+        assert report.unmatched == ['Unknown College']
+        assert university_of(store, 'admission@miamioh.edu') == 'Miami University'
+        assert university_of(store, 'info@miami.edu') == 'University of Miami'
+        assert university_of(store, 'internacional@us.es') == 'Universidad de Sevilla'
+
+
+def test_classify_role():
+    assert classify_role('international.office@uni.edu') == 'international'
+    assert classify_role('internationaloffice@uni.edu') == 'international'
+    assert classify_role('admisiones@uni.es') == 'admissions'
+    assert classify_role('info@uni.edu') == 'info'
+    assert classify_role('information.desk@uni.edu') == 'info'
+    # 短前缀后紧跟字母时不算（oriana 不是 ori）
+    assert classify_role('oriana@uni.edu') == 'other'
+
+
+def test_contact_row_collects_all_email_fields():
+    row = contact_row({'university_name': ' Uni ', 'rank': '12', 'best_email': 'Info@Uni.edu',
+                       'all_emails': ['info@uni.edu', 'intl@uni.edu', 'not-an-email']}, default_year=2025)
+    assert (row.university, row.rank, row.year) == ('Uni', 12, 2025)
+    assert row.emails == ['info@uni.edu', 'intl@uni.edu']
+    assert contact_row({'university': '', 'email': 'x@y.edu'}) is None
+
+
+def test_read_contact_file_csv_and_json(tmp_path):
+    csv_path = tmp_path / 'successful_emails.csv'
+    csv_path.write_text('university,rank,email\nUni A,1,info@a.edu\n,2,info@b.edu\n', encoding='utf-8')
+    json_path = tmp_path / 'progress.json'
+    json_path.write_text(json.dumps([{'university': 'Uni C', 'official_email': 'c@c.edu'}]), encoding='utf-8')
+    assert [(row.university, row.emails) for row in read_contact_file(str(csv_path))] == [('Uni A', ['info@a.edu'])]
+    assert [row.emails for row in read_contact_file(str(json_path))] == [['c@c.edu']]
+
+
+def test_old_source_url_column_is_renamed(rankings_db):
+    seed(rankings_db)
+    conn = sqlite3.connect(rankings_db)
+    conn.execute('''CREATE TABLE contacts (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, university_id INTEGER NOT NULL, email TEXT NOT NULL,
+        role TEXT NOT NULL, source_url TEXT, source_file TEXT, first_seen TEXT NOT NULL, last_verified TEXT,
+        UNIQUE (university_id, email))''')
+    conn.execute("INSERT INTO contacts (university_id, email, role, source_url, first_seen) "
+                 "VALUES (1, 'intl@miami.edu', 'international', 'https://miami.edu', '2025-01-01')")
+    conn.commit()
+    conn.close()
+    with ContactStore(rankings_db) as store:
+        assert store._conn.execute('SELECT website FROM contacts').fetchall() == [('https://miami.edu',)]
+        report = store.load_rows([ContactRow('University of Miami', rank=237, year=2025, emails=['info@miami.edu'])])
+        assert report.inserted == 1
@@ -0,0 +1,103 @@
+import asyncio
+import socket
+import time
+
+import dns.resolver
+
+from common.dns_preflight import DNS_ERROR, DNS_NXDOMAIN, DNS_OK, DNSResolver, preflight_records
+
+
+class FakeDNS:
+    """按 (主机, 记录类型) 返回结果或抛出异常的假解析器"""
+
+    def __init__(self, answers, delay=0.0):
+        self.answers = answers
+        self.delay = delay
+        self.queries = []
+
+    async def resolve(self, name, record_type):
+        self.queries.append((name, record_type))
+        await asyncio.sleep(self.delay)
+        answer = self.answers.get((name, record_type), dns.resolver.NoAnswer)
+        if isinstance(answer, type) and issubclass(answer, Exception):
+            raise answer()
+        return answer
+
+
+def resolver_with(answers, delay=0.0, **kwargs) -> DNSResolver:
+    resolver = DNSResolver(**kwargs)
+    resolver._dns_resolver = FakeDNS(answers, delay)
+    return resolver
+
+
+def test_host_statuses_from_async_resolver():
+    resolver = resolver_with({
+        ('ok.edu', 'A'): ['1.2.3.4'],
+        ('v6.edu', 'AAAA'): ['::1'],
+        ('gone.edu', 'A'): dns.resolver.NXDOMAIN,
+        ('slow.edu', 'A'): dns.exception.Timeout,
+    })
+    statuses = asyncio.run(resolver.resolve_hosts(['ok.edu', 'v6.edu', 'gone.edu', 'slow.edu', 'empty.edu']))
+    assert statuses == {
+        'ok.edu': DNS_OK, 'v6.edu': DNS_OK, 'gone.edu': DNS_NXDOMAIN,
+        'slow.edu': DNS_ERROR, 'empty.edu': DNS_NXDOMAIN,
+    }
+
+
+def test_ip_literal_needs_no_lookup():
+    resolver = resolver_with({})
+    assert asyncio.run(resolver.resolve_host('127.0.0.1')) == DNS_OK
+    assert resolver._dns_resolver.queries == []
+
+
+def test_lookups_run_concurrently_up_to_limit():
+    hosts = [f'u{i}.edu' for i in range(200)]
+    resolver = resolver_with({(host, 'A'): ['1.2.3.4'] for host in hosts}, delay=0.2, concurrency=200, timeout=1.0)
+    started = time.monotonic()
+    statuses = asyncio.run(resolver.resolve_hosts(hosts))
+    assert set(statuses.values()) == {DNS_OK}
+    assert time.monotonic() - started < 1.0
+
+
+def test_getaddrinfo_fallback_uses_dedicated_pool(monkeypatch):
+    # 线程数等于并发上限：100个0.3秒的查询不会在默认线程池里排队到超时
+    def slow_getaddrinfo(host, *args):
+        time.sleep(0.3)
+        if host.startswith('gone'):
+            raise socket.gaierror(socket.EAI_NONAME, 'Name or service not known')
+        return [(socket.AF_INET, socket.SOCK_STREAM, 6, '', ('1.2.3.4', 0))]
+
+    monkeypatch.setattr(socket, 'getaddrinfo', slow_getaddrinfo)
+    resolver = DNSResolver(concurrency=100, timeout=0.8)
+    resolver._dns_resolver = None
+    hosts = [f'u{i}.edu' for i in range(99)] + ['gone.edu']
+    try:
+        statuses = asyncio.run(resolver.resolve_hosts(hosts))
+    finally:
+        resolver.close()
+    assert statuses.pop('gone.edu') == DNS_NXDOMAIN
+    assert set(statuses.values()) == {DNS_OK}
+
+
+def test_mail_domain_falls_back_to_address_records():
+    resolver = resolver_with({
+        ('mx.edu', 'MX'): ['mail.mx.edu'],
+        ('implicit.edu', 'A'): ['1.2.3.4'],
+        ('gone.edu', 'MX'): dns.resolver.NXDOMAIN,
+    })
+    verdicts = asyncio.run(resolver.check_mail_domains(['MX.edu', 'implicit.edu', 'gone.edu', 'nothing.edu']))
+    assert verdicts == {'mx.edu': True, 'implicit.edu': True, 'gone.edu': False, 'nothing.edu': False}
+
+
+def test_preflight_records_writes_status_and_shares_cache():
+    resolver = resolver_with({('ok.edu', 'A'): ['1.2.3.4'], ('gone.edu', 'A'): dns.resolver.NXDOMAIN})
+    records = [
+        {'website': 'https://ok.edu/'},
+        {'website': 'http://OK.edu/contact'},
+        {'website': 'https://gone.edu'},
+        {'name': 'no website'},
+    ]
+    counts = asyncio.run(preflight_records(resolver, records))
+    assert [record.get('dns_status') for record in records] == [DNS_OK, DNS_OK, DNS_NXDOMAIN, None]
+    assert counts == {DNS_OK: 1, DNS_NXDOMAIN: 1, DNS_ERROR: 0}
+    assert resolver._dns_resolver.queries.count(('ok.edu', 'A')) == 1
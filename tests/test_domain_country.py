@@ -0,0 +1,43 @@
+import pytest
+
+from common.domain_country import UNKNOWN_COUNTRY, annotate_countries, classify_urls, country_from_url, url_hostname
+
+
+@pytest.mark.parametrize('url, country', [
+    ('https://www.harvard.edu/', 'USA'),
+    ('https://www.ox.ac.uk/admissions', 'UK'),
+    ('http://www.us.es', 'Spain'),
+    ('https://www.upf.edu.cat', 'Spain'),
+    ('www.unimelb.edu.au', 'Australia'),
+    ('https://www.unal.edu.co', 'Colombia'),
+    ('HTTPS://WWW.UNIBO.IT:8443/path', 'Italy'),
+    ('https://www.tsinghua.edu.cn.', 'China'),
+])
+def test_longest_suffix_wins(url, country):
+    assert country_from_url(url) == country
+
+
+@pytest.mark.parametrize('url', ['https://example.com', 'https://uni.org', 'https://edu', '', 'not a url'])
+def test_unknown_suffixes_use_default(url):
+    assert country_from_url(url) == UNKNOWN_COUNTRY
+    assert country_from_url(url, default='') == ''
+
+
+def test_url_hostname_normalises():
+    assert url_hostname('HTTPS://Www.US.es:443/contacto') == 'www.us.es'
+    assert url_hostname('us.es/contacto') == 'us.es'
+    assert url_hostname('') == ''
+
+
+def test_classify_and_annotate():
+    assert classify_urls(['https://a.edu', 'https://b.es', '', 'https://a.edu/x']) == \
+        ['USA', 'Spain', UNKNOWN_COUNTRY, 'USA']
+    records = [
+        {'website': 'https://www.ucm.es'},
+        {'website': 'https://www.mit.edu', 'country': 'United States'},
+        {'name': 'no website'},
+    ]
+    assert annotate_countries(records) == 2
+    assert [record['country'] for record in records] == ['Spain', 'United States', UNKNOWN_COUNTRY]
+    assert annotate_countries(records, overwrite=True) == 3
+    assert records[1]['country'] == 'USA'
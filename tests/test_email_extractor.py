@@ -0,0 +1,30 @@
+import pytest
+
+from common.email_extractor import extract_emails, has_email_tokens
+
+
+@pytest.mark.parametrize('text, emails', [
+    ('Escríbenos a Internacional@US.es.', ['internacional@us.es']),
+    ('info @ uni.edu', ['info@uni.edu']),
+    ('admissions [at] uni [dot] ac [dot] uk', ['admissions@uni.ac.uk']),
+    ('intl(at)uni(dot)edu', ['intl@uni.edu']),
+    ('contact: office at uni dot edu', []),
+    ('.hidden@uni.edu', ['hidden@uni.edu']),
+    ('<img src="logo@2x.png"> sprite@3x.webp', []),
+    ('a@uni.edu, b@uni.edu; A@UNI.EDU', ['a@uni.edu', 'b@uni.edu']),
+    ('', []),
+])
+def test_extract_emails(text, emails):
+    assert extract_emails(text) == emails
+
+
+def test_prefilter():
+    assert not has_email_tokens('no addresses here')
+    assert has_email_tokens('write to x [at] y')
+    assert has_email_tokens('x@y')
+
+
+def test_long_local_part_is_bounded():
+    text = 'a' * 10000 + '@uni.edu'
+    email, = extract_emails(text)
+    assert email == 'a' * 64 + '@uni.edu'
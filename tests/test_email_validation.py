@@ -0,0 +1,121 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import dns.resolver
+
+from common.dns_preflight import DNS_ERROR, DNS_NXDOMAIN, DNS_OK
+from common.email_validation import DomainVerdictCache, EmailValidator
+
+from test_dns_preflight import resolver_with
+
+ANSWERS = {
+    ('mx.edu', 'MX'): ['mail.mx.edu'],
+    ('implicit.edu', 'A'): ['1.2.3.4'],
+    ('gone.edu', 'MX'): dns.resolver.NXDOMAIN,
+    ('flaky.edu', 'MX'): dns.exception.Timeout,
+    ('flaky.edu', 'A'): dns.exception.Timeout,
+    ('broken.edu', 'MX'): dns.resolver.NoNameservers,
+    ('broken.edu', 'A'): dns.resolver.NoNameservers,
+}
+
+
+def validator_with(tmp_path, answers=ANSWERS, **kwargs) -> EmailValidator:
+    return EmailValidator(resolver=resolver_with(answers), cache_path=str(tmp_path / 'validation.db'), **kwargs)
+
+
+def test_mail_domain_statuses_separate_errors_from_answers():
+    resolver = resolver_with(ANSWERS)
+    statuses = asyncio.run(resolver.mail_domain_statuses(['mx.edu', 'implicit.edu', 'gone.edu', 'flaky.edu',
+                                                          'broken.edu']))
+    assert statuses == {'mx.edu': DNS_OK, 'implicit.edu': DNS_OK, 'gone.edu': DNS_NXDOMAIN,
+                        'flaky.edu': DNS_ERROR, 'broken.edu': DNS_ERROR}
+
+
+def test_domain_verdict_cache_round_trip_and_ttl(tmp_path):
+    path = str(tmp_path / 'validation.db')
+    cache = DomainVerdictCache(path)
+    domains = {f'u{i}.edu': i % 2 == 0 for i in range(1200)}
+    cache.put_many(domains)
+    cache.close()
+
+    reopened = DomainVerdictCache(path, ttl=60)
+    try:
+        # 超过单条SQL参数上限时分块读取
+        assert reopened.get_many(list(domains) + ['missing.edu']) == domains
+        reopened._conn.execute("UPDATE mail_domains SET checked_at = ? WHERE domain = 'u0.edu'", (time.time() - 120,))
+        assert 'u0.edu' not in reopened.get_many(['u0.edu', 'u1.edu'])
+    finally:
+        reopened.close()
+
+
+def test_check_domains_persists_only_definite_verdicts(tmp_path):
+    validator = validator_with(tmp_path)
+    try:
+        verdicts = asyncio.run(validator.check_domains(['mx.edu', 'implicit.edu', 'gone.edu', 'flaky.edu',
+                                                        'broken.edu']))
+    finally:
+        validator.close()
+    # 无法确定的域名在本次运行中不丢弃
+    assert verdicts == {'mx.edu': True, 'implicit.edu': True, 'gone.edu': False, 'flaky.edu': True,
+                        'broken.edu': True}
+    assert validator.stats['domain_unknown'] == 2
+
+    cache = DomainVerdictCache(str(tmp_path / 'validation.db'))
+    try:
+        assert cache.get_many(['mx.edu', 'implicit.edu', 'gone.edu', 'flaky.edu', 'broken.edu']) == \
+            {'mx.edu': True, 'implicit.edu': True, 'gone.edu': False}
+    finally:
+        cache.close()
+
+
+def test_next_run_uses_disk_cache_and_retries_unknown(tmp_path):
+    first = validator_with(tmp_path)
+    asyncio.run(first.check_domains(['mx.edu', 'flaky.edu']))
+    first.close()
+
+    second = validator_with(tmp_path, answers={('flaky.edu', 'MX'): dns.resolver.NXDOMAIN})
+    try:
+        verdicts = asyncio.run(second.check_domains(['mx.edu', 'flaky.edu']))
+        assert verdicts == {'mx.edu': True, 'flaky.edu': False}
+        assert second.stats['domain_disk_hits'] == 1
+        assert second._resolver._dns_resolver.queries == [('flaky.edu', 'MX')]
+    finally:
+        second.close()
+
+
+def test_filter_valid_keeps_order_and_checks_each_domain_once(tmp_path):
+    validator = validator_with(tmp_path)
+    emails = ['Info@MX.edu', 'not-an-email', 'a@gone.edu', 'intl@mx.edu', 'b@flaky.edu', 'c@implicit.edu',
+              'info@mx.edu ']
+    try:
+        valid = asyncio.run(validator.filter_valid(emails))
+    finally:
+        validator.close()
+    assert valid == ['Info@MX.edu', 'intl@mx.edu', 'b@flaky.edu', 'c@implicit.edu', 'info@mx.edu ']
+    queries = validator._resolver._dns_resolver.queries
+    assert queries.count(('mx.edu', 'MX')) == 1
+    assert validator.stats['syntax_hits'] == 1
+
+
+def test_syntax_only_mode_skips_dns(tmp_path):
+    validator = validator_with(tmp_path, check_deliverability=False)
+    assert asyncio.run(validator.filter_valid(['a@gone.edu', 'bad@', 'no at sign'])) == ['a@gone.edu']
+    assert validator._resolver._dns_resolver.queries == []
+    assert not (tmp_path / 'validation.db').exists()
+
+
+def test_from_settings_reads_validation_options(tmp_path):
+    settings = SimpleNamespace(domain_validation_enabled=False,
+                               email_validation_cache_path=str(tmp_path / 'v.db'), email_validation_cache_ttl=60)
+    validator = EmailValidator.from_settings(settings)
+    assert not validator.check_deliverability
+    assert validator._disk is None
+
+    settings.domain_validation_enabled = True
+    validator = EmailValidator.from_settings(settings)
+    try:
+        assert (validator._disk.path, validator._disk.ttl) == (str(tmp_path / 'v.db'), 60)
+    finally:
+        validator.close()
+    assert EmailValidator.from_settings(None, cache_path=None)._disk is None
@@ -0,0 +1,150 @@
+import asyncio
+
+from aiohttp import web
+
+from common.fetcher import AsyncFetcher, FetchConfig, FetchStats, _backoff_delay
+
+
+async def start_server(routes):
+    """在本机随机端口启动测试用HTTP服务，返回 (runner, 基础URL)"""
+    app = web.Application()
+    for path, handler in routes.items():
+        app.router.add_get(path, handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f'http://127.0.0.1:{port}'
+
+
+def fetcher_config(**overrides) -> FetchConfig:
+    values = {'rate_per_host': 0, 'max_retries': 2, 'backoff_base': 0.01, 'backoff_max': 0.02, 'timeout': 5}
+    values.update(overrides)
+    return FetchConfig(**values)
+
+
+def test_cancelled_fetch_releases_in_flight():
+    started = asyncio.Event()
+    release = asyncio.Event()
+
+    async def slow(request):
+        started.set()
+        await release.wait()
+        return web.Response(text='late')
+
+    async def run():
+        runner, base = await start_server({'/slow': slow})
+        try:
+            async with AsyncFetcher(fetcher_config()) as fetcher:
+                task = asyncio.create_task(fetcher.fetch(f'{base}/slow'))
+                await started.wait()
+                assert fetcher.stats.in_flight_hosts() == {'127.0.0.1': 1}
+                task.cancel()
+                await asyncio.gather(task, return_exceptions=True)
+                return fetcher.stats
+        finally:
+            release.set()
+            await runner.cleanup()
+
+    stats = asyncio.run(run())
+    assert stats.in_flight_hosts() == {}
+    assert stats.requests == 0
+
+
+def test_exception_during_fetch_releases_in_flight():
+    async def ok(request):
+        return web.Response(text='<p>ok</p>', content_type='text/html')
+
+    class BrokenCache:
+        ttl = 60
+
+        def get(self, url):
+            return None
+
+        def put(self, *args):
+            raise OSError('disk full')
+
+    async def run():
+        runner, base = await start_server({'/ok': ok})
+        try:
+            async with AsyncFetcher(fetcher_config(), cache=BrokenCache()) as fetcher:
+                try:
+                    await fetcher.fetch(f'{base}/ok')
+                except OSError:
+                    pass
+                else:
+                    raise AssertionError('cache.put 的异常应向上抛出')
+                return fetcher.stats
+        finally:
+            await runner.cleanup()
+
+    assert asyncio.run(run()).in_flight_hosts() == {}
+
+
+def test_retries_transient_status_then_succeeds():
+    calls = []
+
+    async def flaky(request):
+        calls.append(request.path)
+        if len(calls) < 3:
+            return web.Response(status=503)
+        return web.Response(text='done', content_type='text/html')
+
+    async def run():
+        runner, base = await start_server({'/flaky': flaky})
+        try:
+            async with AsyncFetcher(fetcher_config()) as fetcher:
+                return await fetcher.fetch(f'{base}/flaky'), fetcher.stats
+        finally:
+            await runner.cleanup()
+
+    result, stats = asyncio.run(run())
+    assert result.ok and result.text == 'done'
+    assert result.attempts == 3
+    assert stats.retries == 2
+    assert stats.in_flight_hosts() == {}
+
+
+def test_does_not_retry_client_errors():
+    calls = []
+
+    async def missing(request):
+        calls.append(1)
+        return web.Response(status=404)
+
+    async def run():
+        runner, base = await start_server({'/missing': missing})
+        try:
+            async with AsyncFetcher(fetcher_config()) as fetcher:
+                return await fetcher.fetch(f'{base}/missing')
+        finally:
+            await runner.cleanup()
+
+    result = asyncio.run(run())
+    assert not result.ok
+    assert result.error == 'HTTP 404'
+    assert len(calls) == 1
+
+
+def test_stats_end_is_balanced_per_host():
+    stats = FetchStats()
+    stats.begin('a.edu')
+    stats.begin('a.edu')
+    stats.begin('b.edu')
+    stats.end('a.edu')
+    stats.end('b.edu')
+    assert stats.in_flight_hosts() == {'a.edu': 1}
+    stats.end('a.edu')
+    assert stats.in_flight_hosts() == {}
+
+
+def test_backoff_grows_exponentially_and_honours_retry_after():
+    config = FetchConfig(backoff_base=1.0, backoff_max=10.0)
+    for attempt, ceiling in enumerate([1.0, 2.0, 4.0, 8.0, 10.0, 10.0]):
+        delay = _backoff_delay(config, attempt)
+        assert ceiling / 2 <= delay <= ceiling
+    assert _backoff_delay(config, 0, ' 3 ') == 3.0
+    assert _backoff_delay(config, 0, '120') == 10.0
+    # HTTP日期格式的Retry-After按普通退避处理
+    assert _backoff_delay(config, 0, 'Wed, 21 Oct 2015 07:28:00 GMT') <= 1.0
@@ -0,0 +1,24 @@
+from common.html_links import parse_mailto, scan_links, scan_page
+
+
+def test_parse_mailto():
+    assert parse_mailto('mailto:info%40uni.edu?subject=Hola') == ['info@uni.edu']
+    assert parse_mailto('MAILTO:a@uni.edu,b@uni.edu;c@uni.edu') == ['a@uni.edu', 'b@uni.edu', 'c@uni.edu']
+    assert parse_mailto('https://uni.edu/contact') == []
+
+
+def test_scan_links_collects_anchor_text():
+    links = scan_links('<a href=" /contact ">Contact <b>us</b></a> <a name="top">x</a>'
+                       '<a href="/es/contacto">Contacto<a href="/about">About')
+    assert [(link.href, link.text) for link in links] == [
+        ('/contact', 'Contact us'), ('/es/contacto', 'Contacto'), ('/about', 'About')]
+    assert links[0].absolute('https://uni.edu/home/') == 'https://uni.edu/contact'
+
+
+def test_scan_page_splits_mailtos_and_merges_emails():
+    html = ('<p>Info: info@uni.edu</p><a href="mailto:intl@uni.edu">Email</a>'
+            '<a href="/contact">Contact</a>')
+    page = scan_page('https://uni.edu/', html)
+    assert [link.href for link in page.links] == ['/contact']
+    assert page.mailtos == ['intl@uni.edu']
+    assert page.emails() == ['info@uni.edu', 'intl@uni.edu']
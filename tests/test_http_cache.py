@@ -0,0 +1,111 @@
+import asyncio
+import os
+import time
+
+from aiohttp import web
+
+from common.fetcher import AsyncFetcher
+from common.http_cache import ResponseCache
+
+from test_fetcher import fetcher_config, start_server
+
+
+def test_put_get_and_no_store(tmp_path):
+    cache = ResponseCache(str(tmp_path / 'cache.db'))
+    try:
+        cache.put('https://a.edu/', '<p>联系我们</p>', {'etag': '"v1"', 'LAST-MODIFIED': 'Mon, 01 Jan 2024 00:00:00 GMT'},
+                  'https://a.edu/home')
+        entry = cache.get('https://a.edu/')
+        assert (entry.text, entry.final_url) == ('<p>联系我们</p>', 'https://a.edu/home')
+        assert entry.validators() == {'If-None-Match': '"v1"', 'If-Modified-Since': 'Mon, 01 Jan 2024 00:00:00 GMT'}
+        assert entry.is_fresh(60)
+        assert not entry.is_fresh(0)
+
+        cache.put('https://a.edu/private', 'secret', {'Cache-Control': 'private, no-store'})
+        assert cache.get('https://a.edu/private') is None
+        assert cache.get('https://a.edu/missing') is None
+    finally:
+        cache.close()
+
+
+def test_revalidated_refreshes_age_and_keeps_old_validators(tmp_path):
+    cache = ResponseCache(str(tmp_path / 'cache.db'))
+    try:
+        cache.put('https://a.edu/', 'body', {'ETag': '"v1"', 'Last-Modified': 'old'})
+        cache._conn.execute('UPDATE responses SET stored_at = ?', (time.time() - 3600,))
+        assert not cache.get('https://a.edu/').is_fresh(60)
+
+        cache.revalidated('https://a.edu/', {'ETag': '"v2"'})
+        entry = cache.get('https://a.edu/')
+        assert entry.is_fresh(60)
+        assert (entry.etag, entry.last_modified, entry.text) == ('"v2"', 'old', 'body')
+    finally:
+        cache.close()
+
+
+def test_lru_eviction_keeps_recently_used(tmp_path):
+    cache = ResponseCache(str(tmp_path / 'cache.db'), max_mb=0.001)
+    try:
+        # 随机字节的十六进制压缩后每条约420字节，上限约1KB：放得下两条，放不下三条
+        pages = {f'https://a.edu/{i}': os.urandom(400).hex() for i in range(3)}
+        for url, text in list(pages.items())[:2]:
+            cache.put(url, text, {})
+            time.sleep(0.01)
+        assert cache.get('https://a.edu/0') is not None
+        time.sleep(0.01)
+        cache.put('https://a.edu/2', pages['https://a.edu/2'], {})
+        assert cache.get('https://a.edu/1') is None
+        assert cache.get('https://a.edu/0').text == pages['https://a.edu/0']
+        assert cache.get('https://a.edu/2') is not None
+        assert cache._total_bytes <= cache.max_bytes
+    finally:
+        cache.close()
+
+
+def test_total_size_survives_reopen(tmp_path):
+    path = str(tmp_path / 'cache.db')
+    cache = ResponseCache(path)
+    cache.put('https://a.edu/', 'x' * 1000, {})
+    cache.put('https://a.edu/', 'y' * 1000, {})
+    size = cache._total_bytes
+    cache.close()
+    reopened = ResponseCache(path)
+    try:
+        assert reopened._total_bytes == size > 0
+    finally:
+        reopened.close()
+
+
+def test_fetcher_revalidates_stale_entry_with_conditional_request(tmp_path):
+    seen_headers = []
+
+    async def page(request):
+        seen_headers.append(request.headers.get('If-None-Match'))
+        if request.headers.get('If-None-Match') == '"v1"':
+            return web.Response(status=304, headers={'ETag': '"v1"'})
+        return web.Response(text='<a href="mailto:info@a.edu">info</a>', content_type='text/html',
+                            headers={'ETag': '"v1"'})
+
+    async def run(cache):
+        runner, base = await start_server({'/contact': page})
+        url = f'{base}/contact'
+        try:
+            async with AsyncFetcher(fetcher_config(), cache=cache) as fetcher:
+                first = await fetcher.fetch(url)
+                hit = await fetcher.fetch(url)
+                cache.ttl = 0
+                revalidated = await fetcher.fetch(url)
+                return first, hit, revalidated, fetcher.stats.summary()
+        finally:
+            await runner.cleanup()
+
+    cache = ResponseCache(str(tmp_path / 'cache.db'), ttl=60)
+    try:
+        first, hit, revalidated, summary = asyncio.run(run(cache))
+    finally:
+        cache.close()
+    assert (first.cache, hit.cache, revalidated.cache) == ('', 'hit', 'revalidated')
+    assert revalidated.status == 200 and revalidated.text == first.text
+    # 命中有效缓存时不发请求；过期后带上ETag做条件请求
+    assert seen_headers == [None, '"v1"']
+    assert (summary['cache_hits'], summary['cache_revalidated']) == (1, 1)
@@ -0,0 +1,97 @@
+import io
+import json
+import os
+
+import pytest
+
+from common import jsonl
+from common.jsonl import convert, iter_json_array, iter_records, prefer_jsonl, write_records
+
+
+def parse(text, chunk_size=None, monkeypatch=None):
+    if chunk_size:
+        monkeypatch.setattr(jsonl, '_CHUNK_SIZE', chunk_size)
+    return list(iter_json_array(io.StringIO(text)))
+
+
+@pytest.mark.parametrize('chunk_size', [1, 2, 3, 7, 64 * 1024])
+def test_array_parses_across_chunk_boundaries(monkeypatch, chunk_size):
+    records = [{'rank': 1, 'name': 'Universidad de Sevilla', 'score': 100.25},
+               {'rank': 2, 'emails': ['a@b.es', 'c@d.es'], 'website': None},
+               12345, -1.5e3, 'texto con ] y , dentro', [], {}]
+    text = json.dumps(records, ensure_ascii=False, indent=2)
+    assert parse(text, chunk_size, monkeypatch) == records
+
+
+def test_number_split_at_chunk_boundary_is_not_truncated(monkeypatch):
+    # "[100.0]" 按2字符分块时会在 "100" 与 ".0" 之间断开
+    assert parse('[100.0, 2e10]', 2, monkeypatch) == [100.0, 2e10]
+
+
+def test_empty_and_whitespace_arrays():
+    assert parse('') == []
+    assert parse('  [ ]  ') == []
+    assert parse('\n[\n]\n') == []
+
+
+@pytest.mark.parametrize('text, message', [
+    ('{"a": 1}', '不是JSON数组'),
+    ('[1, 2', '不完整'),
+    ('[1 2]', '意外的字符'),
+])
+def test_malformed_arrays_raise_value_error(text, message):
+    with pytest.raises(ValueError, match=message):
+        parse(text)
+
+
+def test_jsonl_reports_bad_line(tmp_path):
+    path = tmp_path / 'rows.jsonl'
+    path.write_text('{"a": 1}\n\n{"a": 2}\nnot json\n', encoding='utf-8')
+    records = iter_records(str(path))
+    assert next(records) == {'a': 1}
+    assert next(records) == {'a': 2}
+    with pytest.raises(ValueError, match='第 4 行'):
+        next(records)
+
+
+def test_iter_records_strips_bom(tmp_path):
+    path = tmp_path / 'rows.json'
+    path.write_text('\ufeff[{"name": "Uni"}]', encoding='utf-8')
+    assert list(iter_records(str(path))) == [{'name': 'Uni'}]
+
+
+def test_write_and_convert_round_trip(tmp_path):
+    records = [{'name': 'Universitat de València', 'rank': i} for i in range(3)]
+    src = tmp_path / 'unis.json'
+    assert write_records(str(src), iter(records)) == 3
+    assert json.loads(src.read_text(encoding='utf-8')) == records
+    assert 'València' in src.read_text(encoding='utf-8')
+
+    result = convert(str(src))
+    dst = tmp_path / 'unis.jsonl'
+    assert result == {'src': str(src), 'dst': str(dst), 'records': 3}
+    assert [json.loads(line) for line in dst.read_text(encoding='utf-8').splitlines()] == records
+    assert list(iter_records(str(dst))) == records
+    assert not (tmp_path / 'unis.jsonl.tmp').exists()
+
+
+def test_write_empty_array_is_valid_json(tmp_path):
+    path = tmp_path / 'empty.json'
+    assert write_records(str(path), []) == 0
+    assert json.loads(path.read_text(encoding='utf-8')) == []
+
+
+def test_prefer_jsonl_picks_the_newer_file(tmp_path):
+    src = tmp_path / 'unis.json'
+    src.write_text('[]', encoding='utf-8')
+    assert prefer_jsonl(str(src)) == str(src)
+    sibling = tmp_path / 'unis.jsonl'
+    sibling.write_text('', encoding='utf-8')
+    os.utime(src, (1000, 1000))
+    os.utime(sibling, (2000, 2000))
+    assert prefer_jsonl(str(src)) == str(sibling)
+    # 旧的 .jsonl 不会遮住之后修改过的 .json
+    os.utime(src, (3000, 3000))
+    assert prefer_jsonl(str(src)) == str(src)
+    src.unlink()
+    assert prefer_jsonl(str(src)) == str(sibling)
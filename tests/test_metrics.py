@@ -0,0 +1,68 @@
+import asyncio
+
+from aiohttp import web
+
+from common.fetcher import AsyncFetcher
+from common.metrics import CollectorMetrics
+from common.result_stats import ResultAggregator
+
+from test_fetcher import fetcher_config, start_server
+
+
+def in_flight_samples(text: str):
+    return [line for line in text.splitlines() if line.startswith('collector_fetch_in_flight{')]
+
+
+def test_in_flight_gauge_returns_to_zero_after_cancel():
+    started = asyncio.Event()
+    release = asyncio.Event()
+
+    async def slow(request):
+        started.set()
+        await release.wait()
+        return web.Response(text='late')
+
+    async def run():
+        runner, base = await start_server({'/slow': slow})
+        try:
+            async with AsyncFetcher(fetcher_config()) as fetcher:
+                metrics = CollectorMetrics(fetch_stats=fetcher.stats)
+                tasks = [asyncio.create_task(fetcher.fetch(f'{base}/slow?page={i}')) for i in range(3)]
+                while fetcher.stats.in_flight_hosts().get('127.0.0.1', 0) < 3:
+                    await asyncio.sleep(0.01)
+                busy = metrics.render()
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                return busy, metrics.render()
+        finally:
+            release.set()
+            await runner.cleanup()
+
+    busy, idle = asyncio.run(run())
+    assert in_flight_samples(busy) == ['collector_fetch_in_flight{host="127.0.0.1"} 3']
+    assert in_flight_samples(idle) == []
+
+
+def test_render_results_and_eta():
+    results = ResultAggregator()
+    metrics = CollectorMetrics(results=results, target=4)
+    results.add({'email': 'info@a.edu', 'country': 'Spain'})
+    results.add({'email': '', 'country': 'Spain'})
+    text = metrics.render()
+    assert 'collector_results_total 2' in text
+    assert 'collector_results_with_email_total 1' in text
+    assert 'collector_success_ratio 0.5' in text
+    assert 'collector_target 4' in text
+    assert metrics.eta_seconds() > 0
+
+
+def test_queue_depth_and_label_escaping():
+    queue = asyncio.Queue()
+    queue.put_nowait(1)
+    queue.put_nowait(2)
+    metrics = CollectorMetrics()
+    metrics.watch_queue('detail_"x"', queue)
+    assert 'collector_queue_depth{queue="detail_\\"x\\""} 2' in metrics.render()
+    metrics.unwatch_queue('detail_"x"')
+    assert 'queue_depth' not in metrics.render()
@@ -0,0 +1,71 @@
+import pytest
+
+from common.name_index import NameIndex, merge_records, name_key, ordered_name_key
+
+
+# 2025排名中同一国家、只有词序不同的两所大学
+WORD_ORDER_PAIRS = [
+    ('University of Miami', 'Miami University', 'United States'),
+    ('Jinan University', 'University of Jinan', 'China'),
+    ('Shizuoka University', 'University of Shizuoka', 'Japan'),
+]
+
+
+@pytest.mark.parametrize('first, second, country', WORD_ORDER_PAIRS)
+def test_word_order_pairs_are_different_universities(first, second, country):
+    assert name_key(first) == name_key(second)
+    assert ordered_name_key(first) != ordered_name_key(second)
+    index = NameIndex()
+    index.add(first, country=country)
+    assert index.find(second, country=country) is None
+    _, is_new = index.match_or_add(second, country=country)
+    assert is_new
+    assert len(index) == 2
+
+
+@pytest.mark.parametrize('first, second, country', WORD_ORDER_PAIRS)
+def test_word_order_pairs_with_different_websites(first, second, country):
+    index = NameIndex()
+    index.add(first, 'https://www.first.edu', country)
+    assert index.find(second, 'https://second.edu', country) is None
+
+
+def test_word_order_difference_merges_when_website_matches():
+    index = NameIndex()
+    entry = index.add('Universitat Pompeu Fabra', 'https://www.upf.edu', 'Spain')
+    assert index.find('Pompeu Fabra University', 'https://upf.edu/contact', 'Spain') is entry
+    assert index.find('Pompeu Fabra University', 'https://www.upf.edu', '') is entry
+    assert index.find('Pompeu Fabra University', country='Spain') is None
+
+
+def test_same_order_across_languages_and_spelling():
+    index = NameIndex()
+    entry = index.add('Universidad de Las Palmas de Gran Canaria', country='Spain')
+    assert index.find('University of Las Palmas de Gran Canaria', country='Spain') is entry
+    assert index.find('Universidad de Las Palmas de Gran Canária', country='Spain') is entry
+
+
+def test_fuzzy_match_requires_same_generic_words():
+    index = NameIndex()
+    index.add('Ohio State University', country='United States')
+    assert index.find('Ohio University', country='United States') is None
+
+
+def test_country_and_domain_conflicts_block_merge():
+    index = NameIndex()
+    index.add('Catholic University', 'https://catholic.edu', 'United States')
+    assert index.find('Catholic University', country='Chile') is None
+    assert index.find('Catholic University', 'https://catholic.cl') is None
+    assert index.find('Catholic University', 'https://www.catholic.edu') is not None
+
+
+def test_merge_records_fills_empty_fields():
+    records = [
+        {'name': 'University of Miami', 'country': 'United States', 'website': '', 'rank': 237},
+        {'name': 'Miami University', 'country': 'United States', 'website': 'https://miamioh.edu', 'rank': 1605},
+        {'name': 'The University of Miami', 'country': 'United States', 'website': 'https://miami.edu', 'rank': 237},
+    ]
+    merged = merge_records(records)
+    assert [record['rank'] for record in merged] == [237, 1605]
+    assert merged[0]['website'] == 'https://miami.edu'
+    assert merged[1]['website'] == 'https://miamioh.edu'
@@ -0,0 +1,68 @@
+import asyncio
+import csv
+import json
+import time
+
+from common.profiler import NULL_PROFILER, StageProfiler
+
+
+def test_nested_stages_export_trace_and_collapsed_stacks(tmp_path):
+    profiler = StageProfiler()
+    with profiler.stage('university', 'Universidad de Sevilla'):
+        with profiler.stage('fetch', cpu=False):
+            time.sleep(0.02)
+        with profiler.stage('extract'):
+            sum(range(10000))
+    with profiler.stage('export'):
+        pass
+
+    trace_path = tmp_path / 'trace.json'
+    profiler.export(str(trace_path))
+    events = json.loads(trace_path.read_text(encoding='utf-8'))['traceEvents']
+    assert [event['name'] for event in events] == ['fetch', 'extract', 'university', 'export']
+    assert all(event['ph'] == 'X' and event['dur'] >= 0 for event in events)
+    fetch, extract, university, _ = events
+    # 内层阶段沿用外层的大学，并且都在外层阶段的时间范围内
+    assert fetch['args'] == {'item': 'Universidad de Sevilla'}
+    assert 'cpu_ms' in extract['args']
+    assert university['ts'] <= fetch['ts'] and fetch['ts'] + fetch['dur'] <= university['ts'] + university['dur']
+    assert fetch['dur'] >= 20000
+
+    collapsed_path = tmp_path / 'trace.folded'
+    profiler.export(str(collapsed_path))
+    stacks = dict(line.rsplit(' ', 1) for line in collapsed_path.read_text(encoding='utf-8').splitlines())
+    assert set(stacks) == {'university', 'university;fetch', 'university;extract', 'export'}
+    # 外层阶段只计自身耗时，不包括子阶段
+    assert int(stacks['university;fetch']) >= 20000
+    assert int(stacks['university']) < int(stacks['university;fetch'])
+
+    with open(tmp_path / 'trace.items.csv', encoding='utf-8') as f:
+        rows = list(csv.reader(f))
+    assert rows[0][0] == 'item'
+    assert {'fetch_wall_ms', 'university_wall_ms', 'university_cpu_ms', 'export_wall_ms'} <= set(rows[0])
+    assert [row[0] for row in rows[1:]] == ['Universidad de Sevilla']
+    assert profiler.totals['fetch'][0] == 1
+
+
+def test_concurrent_tasks_get_separate_lanes():
+    profiler = StageProfiler()
+
+    async def work(name):
+        with profiler.stage('university', name, cpu=False):
+            await asyncio.sleep(0.01)
+            with profiler.stage('parse'):
+                pass
+
+    async def run():
+        await asyncio.gather(work('a'), work('b'))
+
+    asyncio.run(run())
+    assert dict(profiler.collapsed).keys() == {'university', 'university;parse'}
+    assert {event['tid'] for event in profiler.events} == {1, 2}
+    assert set(profiler.items) == {'a', 'b'}
+
+
+def test_disabled_profiler_records_nothing():
+    with NULL_PROFILER.stage('fetch', 'x'):
+        pass
+    assert NULL_PROFILER.events == [] and NULL_PROFILER.totals == {}
@@ -0,0 +1,93 @@
+import csv
+
+from common.ranking_store import RankingStore, name_key, normalize_ranking_record, read_ranking_file
+
+
+def ranking(rank, university, country='Spain', **extra):
+    return {'rank': rank, 'university': university, 'country': country, **extra}
+
+
+def names(store, year):
+    return [row.university for row in store.iter_year(year)]
+
+
+def test_upsert_reports_added_reranked_and_stale_without_prune(rankings_db):
+    with RankingStore(rankings_db) as store:
+        store.upsert_year(2025, [ranking(1, 'Alpha University'), ranking(2, 'Beta University'),
+                                 ranking(3, 'Gamma University')])
+        report = store.upsert_year(2025, [ranking(1, 'Beta University'), ranking(2, 'ALPHA University'),
+                                          ranking(3, 'Delta University')])
+        assert report.added == ['Delta University']
+        assert report.reranked == [('Beta University', 2, 1), ('ALPHA University', 1, 2)]
+        # 未指定prune：文件中没有的大学仍在库中，报告为stale而不是removed
+        assert report.removed == []
+        assert report.stale == ['Gamma University']
+        assert report.summary()['stale'] == 1
+        assert 'Gamma University' in names(store, 2025)
+        assert store.count(2025) == 4
+
+
+def test_upsert_with_prune_removes_missing(rankings_db):
+    with RankingStore(rankings_db) as store:
+        store.upsert_year(2025, [ranking(1, 'Alpha University'), ranking(2, 'Beta University')])
+        report = store.upsert_year(2025, [ranking(1, 'Alpha University')], prune=True)
+        assert report.removed == ['Beta University']
+        assert report.stale == []
+        assert report.unchanged == 1
+        assert names(store, 2025) == ['Alpha University']
+
+
+def test_upsert_skips_duplicates_in_file_and_keeps_years_apart(rankings_db):
+    with RankingStore(rankings_db) as store:
+        report = store.upsert_year(2024, [ranking(5, 'Alpha University'), ranking(6, 'ALPHA UNIVERSITY')])
+        assert report.duplicates == ['ALPHA UNIVERSITY']
+        store.upsert_year(2025, [ranking(3, 'Alpha University')])
+        assert store.years() == [2024, 2025]
+        change, = store.year_over_year(2025)
+        assert (change.previous_rank, change.rank, change.rank_change) == (5, 3, 2)
+
+
+def test_upsert_reports_duplicate_rows_already_in_db(rankings_db):
+    with RankingStore(rankings_db) as store:
+        store.upsert_year(2025, [ranking(1, 'Alpha University')])
+        # 直接写入一条同年同名（大小写不同）的旧记录
+        store._conn.execute("INSERT INTO universities (rank, university, year) VALUES (9, 'ALPHA  University', 2025)")
+        report = store.upsert_year(2025, [ranking(1, 'Alpha University')])
+        assert report.db_duplicates == ['ALPHA  University']
+        assert report.summary()['db_duplicates'] == 1
+        assert store.count(2025) == 2
+
+        report = store.upsert_year(2025, [ranking(1, 'Alpha University')], prune=True)
+        assert report.db_duplicates == ['ALPHA  University']
+        assert report.removed == []
+        assert names(store, 2025) == ['Alpha University']
+
+        report = store.upsert_year(2025, [ranking(1, 'Alpha University')], prune=True)
+        assert report.db_duplicates == []
+
+
+def test_name_key_only_normalises_case_and_spacing():
+    assert name_key('  University   of Miami ') == 'university of miami'
+    assert name_key('University of Miami') != name_key('Miami University')
+
+
+def test_normalize_ranking_record_handles_csv_headers():
+    record = normalize_ranking_record({'Rank': '12', 'University': ' Universidad  de Sevilla ', 'Country': 'Spain',
+                                       'Total_Score': '71.5', 'Research': 'n/a'}, default_year=2025)
+    assert record['rank'] == 12
+    assert record['university'] == 'Universidad de Sevilla'
+    assert record['total_score'] == 71.5
+    assert record['research'] is None
+    assert record['year'] == 2025
+    assert normalize_ranking_record({'rank': '1', 'university': '  '}) is None
+
+
+def test_read_ranking_file_csv(tmp_path):
+    path = tmp_path / 'rankings.csv'
+    with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=['Rank', 'University', 'Country', 'Year'])
+        writer.writeheader()
+        writer.writerow({'Rank': '1', 'University': 'Alpha University', 'Country': 'Spain', 'Year': '2024'})
+        writer.writerow({'Rank': '2', 'University': '', 'Country': 'Spain', 'Year': '2024'})
+    records = read_ranking_file(str(path))
+    assert [(r['rank'], r['university'], r['year']) for r in records] == [(1, 'Alpha University', 2024)]
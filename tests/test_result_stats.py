@@ -0,0 +1,41 @@
+import json
+
+from common.result_stats import ResultAggregator
+
+
+def test_add_and_snapshot_counts():
+    results = ResultAggregator()
+    results.extend([
+        {'email': 'info@US.es', 'country': 'Spain', 'source': 'webometrics', 'emails_found': 3},
+        {'email': '', 'country': 'Spain', 'source': 'webometrics', 'emails_found': 0},
+        {'email': 'intl@ox.ac.uk', 'country': 'UK', 'source': '4icu'},
+        {'email': 'admissions@us.es', 'source': '4icu'},
+        {'email': None, 'country': 'UK'},
+    ])
+    snapshot = results.snapshot()
+    assert (snapshot['total'], snapshot['with_emails'], snapshot['success_rate']) == (5, 3, 60.0)
+    # 没有emails_found字段的结果按是否成功计1
+    assert snapshot['emails_found'] == 5
+    assert snapshot['countries'] == {
+        'Spain': {'total': 2, 'with_emails': 1},
+        'UK': {'total': 2, 'with_emails': 1},
+        'Unknown': {'total': 1, 'with_emails': 1},
+    }
+    assert snapshot['sources'] == {
+        'webometrics': {'total': 2, 'with_emails': 1},
+        '4icu': {'total': 2, 'with_emails': 2},
+        'unknown': {'total': 1, 'with_emails': 0},
+    }
+    assert snapshot['email_domains'] == {'us.es': 2, 'ox.ac.uk': 1}
+    json.dumps(snapshot)
+
+
+def test_rankings_skip_empty_groups_and_respect_limit():
+    results = ResultAggregator(email_field='official_email', count_field=None)
+    results.extend([{'official_email': '', 'country': 'France'}] * 3 +
+                   [{'official_email': 'a@b.es', 'country': 'Spain'}] * 2)
+    assert [country for country, _ in results.top_countries()] == ['France', 'Spain']
+    assert [country for country, _ in results.top_countries(successful=True)] == ['Spain']
+    assert [country for country, _ in results.top_countries(limit=1)] == ['France']
+    assert results.by_country['Spain'].success_rate == 100.0
+    assert ResultAggregator().snapshot()['success_rate'] == 0.0
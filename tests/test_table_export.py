@@ -0,0 +1,74 @@
+import pytest
+
+from common.table_export import ExportSummary, export_records
+
+ROWS = [
+    {'英文名称': 'University of Seville', '地区': 'Andalucía', '官方邮箱': 'internacional@us.es', '世界排名': 300,
+     '备注': '含逗号, 和 "引号"'},
+    {'英文名称': 'Pompeu Fabra University', '地区': 'Cataluña', '官方邮箱': '', '世界排名': 150, '备注': ''},
+    {'英文名称': 'University of Granada', '地区': 'Andalucía', '官方邮箱': 'info@ugr.es', '世界排名': 400,
+     '备注': '多行\n备注'},
+]
+
+
+def sheet_values(path, name):
+    openpyxl = pytest.importorskip('openpyxl')
+    workbook = openpyxl.load_workbook(path, read_only=True)
+    try:
+        return [list(row) for row in workbook[name].iter_rows(values_only=True)]
+    finally:
+        workbook.close()
+
+
+def regions_of(rows):
+    counts = {}
+    for row in rows:
+        counts[row['地区']] = counts.get(row['地区'], 0) + 1
+    return [{'地区': region, '数量': count} for region, count in counts.items()]
+
+
+def test_csv_matches_pandas_output(tmp_path):
+    pd = pytest.importorskip('pandas')
+    expected = tmp_path / 'pandas.csv'
+    pd.DataFrame(ROWS).to_csv(expected, index=False, encoding='utf-8-sig')
+    actual = tmp_path / 'stream.csv'
+    export_records(iter(ROWS), csv_path=str(actual))
+    assert actual.read_bytes() == expected.read_bytes()
+    assert not (tmp_path / 'stream.csv.tmp').exists()
+
+
+def test_excel_matches_pandas_output_with_extra_sheets(tmp_path):
+    pd = pytest.importorskip('pandas')
+    def regions(summary):
+        return [{'地区': region, '数量': count} for region, count in summary.groups['地区'].items()]
+
+    expected = tmp_path / 'pandas.xlsx'
+    with pd.ExcelWriter(expected, engine='openpyxl') as writer:
+        pd.DataFrame(ROWS).to_excel(writer, sheet_name='大学数据', index=False)
+        pd.DataFrame(regions_of(ROWS)).to_excel(writer, sheet_name='地区分布', index=False)
+
+    actual = tmp_path / 'stream.xlsx'
+    summary = export_records(ROWS, excel_path=str(actual), sheet_name='大学数据',
+                             summary=ExportSummary(group_fields=['地区']),
+                             extra_sheets=lambda summary: [('地区分布', regions(summary))])
+    for name in ('大学数据', '地区分布'):
+        assert sheet_values(actual, name) == sheet_values(expected, name)
+    assert summary.total == 3
+
+
+def test_summary_counts_filled_groups_and_keywords():
+    summary = ExportSummary(group_fields=['地区'], keyword_fields={'官方邮箱': ['INFO', 'internacional']})
+    export_records(ROWS + [{'英文名称': 'Unknown'}], columns=['英文名称'], summary=summary)
+    assert summary.total == 4
+    assert summary.filled['官方邮箱'] == 2
+    assert summary.ranked('地区') == [('Andalucía', 2), ('Cataluña', 1), ('未知', 1)]
+    assert dict(summary.keywords['官方邮箱']) == {'info': 1, 'internacional': 1}
+    assert summary.share(1) == '25.0%'
+
+
+def test_columns_default_to_first_record_and_empty_input(tmp_path):
+    path = tmp_path / 'out.csv'
+    export_records([{'a': 1, 'b': 2}, {'a': 3, 'c': 4}], csv_path=str(path))
+    assert path.read_text(encoding='utf-8-sig').splitlines() == ['a,b', '1,2', '3,']
+    assert export_records([], csv_path=str(path)).total == 0
+    assert path.read_text(encoding='utf-8-sig').strip() == ''
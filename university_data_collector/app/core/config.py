@@ -17,6 +17,9 @@ class Settings(BaseSettings):
     request_delay: float = 1.0  # 请求间隔（秒）
     max_retries: int = 3
     timeout: int = 30
+    http_cache_path: Optional[str] = "data/http_cache.db"  # 响应缓存文件，留空则不缓存
+    http_cache_ttl: int = 24 * 3600  # 缓存有效期（秒），过期后用条件请求重新验证
+    http_cache_max_mb: int = 512  # 缓存总大小上限（MB）
     
     # 数据源配置
     spain_education_api: Optional[str] = None
@@ -25,6 +28,8 @@ class Settings(BaseSettings):
     # 邮件验证配置
     email_validation_enabled: bool = True
     domain_validation_enabled: bool = True
+    email_validation_cache_path: Optional[str] = "data/email_validation.db"  # 邮箱域名结论缓存，留空则只缓存在内存
+    email_validation_cache_ttl: int = 7 * 24 * 3600  # 域名结论有效期（秒）
     
     # 日志配置
     log_level: str = "INFO"
@@ -1,21 +1,36 @@
 import asyncio
-import aiohttp
 import re
 from bs4 import BeautifulSoup
-from typing import List, Dict, Optional, Set
+from typing import List, Dict, Optional, Set, Tuple
 from loguru import logger
 import time
 from urllib.parse import urljoin, urlparse
-from email_validator import validate_email, EmailNotValidError
+import sys
+from pathlib import Path
+
+# 添加仓库根目录到Python路径，以使用共享的common模块
+sys.path.insert(0, str(Path(__file__).resolve().parents[3]))
+from common.contact_frontier import discover_contact_emails
+from common.email_extractor import extract_emails
+from common.email_validation import EmailValidator
+from common.fetcher import AsyncFetcher, FetchConfig
+from common.name_index import NameIndex, merge_records
 
 from app.core.config import settings, SPAIN_DATA_SOURCES, EMAIL_VALIDATION_RULES
 from app.models.university import UniversityCreate
 
+# 西班牙大学常见的联系页面路径（页面中没有明确链接时按顺序猜测）
+SPAIN_CONTACT_PATHS = ('contacto', 'contact', 'contacto.html', 'contact.html', 'about/contact', 'en/contact')
+
+# 合并重复记录时各数据源的优先顺序（字段以排在前面的数据源为准）
+SOURCE_OFFICIAL, SOURCE_DIRECTORY, SOURCE_RANKING = range(3)
+
 class SpainUniversityScraper:
     """西班牙大学数据收集器"""
     
     def __init__(self):
         self.session = None
+        self.fetcher = None
         self.headers = {
             'User-Agent': settings.user_agent,
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
@@ -25,29 +40,42 @@ class SpainUniversityScraper:
         }
         self.collected_emails: Set[str] = set()
         self.universities: List[Dict] = []
+        self.cleaned_universities: List[Dict] = []
+        # (数据源顺序, 记录)：各数据源并发完成，结束时按数据源顺序合并，结果与完成先后无关
+        self._records: List[Tuple[tuple, Dict]] = []
+        # 已抓取邮箱的大学（按规范化名称/官网域名匹配），重复的记录不再抓取
+        self._claimed = NameIndex()
+        # 同时提取邮箱的大学数
+        self.max_concurrency = 10
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        # 语法检查结果与域名MX结论均缓存，同一域名只查询一次DNS
+        self.email_validator = EmailValidator.from_settings(settings)
         
     async def __aenter__(self):
-        self.session = aiohttp.ClientSession(headers=self.headers)
+        self.fetcher = AsyncFetcher(FetchConfig.from_settings(settings, headers=self.headers))
+        await self.fetcher.start()
+        self.session = self.fetcher.session
         return self
         
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        if self.session:
-            await self.session.close()
+        if self.fetcher:
+            self.fetcher.stats.log_summary()
+            await self.fetcher.close()
+        self.email_validator.close()
     
     async def collect_spain_universities(self) -> List[Dict]:
         """收集西班牙大学数据的主方法"""
         logger.info("开始收集西班牙大学数据...")
         
-        # 1. 从官方数据源收集
-        await self._collect_from_official_sources()
-        
-        # 2. 从大学目录收集
-        await self._collect_from_directories()
-        
-        # 3. 从排名网站收集
-        await self._collect_from_rankings()
+        # 1-3. 官方数据源、大学目录、排名网站三个阶段并发执行，
+        # 每所大学的邮箱提取在阶段内作为独立任务有界并发
+        await asyncio.gather(
+            self._collect_from_official_sources(),
+            self._collect_from_directories(),
+            self._collect_from_rankings(),
+        )
         
-        # 4. 数据清洗和验证
+        # 4. 数据清洗和验证（已在结果到达时增量完成）
         cleaned_data = await self._clean_and_validate_data()
         
         logger.info(f"收集完成，共获取 {len(cleaned_data)} 所大学信息")
@@ -57,64 +85,69 @@ class SpainUniversityScraper:
         """从官方数据源收集大学信息"""
         logger.info("从官方数据源收集大学信息...")
         
-        for source in SPAIN_DATA_SOURCES["official_sources"]:
+        async def process(index: int, source: Dict):
             try:
                 logger.info(f"正在处理: {source['name']}")
                 
                 if source['name'] == "西班牙教育部":
-                    await self._scrape_education_ministry()
+                    await self._scrape_education_ministry(index)
                 elif source['name'] == "西班牙大学校长会议(CRUE)":
-                    await self._scrape_crue()
-                    
-                await asyncio.sleep(settings.request_delay)
+                    await self._scrape_crue(index)
                 
             except Exception as e:
                 logger.error(f"处理 {source['name']} 时出错: {str(e)}")
+        
+        await asyncio.gather(*(process(index, source)
+                               for index, source in enumerate(SPAIN_DATA_SOURCES["official_sources"])))
     
-    async def _scrape_education_ministry(self):
+    async def _scrape_education_ministry(self, source_index: int = 0):
         """爬取西班牙教育部网站"""
         url = "https://www.educacionyfp.gob.es/servicios-al-ciudadano/catalogo/estudios/universitarios.html"
-        
+
         try:
-            async with self.session.get(url, timeout=settings.timeout) as response:
-                if response.status == 200:
-                    html = await response.text()
-                    soup = BeautifulSoup(html, 'html.parser')
-                    
-                    # 查找大学列表
-                    university_links = soup.find_all('a', href=re.compile(r'universidad|universidad'))
-                    
-                    for link in university_links[:50]:  # 限制数量避免过载
-                        university_name = link.get_text(strip=True)
-                        university_url = urljoin(url, link.get('href', ''))
-                        
-                        if university_name and "universidad" in university_name.lower():
-                            await self._extract_university_details(university_name, university_url)
-                            
+            html = await self.fetcher.fetch_text(url, timeout=settings.timeout)
+            if html:
+                soup = BeautifulSoup(html, 'html.parser')
+
+                # 查找大学列表
+                university_links = soup.find_all('a', href=re.compile(r'universidad|universidad'))
+
+                tasks = []
+                for index, link in enumerate(university_links[:50]):  # 限制数量避免过载
+                    university_name = link.get_text(strip=True)
+                    university_url = urljoin(url, link.get('href', ''))
+
+                    if university_name and "universidad" in university_name.lower():
+                        tasks.append(self._extract_university_details(
+                            university_name, university_url, order=(SOURCE_OFFICIAL, source_index, index)))
+                await asyncio.gather(*tasks)
+
         except Exception as e:
             logger.error(f"爬取教育部网站失败: {str(e)}")
-    
-    async def _scrape_crue(self):
+
+    async def _scrape_crue(self, source_index: int = 0):
         """爬取CRUE网站"""
         url = "https://www.crue.org/universidades/"
-        
+
         try:
-            async with self.session.get(url, timeout=settings.timeout) as response:
-                if response.status == 200:
-                    html = await response.text()
-                    soup = BeautifulSoup(html, 'html.parser')
-                    
-                    # 查找大学列表
-                    university_elements = soup.find_all(['a', 'div'], class_=re.compile(r'universidad|university'))
-                    
-                    for element in university_elements[:50]:
-                        university_name = element.get_text(strip=True)
-                        if university_name and "universidad" in university_name.lower():
-                            await self._extract_university_details(university_name, "")
-                            
+            html = await self.fetcher.fetch_text(url, timeout=settings.timeout)
+            if html:
+                soup = BeautifulSoup(html, 'html.parser')
+
+                # 查找大学列表
+                university_elements = soup.find_all(['a', 'div'], class_=re.compile(r'universidad|university'))
+
+                tasks = []
+                for index, element in enumerate(university_elements[:50]):
+                    university_name = element.get_text(strip=True)
+                    if university_name and "universidad" in university_name.lower():
+                        tasks.append(self._extract_university_details(
+                            university_name, "", order=(SOURCE_OFFICIAL, source_index, index)))
+                await asyncio.gather(*tasks)
+
         except Exception as e:
             logger.error(f"爬取CRUE网站失败: {str(e)}")
-    
+
     async def _collect_from_directories(self):
         """从大学目录收集信息"""
         logger.info("从大学目录收集信息...")
@@ -158,14 +191,17 @@ class SpainUniversityScraper:
             }
         ]
         
-        for uni_data in study_spain_data:
-            await self._extract_university_details(
+        await asyncio.gather(*(
+            self._extract_university_details(
                 uni_data["name_es"], 
                 uni_data["website"],
                 english_name=uni_data["name_en"],
                 city=uni_data["city"],
-                region=uni_data["region"]
+                region=uni_data["region"],
+                order=(SOURCE_DIRECTORY, index)
             )
+            for index, uni_data in enumerate(study_spain_data)
+        ))
     
     async def _collect_from_rankings(self):
         """从排名网站收集信息"""
@@ -193,29 +229,41 @@ class SpainUniversityScraper:
             }
         ]
         
-        for uni_data in qs_spain_data:
-            await self._extract_university_details(
+        await asyncio.gather(*(
+            self._extract_university_details(
                 uni_data["name_en"],
                 uni_data["website"],
                 city=uni_data["city"],
-                ranking_world=uni_data["ranking_world"]
+                ranking_world=uni_data["ranking_world"],
+                order=(SOURCE_RANKING, index)
             )
+            for index, uni_data in enumerate(qs_spain_data)
+        ))
     
     async def _extract_university_details(self, name: str, website: str, 
                                         english_name: str = None, 
                                         city: str = None, 
                                         region: str = None,
-                                        ranking_world: int = None):
-        """提取大学详细信息"""
+                                        ranking_world: int = None,
+                                        order: tuple = ()):
+        """提取大学详细信息；order 为数据源顺序，决定合并重复记录时的优先级"""
         try:
+            name_en = english_name or self._translate_to_english(name)
+            
+            # 其他数据源已认领的大学不再重复抓取邮箱，但记录仍保留，结束时合并字段
+            claimed = True
+            if website and name_en:
+                _, claimed = self._claimed.match_or_add(name_en, website, aliases=[name])
+            
             # 如果网站可用，尝试获取更多信息
             emails = []
-            if website and website.startswith('http'):
-                emails = await self._extract_emails_from_website(website)
+            if claimed and website and website.startswith('http'):
+                async with self._semaphore:
+                    emails = await self._extract_emails_from_website(website)
             
             # 构建大学数据
             university_data = {
-                "name_en": english_name or self._translate_to_english(name),
+                "name_en": name_en,
                 "name_local": name,
                 "country": "Spain",
                 "region": region,
@@ -231,6 +279,7 @@ class SpainUniversityScraper:
             }
             
             self.universities.append(university_data)
+            self._records.append((order, university_data))
             logger.info(f"收集到大学: {university_data['name_en']}")
             
         except Exception as e:
@@ -241,42 +290,16 @@ class SpainUniversityScraper:
         emails = []
         
         try:
-            # 尝试访问联系页面
-            contact_urls = [
-                f"{website}/contacto",
-                f"{website}/contact",
-                f"{website}/contacto.html",
-                f"{website}/contact.html",
-                f"{website}/about/contact",
-                f"{website}/en/contact"
-            ]
-            
-            for contact_url in contact_urls:
-                try:
-                    async with self.session.get(contact_url, timeout=10) as response:
-                        if response.status == 200:
-                            html = await response.text()
-                            found_emails = self._extract_emails_from_html(html)
-                            emails.extend(found_emails)
-                            if emails:
-                                break
-                except:
-                    continue
-            
-            # 如果联系页面没有找到，尝试主页
-            if not emails:
-                async with self.session.get(website, timeout=10) as response:
-                    if response.status == 200:
-                        html = await response.text()
-                        emails = self._extract_emails_from_html(html)
+            # 主页 + 按得分排序的联系页面；与其他收集器相同，找到高优先级邮箱
+            # （国际处、招生处）才停止，主页上的普通邮箱不会让联系页面被跳过
+            emails = await discover_contact_emails(
+                self._fetch_contact_page, website,
+                extract=self._extract_emails_from_html, guessed_paths=SPAIN_CONTACT_PATHS
+            )
             
-            # 去重并验证
+            # 去重并批量验证（先查语法，再按域名检查能否收信）
             unique_emails = list(set(emails))
-            valid_emails = []
-            
-            for email in unique_emails:
-                if self._validate_email(email):
-                    valid_emails.append(email)
+            valid_emails = await self._validate_emails(unique_emails)
             
             return valid_emails[:5]  # 限制返回数量
             
@@ -284,10 +307,13 @@ class SpainUniversityScraper:
             logger.error(f"提取邮箱失败 {website}: {str(e)}")
             return []
     
+    async def _fetch_contact_page(self, url: str) -> Optional[str]:
+        """抓取联系页面候选"""
+        return await self.fetcher.fetch_text(url, timeout=10)
+    
     def _extract_emails_from_html(self, html: str) -> List[str]:
         """从HTML中提取邮箱地址"""
-        email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-        emails = re.findall(email_pattern, html)
+        emails = extract_emails(html)
         
         # 过滤掉明显的无效邮箱
         filtered_emails = []
@@ -297,13 +323,9 @@ class SpainUniversityScraper:
         
         return filtered_emails
     
-    def _validate_email(self, email: str) -> bool:
-        """验证邮箱地址"""
-        try:
-            validate_email(email)
-            return True
-        except EmailNotValidError:
-            return False
+    async def _validate_emails(self, emails: List[str]) -> List[str]:
+        """批量验证邮箱地址，保留有效的"""
+        return await self.email_validator.filter_valid(emails)
     
     def _find_president_email(self, emails: List[str]) -> Optional[str]:
         """查找校长邮箱"""
@@ -341,30 +363,22 @@ class SpainUniversityScraper:
         return english_name
     
     async def _clean_and_validate_data(self) -> List[Dict]:
-        """清洗和验证数据"""
-        logger.info("开始数据清洗和验证...")
+        """清洗和验证数据：按数据源顺序合并重复记录，排在前面的记录为主，空字段由后面的记录补全"""
+        records = [uni for _, uni in sorted(self._records, key=lambda item: item[0])]
         
-        cleaned_data = []
-        seen_names = set()
+        # 基本验证
+        records = [uni for uni in records if uni['name_en'] and uni['website']]
         
-        for uni in self.universities:
-            # 去重
-            if uni['name_en'] in seen_names:
-                continue
-            seen_names.add(uni['name_en'])
-            
-            # 基本验证
-            if not uni['name_en'] or not uni['website']:
-                continue
-            
-            # 确保必要字段存在
+        # 去重（"Universitat Pompeu Fabra" 与 "Pompeu Fabra University" 视为同一所）
+        self.cleaned_universities = merge_records(records, name_field='name_en', alias_fields=['name_local'])
+        
+        # 确保必要字段存在
+        for uni in self.cleaned_universities:
             uni.setdefault('country', 'Spain')
             uni.setdefault('data_source', 'Spain University Scraper')
-            
-            cleaned_data.append(uni)
         
-        logger.info(f"数据清洗完成，保留 {len(cleaned_data)} 条有效记录")
-        return cleaned_data
+        logger.info(f"数据清洗完成，保留 {len(self.cleaned_universities)} 条有效记录")
+        return self.cleaned_universities
 
 # 使用示例
 async def main():
@@ -5,14 +5,16 @@
 
 import sys
 import os
-import json
-import pandas as pd
 from datetime import datetime
 from pathlib import Path
 
 # 添加项目根目录到Python路径
 project_root = Path(__file__).parent
 sys.path.insert(0, str(project_root))
+# 添加仓库根目录到Python路径，以使用共享的common模块
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from common.jsonl import iter_records, prefer_jsonl
+from common.table_export import EXCEL_AVAILABLE, ExportSummary, export_records
 
 def find_latest_data():
     """查找最新的数据文件"""
@@ -22,8 +24,8 @@ def find_latest_data():
         print("❌ 数据目录不存在，请先运行数据收集脚本")
         return None
     
-    # 查找数据文件
-    data_files = list(data_dir.glob("spain_universities_*.json"))
+    # 查找数据文件（JSON数组或JSON Lines）
+    data_files = list(data_dir.glob("spain_universities_*.json")) + list(data_dir.glob("spain_universities_*.jsonl"))
     
     if not data_files:
         print("❌ 未找到数据文件，请先运行数据收集脚本")
@@ -34,19 +36,11 @@ def find_latest_data():
     return latest_file
 
 def load_data(file_path):
-    """加载数据"""
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        return data
-    except Exception as e:
-        print(f"❌ 加载数据失败: {str(e)}")
-        return None
+    """逐条读取数据"""
+    return iter_records(prefer_jsonl(str(file_path)))
 
 def prepare_data_for_export(data):
-    """准备导出数据"""
-    export_data = []
-    
+    """逐条准备导出数据"""
     for uni in data:
         export_uni = {
             "英文名称": uni.get('name_en', ''),
@@ -69,45 +63,34 @@ def prepare_data_for_export(data):
             "数据来源": uni.get('data_source', ''),
             "备注": uni.get('notes', '')
         }
-        export_data.append(export_uni)
-    
-    return export_data
+        yield export_uni
 
-def export_to_csv(data, filename):
-    """导出为CSV"""
-    df = pd.DataFrame(data)
-    df.to_csv(filename, index=False, encoding='utf-8-sig')
-    print(f"✅ CSV文件已导出: {filename}")
-
-def export_to_excel(data, filename):
-    """导出为Excel"""
-    df = pd.DataFrame(data)
+def stat_sheets(summary):
+    """Excel中主表之后的统计工作表"""
+    # 统计信息
+    stats = [
+        {"项目": "总大学数量", "数值": summary.total},
+        {"项目": "有官方邮箱", "数值": summary.filled['官方邮箱']},
+        {"项目": "有校长邮箱", "数值": summary.filled['校长邮箱']},
+        {"项目": "有行政邮箱", "数值": summary.filled['行政邮箱']},
+    ]
     
-    with pd.ExcelWriter(filename, engine='openpyxl') as writer:
-        # 主数据表
-        df.to_excel(writer, sheet_name='大学数据', index=False)
-        
-        # 统计信息
-        stats = [
-            {"项目": "总大学数量", "数值": len(data)},
-            {"项目": "有官方邮箱", "数值": len([u for u in data if u.get('官方邮箱')])},
-            {"项目": "有校长邮箱", "数值": len([u for u in data if u.get('校长邮箱')])},
-            {"项目": "有行政邮箱", "数值": len([u for u in data if u.get('行政邮箱')])},
-        ]
-        stats_df = pd.DataFrame(stats)
-        stats_df.to_excel(writer, sheet_name='统计信息', index=False)
-        
-        # 地区分布
-        regions = {}
-        for uni in data:
-            region = uni.get('地区', '未知')
-            regions[region] = regions.get(region, 0) + 1
-        
-        region_data = [{"地区": k, "数量": v} for k, v in regions.items()]
-        region_df = pd.DataFrame(region_data)
-        region_df.to_excel(writer, sheet_name='地区分布', index=False)
+    # 地区分布
+    region_data = [{"地区": k, "数量": v} for k, v in summary.groups['地区'].items()]
     
-    print(f"✅ Excel文件已导出: {filename}")
+    return [('统计信息', stats), ('地区分布', region_data)]
+
+def export_files(data, csv_filename, excel_filename):
+    """单遍导出CSV和Excel，返回统计"""
+    if not EXCEL_AVAILABLE:
+        print("⚠️ 未安装openpyxl，跳过Excel导出")
+        excel_filename = None
+    summary = export_records(data, csv_filename, excel_filename, sheet_name='大学数据',
+                             summary=ExportSummary(group_fields=('地区',)), extra_sheets=stat_sheets)
+    print(f"✅ CSV文件已导出: {csv_filename}")
+    if excel_filename:
+        print(f"✅ Excel文件已导出: {excel_filename}")
+    return summary
 
 def main():
     """主函数"""
@@ -122,15 +105,8 @@ def main():
     
     print(f"📁 找到数据文件: {data_file}")
     
-    # 加载数据
-    data = load_data(data_file)
-    if not data:
-        sys.exit(1)
-    
-    print(f"✅ 成功加载 {len(data)} 条记录")
-    
-    # 准备导出数据
-    export_data = prepare_data_for_export(data)
+    # 逐条读取并准备导出数据
+    export_data = prepare_data_for_export(load_data(data_file))
     
     # 创建输出目录
     os.makedirs("data/exports", exist_ok=True)
@@ -138,24 +114,26 @@ def main():
     # 生成文件名
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
     
-    # 导出CSV
+    # 导出CSV与Excel（同一遍完成，统计同时累计）
     csv_filename = f"data/exports/spain_universities_{timestamp}.csv"
-    export_to_csv(export_data, csv_filename)
-    
-    # 导出Excel
     excel_filename = f"data/exports/spain_universities_{timestamp}.xlsx"
-    export_to_excel(export_data, excel_filename)
+    try:
+        summary = export_files(export_data, csv_filename, excel_filename)
+    except Exception as e:
+        print(f"❌ 导出失败: {str(e)}")
+        sys.exit(1)
     
     # 统计信息
     print("\n📊 导出统计:")
-    print(f"   总大学数量: {len(data)}")
-    print(f"   有官方邮箱: {len([u for u in export_data if u.get('官方邮箱')])}")
-    print(f"   有校长邮箱: {len([u for u in export_data if u.get('校长邮箱')])}")
-    print(f"   有行政邮箱: {len([u for u in export_data if u.get('行政邮箱')])}")
+    print(f"   总大学数量: {summary.total}")
+    print(f"   有官方邮箱: {summary.filled['官方邮箱']}")
+    print(f"   有校长邮箱: {summary.filled['校长邮箱']}")
+    print(f"   有行政邮箱: {summary.filled['行政邮箱']}")
     
     print(f"\n📄 导出文件:")
     print(f"   CSV: {csv_filename}")
-    print(f"   Excel: {excel_filename}")
+    if EXCEL_AVAILABLE:
+        print(f"   Excel: {excel_filename}")
     
     print(f"\n💡 提示:")
     print(f"   - CSV文件可以用Excel打开")
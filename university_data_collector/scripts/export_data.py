@@ -6,49 +6,41 @@
 
 import sys
 import os
-import json
-import pandas as pd
 from datetime import datetime
 from pathlib import Path
 import argparse
-from typing import List, Dict, Optional
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 
 # 添加项目根目录到Python路径
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
+# 添加仓库根目录到Python路径，以使用共享的common模块
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+from common.jsonl import iter_records, prefer_jsonl
+from common.table_export import EXCEL_AVAILABLE, ExportSummary, export_records
 
-def load_latest_data(data_dir: str = "data") -> List[Dict]:
-    """加载最新的数据文件"""
+def find_latest_data(data_dir: str = "data") -> Optional[Path]:
+    """查找最新的数据文件"""
     data_path = Path(data_dir)
     
     if not data_path.exists():
         print(f"❌ 数据目录不存在: {data_dir}")
-        return []
+        return None
     
-    # 查找最新的数据文件
-    data_files = list(data_path.glob("spain_universities_*.json"))
+    # 查找最新的数据文件（JSON数组或JSON Lines）
+    data_files = list(data_path.glob("spain_universities_*.json")) + list(data_path.glob("spain_universities_*.jsonl"))
     
     if not data_files:
         print(f"❌ 在 {data_dir} 目录中未找到数据文件")
-        return []
+        return None
     
     # 按修改时间排序，获取最新的文件
     latest_file = max(data_files, key=lambda x: x.stat().st_mtime)
     print(f"📁 找到最新数据文件: {latest_file}")
-    
-    try:
-        with open(latest_file, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        print(f"✅ 成功加载 {len(data)} 条记录")
-        return data
-    except Exception as e:
-        print(f"❌ 加载数据失败: {str(e)}")
-        return []
+    return latest_file
 
-def clean_data_for_export(data: List[Dict]) -> List[Dict]:
-    """清理数据，准备导出"""
-    cleaned_data = []
-    
+def clean_data_for_export(data: Iterable[Dict]) -> Iterator[Dict]:
+    """逐条清理数据，准备导出"""
     for uni in data:
         # 创建清理后的记录
         cleaned_uni = {
@@ -89,179 +81,116 @@ def clean_data_for_export(data: List[Dict]) -> List[Dict]:
             "备注": uni.get('notes', '')
         }
         
-        cleaned_data.append(cleaned_uni)
-    
-    return cleaned_data
+        yield cleaned_uni
 
-def export_to_csv(data: List[Dict], output_dir: str = "data/exports") -> str:
-    """导出为CSV格式"""
-    if not data:
-        print("❌ 没有数据可导出")
-        return ""
+def new_summary() -> ExportSummary:
+    """导出时累计的统计：地区、城市分布与公立/私立数量"""
+    return ExportSummary(group_fields=('地区', '城市'), keyword_fields={'大学类型': ('public', 'private')})
+
+def export_files(data: Iterable[Dict], output_dir: str = "data/exports",
+                 formats: Tuple[str, ...] = ('csv', 'excel')) -> Tuple[List[str], Optional[ExportSummary]]:
+    """单遍导出为CSV和/或Excel，返回 (导出的文件, 统计)"""
+    if 'excel' in formats and not EXCEL_AVAILABLE:
+        print("⚠️ 未安装openpyxl，跳过Excel导出")
+        formats = tuple(fmt for fmt in formats if fmt != 'excel')
+    if not formats:
+        return [], None
     
     # 确保输出目录存在
     os.makedirs(output_dir, exist_ok=True)
     
-    # 创建DataFrame
-    df = pd.DataFrame(data)
-    
     # 生成文件名
     timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"spain_universities_{timestamp}.csv"
-    filepath = os.path.join(output_dir, filename)
+    csv_path = os.path.join(output_dir, f"spain_universities_{timestamp}.csv") if 'csv' in formats else None
+    excel_path = os.path.join(output_dir, f"spain_universities_{timestamp}.xlsx") if 'excel' in formats else None
     
     try:
-        # 导出为CSV
-        df.to_csv(filepath, index=False, encoding='utf-8-sig')  # 使用utf-8-sig支持中文
-        print(f"✅ CSV文件已导出: {filepath}")
-        print(f"   记录数量: {len(data)}")
-        print(f"   文件大小: {os.path.getsize(filepath) / 1024:.1f} KB")
-        return filepath
+        summary = export_records(data, csv_path, excel_path, sheet_name='大学数据', summary=new_summary(),
+                                 extra_sheets=generate_stat_sheets)
     except Exception as e:
-        print(f"❌ CSV导出失败: {str(e)}")
-        return ""
-
-def export_to_excel(data: List[Dict], output_dir: str = "data/exports") -> str:
-    """导出为Excel格式"""
-    if not data:
-        print("❌ 没有数据可导出")
-        return ""
+        print(f"❌ 导出失败: {str(e)}")
+        return [], None
     
-    # 确保输出目录存在
-    os.makedirs(output_dir, exist_ok=True)
-    
-    # 创建DataFrame
-    df = pd.DataFrame(data)
-    
-    # 生成文件名
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    filename = f"spain_universities_{timestamp}.xlsx"
-    filepath = os.path.join(output_dir, filename)
+    if not summary.total:
+        print("❌ 没有数据可导出")
+        for filepath in (csv_path, excel_path):
+            if filepath:
+                os.remove(filepath)
+        return [], summary
     
-    try:
-        # 创建Excel写入器
-        with pd.ExcelWriter(filepath, engine='openpyxl') as writer:
-            # 主数据表
-            df.to_excel(writer, sheet_name='大学数据', index=False)
-            
-            # 统计信息表
-            stats_data = generate_statistics(data)
-            stats_df = pd.DataFrame(stats_data)
-            stats_df.to_excel(writer, sheet_name='统计信息', index=False)
-            
-            # 地区分布表
-            region_data = generate_region_stats(data)
-            region_df = pd.DataFrame(region_data)
-            region_df.to_excel(writer, sheet_name='地区分布', index=False)
-            
-            # 城市分布表
-            city_data = generate_city_stats(data)
-            city_df = pd.DataFrame(city_data)
-            city_df.to_excel(writer, sheet_name='城市分布', index=False)
-        
-        print(f"✅ Excel文件已导出: {filepath}")
-        print(f"   记录数量: {len(data)}")
-        print(f"   文件大小: {os.path.getsize(filepath) / 1024:.1f} KB")
+    exported_files = []
+    for filepath, label in ((csv_path, 'CSV'), (excel_path, 'Excel')):
+        if filepath:
+            print(f"✅ {label}文件已导出: {filepath}")
+            print(f"   记录数量: {summary.total}")
+            print(f"   文件大小: {os.path.getsize(filepath) / 1024:.1f} KB")
+            exported_files.append(filepath)
+    if excel_path:
         print(f"   包含工作表: 大学数据, 统计信息, 地区分布, 城市分布")
-        return filepath
-    except Exception as e:
-        print(f"❌ Excel导出失败: {str(e)}")
-        return ""
+    return exported_files, summary
+
+def generate_stat_sheets(summary: ExportSummary) -> List[Tuple[str, List[Dict]]]:
+    """Excel中主表之后的统计工作表"""
+    return [
+        ('统计信息', generate_statistics(summary)),
+        ('地区分布', generate_group_stats(summary, '地区')),
+        ('城市分布', generate_group_stats(summary, '城市')),
+    ]
 
-def generate_statistics(data: List[Dict]) -> List[Dict]:
+def generate_statistics(summary: ExportSummary) -> List[Dict]:
     """生成统计信息"""
-    total_count = len(data)
-    with_official_email = len([u for u in data if u.get('官方邮箱')])
-    with_president_email = len([u for u in data if u.get('校长邮箱')])
-    with_admin_email = len([u for u in data if u.get('行政邮箱')])
-    with_ranking = len([u for u in data if u.get('世界排名')])
+    with_official_email = summary.filled['官方邮箱']
+    with_president_email = summary.filled['校长邮箱']
+    with_admin_email = summary.filled['行政邮箱']
+    with_ranking = summary.filled['世界排名']
     
     # 按大学类型统计
-    public_count = len([u for u in data if 'public' in u.get('大学类型', '').lower()])
-    private_count = len([u for u in data if 'private' in u.get('大学类型', '').lower()])
+    public_count = summary.keywords['大学类型']['public']
+    private_count = summary.keywords['大学类型']['private']
     
     stats = [
-        {"统计项目": "总大学数量", "数值": total_count},
-        {"统计项目": "有官方邮箱", "数值": with_official_email, "百分比": f"{with_official_email/total_count*100:.1f}%"},
-        {"统计项目": "有校长邮箱", "数值": with_president_email, "百分比": f"{with_president_email/total_count*100:.1f}%"},
-        {"统计项目": "有行政邮箱", "数值": with_admin_email, "百分比": f"{with_admin_email/total_count*100:.1f}%"},
-        {"统计项目": "有世界排名", "数值": with_ranking, "百分比": f"{with_ranking/total_count*100:.1f}%"},
-        {"统计项目": "公立大学", "数值": public_count, "百分比": f"{public_count/total_count*100:.1f}%"},
-        {"统计项目": "私立大学", "数值": private_count, "百分比": f"{private_count/total_count*100:.1f}%"},
+        {"统计项目": "总大学数量", "数值": summary.total},
+        {"统计项目": "有官方邮箱", "数值": with_official_email, "百分比": summary.share(with_official_email)},
+        {"统计项目": "有校长邮箱", "数值": with_president_email, "百分比": summary.share(with_president_email)},
+        {"统计项目": "有行政邮箱", "数值": with_admin_email, "百分比": summary.share(with_admin_email)},
+        {"统计项目": "有世界排名", "数值": with_ranking, "百分比": summary.share(with_ranking)},
+        {"统计项目": "公立大学", "数值": public_count, "百分比": summary.share(public_count)},
+        {"统计项目": "私立大学", "数值": private_count, "百分比": summary.share(private_count)},
     ]
     
     return stats
 
-def generate_region_stats(data: List[Dict]) -> List[Dict]:
-    """生成地区分布统计"""
-    regions = {}
-    for uni in data:
-        region = uni.get('地区', '未知')
-        regions[region] = regions.get(region, 0) + 1
-    
-    region_stats = []
-    for region, count in sorted(regions.items(), key=lambda x: x[1], reverse=True):
-        region_stats.append({
-            "地区": region,
-            "大学数量": count,
-            "占比": f"{count/len(data)*100:.1f}%"
-        })
-    
-    return region_stats
+def generate_group_stats(summary: ExportSummary, field: str) -> List[Dict]:
+    """生成地区/城市分布统计"""
+    return [{field: value, "大学数量": count, "占比": summary.share(count)}
+            for value, count in summary.ranked(field)]
 
-def generate_city_stats(data: List[Dict]) -> List[Dict]:
-    """生成城市分布统计"""
-    cities = {}
-    for uni in data:
-        city = uni.get('城市', '未知')
-        cities[city] = cities.get(city, 0) + 1
-    
-    city_stats = []
-    for city, count in sorted(cities.items(), key=lambda x: x[1], reverse=True):
-        city_stats.append({
-            "城市": city,
-            "大学数量": count,
-            "占比": f"{count/len(data)*100:.1f}%"
-        })
-    
-    return city_stats
-
-def print_data_summary(data: List[Dict]):
+def print_data_summary(summary: ExportSummary):
     """打印数据摘要"""
     print("\n" + "="*60)
     print("📊 数据摘要")
     print("="*60)
     
-    total_count = len(data)
+    total_count = summary.total
     print(f"总大学数量: {total_count}")
     
     # 邮箱统计
-    with_official = len([u for u in data if u.get('官方邮箱')])
-    with_president = len([u for u in data if u.get('校长邮箱')])
-    with_admin = len([u for u in data if u.get('行政邮箱')])
+    with_official = summary.filled['官方邮箱']
+    with_president = summary.filled['校长邮箱']
+    with_admin = summary.filled['行政邮箱']
     
-    print(f"有官方邮箱: {with_official} ({with_official/total_count*100:.1f}%)")
-    print(f"有校长邮箱: {with_president} ({with_president/total_count*100:.1f}%)")
-    print(f"有行政邮箱: {with_admin} ({with_admin/total_count*100:.1f}%)")
+    print(f"有官方邮箱: {with_official} ({summary.share(with_official)})")
+    print(f"有校长邮箱: {with_president} ({summary.share(with_president)})")
+    print(f"有行政邮箱: {with_admin} ({summary.share(with_admin)})")
     
     # 地区分布
-    regions = {}
-    for uni in data:
-        region = uni.get('地区', '未知')
-        regions[region] = regions.get(region, 0) + 1
-    
     print(f"\n地区分布 (前5):")
-    for region, count in sorted(regions.items(), key=lambda x: x[1], reverse=True)[:5]:
+    for region, count in summary.ranked('地区', 5):
         print(f"  {region}: {count}")
     
     # 城市分布
-    cities = {}
-    for uni in data:
-        city = uni.get('城市', '未知')
-        cities[city] = cities.get(city, 0) + 1
-    
     print(f"\n城市分布 (前5):")
-    for city, count in sorted(cities.items(), key=lambda x: x[1], reverse=True)[:5]:
+    for city, count in summary.ranked('城市', 5):
         print(f"  {city}: {count}")
 
 def main():
@@ -280,35 +209,26 @@ def main():
     print("📤 西班牙大学数据导出工具")
     print("="*60)
     
-    # 加载数据
-    print("\n📁 加载数据...")
-    data = load_latest_data(args.data_dir)
+    # 查找数据
+    print("\n📁 查找数据...")
+    data_file = find_latest_data(args.data_dir)
     
-    if not data:
+    if not data_file:
         print("❌ 无法加载数据，程序退出")
         sys.exit(1)
     
-    # 清理数据
-    print("\n🧹 清理数据...")
-    cleaned_data = clean_data_for_export(data)
-    
-    # 打印数据摘要
-    print_data_summary(cleaned_data)
-    
-    # 导出数据
+    # 逐条读取、清理并导出，统计在同一遍中完成
     print(f"\n📤 导出数据 (格式: {args.format})...")
+    formats = ('csv', 'excel') if args.format == 'both' else (args.format,)
+    cleaned_data = clean_data_for_export(iter_records(prefer_jsonl(str(data_file))))
+    exported_files, summary = export_files(cleaned_data, args.output_dir, formats)
     
-    exported_files = []
-    
-    if args.format in ['csv', 'both']:
-        csv_file = export_to_csv(cleaned_data, args.output_dir)
-        if csv_file:
-            exported_files.append(csv_file)
+    if not summary or not summary.total:
+        print("❌ 无法加载数据，程序退出")
+        sys.exit(1)
     
-    if args.format in ['excel', 'both']:
-        excel_file = export_to_excel(cleaned_data, args.output_dir)
-        if excel_file:
-            exported_files.append(excel_file)
+    # 打印数据摘要
+    print_data_summary(summary)
     
     # 总结
     print("\n" + "="*60)
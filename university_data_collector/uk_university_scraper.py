@@ -5,8 +5,6 @@
 """
 
 import asyncio
-import aiohttp
-import re
 import csv
 import json
 from bs4 import BeautifulSoup
@@ -14,13 +12,32 @@ from typing import List, Dict, Optional
 from loguru import logger
 from datetime import datetime
 from urllib.parse import urljoin, urlparse
-from email_validator import validate_email, EmailNotValidError
+import sys
+from pathlib import Path
+
+# 添加仓库根目录到Python路径，以使用共享的common模块
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from common.contact_frontier import discover_contact_emails
+from common.email_extractor import extract_emails
+from common.email_validation import EmailValidator
+from common.fetcher import AsyncFetcher, FetchConfig
+from common.http_cache import DEFAULT_CACHE_PATH
+
+try:
+    from app.core.config import settings
+except ImportError:  # 独立运行（uk_university_email_collector）时没有app配置，验证器使用默认设置
+    settings = None
+
+# 英国大学常见的联系页面路径（页面中没有明确链接时按顺序猜测）
+UK_CONTACT_PATHS = ('contact', 'contact-us', 'about/contact', 'enquiries', 'admissions', 'international')
 
 class UKUniversityScraper:
     """英国大学邮箱收集器"""
     
     def __init__(self):
         self.session = None
+        self.fetcher = None
+        self.max_concurrency = 10  # 同时处理的大学数
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
@@ -29,14 +46,20 @@ class UKUniversityScraper:
             'Connection': 'keep-alive',
         }
         self.universities = []
+        # 语法检查结果与域名MX结论均缓存，同一域名只查询一次DNS
+        self.email_validator = EmailValidator.from_settings(settings)
         
     async def __aenter__(self):
-        self.session = aiohttp.ClientSession(headers=self.headers)
+        self.fetcher = AsyncFetcher(FetchConfig(headers=self.headers, cache_path=DEFAULT_CACHE_PATH))
+        await self.fetcher.start()
+        self.session = self.fetcher.session
         return self
         
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        if self.session:
-            await self.session.close()
+        if self.fetcher:
+            self.fetcher.stats.log_summary()
+            await self.fetcher.close()
+        self.email_validator.close()
     
     async def collect_uk_universities(self) -> List[Dict]:
         """收集英国大学邮箱信息"""
@@ -45,10 +68,16 @@ class UKUniversityScraper:
         # 从Wikipedia获取英国大学列表
         uk_universities = await self._get_uk_universities_from_wikipedia()
         
-        # 为每个大学收集邮箱信息
-        for uni in uk_universities:
-            await self._collect_university_emails(uni)
-            await asyncio.sleep(1)  # 避免请求过快
+        # 有界并发地为每个大学收集邮箱信息，结果保持列表顺序
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        
+        async def collect(uni):
+            async with semaphore:
+                return await self._collect_university_emails(uni)
+        
+        for uni_data in await asyncio.gather(*(collect(uni) for uni in uk_universities)):
+            if uni_data:
+                self.universities.append(uni_data)
         
         logger.info(f"收集完成，共处理 {len(self.universities)} 所大学")
         return self.universities
@@ -192,12 +221,12 @@ class UKUniversityScraper:
         logger.info(f"获取到 {len(uk_universities)} 所英国大学")
         return uk_universities
     
-    async def _collect_university_emails(self, university: Dict):
+    async def _collect_university_emails(self, university: Dict) -> Optional[Dict]:
         """收集单个大学的邮箱信息"""
         try:
             website = university.get('website', '')
             if not website:
-                return
+                return None
             
             logger.info(f"正在处理: {university['name']}")
             
@@ -216,76 +245,54 @@ class UKUniversityScraper:
                 "all_emails": '; '.join(emails.values()) if emails else ''
             }
             
-            self.universities.append(uni_data)
+            return uni_data
             
         except Exception as e:
             logger.error(f"处理 {university['name']} 时出错: {str(e)}")
+            return None
     
     async def _extract_emails_from_website(self, website: str) -> Dict[str, str]:
         """从大学网站提取邮箱信息"""
         emails = {}
         
         try:
-            # 尝试访问联系页面
-            contact_urls = [
-                f"{website}/contact",
-                f"{website}/contact-us",
-                f"{website}/about/contact",
-                f"{website}/en/contact",
-                f"{website}/contact-us/",
-                f"{website}/contact/",
-                f"{website}/enquiries",
-                f"{website}/admissions",
-                f"{website}/international"
-            ]
-            
-            for contact_url in contact_urls:
-                try:
-                    async with self.session.get(contact_url, timeout=10) as response:
-                        if response.status == 200:
-                            html = await response.text()
-                            found_emails = self._extract_emails_from_html(html)
-                            
-                            # 分类邮箱
-                            for email in found_emails:
-                                if self._validate_email(email):
-                                    if 'admission' in email.lower():
-                                        emails['admissions'] = email
-                                    elif 'international' in email.lower():
-                                        emails['international'] = email
-                                    elif 'contact' in email.lower():
-                                        emails['contact'] = email
-                                    elif 'info' in email.lower():
-                                        emails['info'] = email
-                                    else:
-                                        emails['general'] = email
-                            
-                            if emails:
-                                break
-                except:
-                    continue
+            # 主页 + 按得分排序的联系页面，找到高优先级邮箱即停止
+            found_emails = await discover_contact_emails(
+                self._fetch_contact_page, website,
+                extract=self._extract_valid_emails, guessed_paths=UK_CONTACT_PATHS, batch_size=3
+            )
+            # 页面中只做语法检查，找到的邮箱再按域名批量检查能否收信
+            found_emails = await self.email_validator.filter_valid(found_emails)
             
-            # 如果联系页面没有找到，尝试主页
-            if not emails:
-                async with self.session.get(website, timeout=10) as response:
-                    if response.status == 200:
-                        html = await response.text()
-                        found_emails = self._extract_emails_from_html(html)
-                        
-                        for email in found_emails:
-                            if self._validate_email(email):
-                                emails['general'] = email
-                                break
+            # 分类邮箱
+            for email in found_emails:
+                if 'admission' in email.lower():
+                    emails['admissions'] = email
+                elif 'international' in email.lower():
+                    emails['international'] = email
+                elif 'contact' in email.lower():
+                    emails['contact'] = email
+                elif 'info' in email.lower():
+                    emails['info'] = email
+                else:
+                    emails['general'] = email
             
         except Exception as e:
             logger.error(f"提取邮箱失败 {website}: {str(e)}")
         
         return emails
     
+    async def _fetch_contact_page(self, url: str) -> Optional[str]:
+        """抓取联系页面候选"""
+        return await self.fetcher.fetch_text(url, timeout=10)
+    
+    def _extract_valid_emails(self, html: str) -> List[str]:
+        """提取并验证页面中的邮箱"""
+        return [email for email in self._extract_emails_from_html(html) if self._validate_email(email)]
+    
     def _extract_emails_from_html(self, html: str) -> List[str]:
         """从HTML中提取邮箱地址"""
-        email_pattern = r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'
-        emails = re.findall(email_pattern, html)
+        emails = extract_emails(html)
         
         # 过滤掉明显的无效邮箱
         excluded_patterns = ['noreply', 'no-reply', 'donotreply', 'example', 'test']
@@ -298,12 +305,8 @@ class UKUniversityScraper:
         return list(set(filtered_emails))  # 去重
     
     def _validate_email(self, email: str) -> bool:
-        """验证邮箱地址"""
-        try:
-            validate_email(email)
-            return True
-        except EmailNotValidError:
-            return False
+        """验证邮箱语法（结果缓存，不查询DNS）"""
+        return self.email_validator.check_syntax(email)
     
     def export_to_csv(self, filename: str = None):
         """导出为CSV格式"""
@@ -5,21 +5,18 @@
 支持多种策略获取大学官方邮箱
 """
 
-import json
-import time
-import re
-import requests
-from urllib.parse import urljoin, urlparse
-from bs4 import BeautifulSoup
+from urllib.parse import urlparse
 import sqlite3
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.options import Options
 import pandas as pd
 import logging
 
+from common.browser_pool import BrowserPool
+from common.email_extractor import extract_emails
+from common.fetcher import SyncFetcher, FetchConfig
+from common.html_links import scan_links
+from common.http_cache import DEFAULT_CACHE_PATH
+from common.jsonl import iter_records, prefer_jsonl, write_records
+
 # 配置日志
 logging.basicConfig(
     level=logging.INFO,
@@ -32,26 +29,25 @@ logging.basicConfig(
 
 class UniversityEmailCollector:
     def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-        })
-        self.email_patterns = [
-            r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b',
-            r'[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}'
-        ]
+        # Google搜索单独限速为每秒1次，其余主机使用默认令牌桶
+        self.fetcher = SyncFetcher(FetchConfig(host_rates={'www.google.com': 1.0},
+                                               cache_path=DEFAULT_CACHE_PATH))
+        self.session = self.fetcher.session
         self.contact_keywords = [
             'contact', 'contact us', 'get in touch', 'reach us',
             'admissions', 'admission', 'enquiry', 'inquiry',
             'info', 'information', 'office', 'department',
             'academic', 'student', 'faculty', 'staff'
         ]
+        # 无头浏览器池（按需启动）
+        self.browser_workers = 2
+        self.browser_pool = None
         
     def load_universities(self, json_file):
-        """加载大学数据"""
+        """加载大学数据（JSON数组或JSON Lines，同名 .jsonl 更新时优先读取）；
+        批处理按下标切片并显示总数，因此整体读入列表"""
         try:
-            with open(json_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            return list(iter_records(prefer_jsonl(json_file)))
         except Exception as e:
             logging.error(f"加载大学数据失败: {e}")
             return []
@@ -62,14 +58,11 @@ class UniversityEmailCollector:
             search_query = f'"{university_name}" "{country}" official website'
             url = f"https://www.google.com/search?q={search_query}"
             
-            response = self.session.get(url, timeout=10)
-            if response.status_code == 200:
-                soup = BeautifulSoup(response.content, 'html.parser')
-                
+            content = self.fetcher.fetch_text(url, timeout=10)
+            if content:
                 # 查找搜索结果中的链接
-                links = soup.find_all('a', href=True)
-                for link in links:
-                    href = link['href']
+                for link in scan_links(content):
+                    href = link.href
                     if href.startswith('/url?q='):
                         # 提取实际URL
                         actual_url = href.split('/url?q=')[1].split('&')[0]
@@ -107,40 +100,36 @@ class UniversityEmailCollector:
         
         try:
             # 获取主页
-            response = self.session.get(website_url, timeout=15)
-            if response.status_code == 200:
-                emails.update(self.extract_emails_from_text(response.text))
+            content = self.fetcher.fetch_text(website_url, timeout=15)
+            if content:
+                emails.update(self.extract_emails_from_text(content))
                 
                 # 解析HTML查找联系页面链接
-                soup = BeautifulSoup(response.content, 'html.parser')
-                contact_links = self.find_contact_links(soup, website_url)
+                contact_links = self.find_contact_links(scan_links(content), website_url)
                 
                 # 访问联系页面
                 for link in contact_links[:3]:  # 限制访问数量
-                    try:
-                        contact_response = self.session.get(link, timeout=10)
-                        if contact_response.status_code == 200:
-                            emails.update(self.extract_emails_from_text(contact_response.text))
-                    except:
-                        continue
+                    contact_content = self.fetcher.fetch_text(link, timeout=10)
+                    if contact_content:
+                        emails.update(self.extract_emails_from_text(contact_content))
                         
         except Exception as e:
             logging.error(f"提取邮箱失败 {website_url}: {e}")
         
         return list(emails)
     
-    def find_contact_links(self, soup, base_url):
+    def find_contact_links(self, links, base_url):
         """查找联系页面链接"""
         contact_links = []
         
-        for link in soup.find_all('a', href=True):
-            href = link.get('href', '').lower()
-            text = link.get_text().lower()
+        for link in links:
+            href = link.href.lower()
+            text = link.text.lower()
             
             # 检查链接文本和URL是否包含联系关键词
             for keyword in self.contact_keywords:
                 if keyword in href or keyword in text:
-                    full_url = urljoin(base_url, link['href'])
+                    full_url = link.absolute(base_url)
                     contact_links.append(full_url)
                     break
         
@@ -148,16 +137,8 @@ class UniversityEmailCollector:
     
     def extract_emails_from_text(self, text):
         """从文本中提取邮箱"""
-        emails = set()
-        
-        for pattern in self.email_patterns:
-            found_emails = re.findall(pattern, text)
-            for email in found_emails:
-                # 过滤掉明显的非官方邮箱
-                if self.is_official_email(email):
-                    emails.add(email.lower())
-        
-        return emails
+        # 过滤掉明显的非官方邮箱
+        return {email for email in extract_emails(text) if self.is_official_email(email)}
     
     def is_official_email(self, email):
         """判断是否为官方邮箱"""
@@ -175,19 +156,17 @@ class UniversityEmailCollector:
         
         return True
     
-    def search_emails_with_selenium(self, university_name, country):
-        """使用Selenium进行更深入的邮箱搜索"""
+    def get_browser_pool(self):
+        """浏览器池在第一次需要渲染时才创建"""
+        if self.browser_pool is None:
+            self.browser_pool = BrowserPool(size=self.browser_workers, page_load_timeout=15)
+        return self.browser_pool
+    
+    def search_emails_with_selenium(self, university_name, country, website=None):
+        """使用浏览器池渲染页面进行更深入的邮箱搜索（静态抓取没有结果时的兜底）"""
         emails = set()
         
         try:
-            # 配置Chrome选项
-            chrome_options = Options()
-            chrome_options.add_argument('--headless')
-            chrome_options.add_argument('--no-sandbox')
-            chrome_options.add_argument('--disable-dev-shm-usage')
-            
-            driver = webdriver.Chrome(options=chrome_options)
-            
             # 搜索策略1: 大学名 + official email
             search_queries = [
                 f'"{university_name}" official email contact',
@@ -195,27 +174,29 @@ class UniversityEmailCollector:
                 f'"{university_name}" admissions office email',
                 f'"{university_name}" international office email'
             ]
+            urls = [f"https://www.google.com/search?q={query}" for query in search_queries]
             
-            for query in search_queries:
-                try:
-                    driver.get(f"https://www.google.com/search?q={query}")
-                    time.sleep(2)
-                    
-                    # 提取页面文本中的邮箱
-                    page_text = driver.page_source
-                    emails.update(self.extract_emails_from_text(page_text))
-                    
-                except Exception as e:
-                    logging.error(f"Selenium搜索失败: {e}")
-                    continue
+            # 官网可能依赖JavaScript渲染，一并交给浏览器
+            if website:
+                urls.insert(0, website)
             
-            driver.quit()
+            # 多个页面在池中的浏览器上并行渲染
+            for page_text in self.get_browser_pool().render_many(urls):
+                if page_text:
+                    emails.update(self.extract_emails_from_text(page_text))
             
         except Exception as e:
-            logging.error(f"Selenium初始化失败: {e}")
+            logging.error(f"Selenium搜索失败: {e}")
         
         return list(emails)
     
+    def close(self):
+        """关闭浏览器池与HTTP会话"""
+        if self.browser_pool is not None:
+            self.browser_pool.close()
+            self.browser_pool = None
+        self.fetcher.close()
+    
     def collect_emails_for_universities(self, universities_data, start_index=0, end_index=None):
         """为大学收集邮箱"""
         if end_index is None:
@@ -239,8 +220,10 @@ class UniversityEmailCollector:
                 logging.info(f"找到官网: {website}")
                 website_emails = self.extract_emails_from_website(website, name)
             
-            # 策略2: 使用Selenium搜索
-            selenium_emails = self.search_emails_with_selenium(name, country)
+            # 策略2: 静态抓取没有结果时，才使用浏览器渲染搜索
+            selenium_emails = []
+            if not website_emails:
+                selenium_emails = self.search_emails_with_selenium(name, country, website)
             
             # 合并邮箱
             all_emails = list(set(website_emails + selenium_emails))
@@ -260,9 +243,6 @@ class UniversityEmailCollector:
             # 保存进度
             if (i + 1) % 10 == 0:
                 self.save_progress(results, f"progress_{start_index}_{i+1}.json")
-            
-            # 避免请求过于频繁
-            time.sleep(2)
         
         return results
     
@@ -302,10 +282,9 @@ class UniversityEmailCollector:
         return ""
     
     def save_progress(self, data, filename):
-        """保存进度"""
+        """保存进度（逐条写入临时文件再原子替换）"""
         try:
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            write_records(filename, data)
             logging.info(f"进度已保存到: {filename}")
         except Exception as e:
             logging.error(f"保存进度失败: {e}")
@@ -326,31 +305,35 @@ def main():
     """主函数"""
     collector = UniversityEmailCollector()
     
-    # 加载大学数据
-    universities = collector.load_universities('universities_501_1000.json')
+    # 异常退出时也要关闭浏览器池，避免残留Chrome进程
+    try:
+        # 加载大学数据
+        universities = collector.load_universities('universities_501_1000.json')
     
-    if not universities:
-        logging.error("无法加载大学数据")
-        return
+        if not universities:
+            logging.error("无法加载大学数据")
+            return
     
-    logging.info(f"开始处理 {len(universities)} 所大学")
+        logging.info(f"开始处理 {len(universities)} 所大学")
     
-    # 分批处理，避免内存问题
-    batch_size = 50
-    all_results = []
+        # 分批处理，避免内存问题
+        batch_size = 50
+        all_results = []
     
-    for i in range(0, len(universities), batch_size):
-        end_idx = min(i + batch_size, len(universities))
-        logging.info(f"处理批次 {i//batch_size + 1}: {i+1}-{end_idx}")
+        for i in range(0, len(universities), batch_size):
+            end_idx = min(i + batch_size, len(universities))
+            logging.info(f"处理批次 {i//batch_size + 1}: {i+1}-{end_idx}")
         
-        batch_results = collector.collect_emails_for_universities(
-            universities, i, end_idx
-        )
-        all_results.extend(batch_results)
+            batch_results = collector.collect_emails_for_universities(
+                universities, i, end_idx
+            )
+            all_results.extend(batch_results)
         
-        # 保存批次结果
-        collector.save_progress(all_results, f"universities_with_emails_{end_idx}.json")
-        collector.export_to_csv(all_results, f"universities_with_emails_{end_idx}.csv")
+            # 保存批次结果
+            collector.save_progress(all_results, f"universities_with_emails_{end_idx}.json")
+            collector.export_to_csv(all_results, f"universities_with_emails_{end_idx}.csv")
+    finally:
+        collector.close()
     
     # 保存最终结果
     collector.save_progress(all_results, "universities_with_emails_final.json")